@@ -1,15 +1,26 @@
 """
 Admin API — moderation and management
 """
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER, paginate, iter_ndjson
 from app.core.security import get_current_user
+from app.models.inquiry import flatten_listing_title
 from app.services.supabase_service import get_supabase_client
+from app.services import batch_analysis
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+# Dashboard aggregates; invalidated when moderation changes listing status
+stats_cache = TTLCache(ttl=settings.admin_stats_ttl_seconds)
+
 
 def require_admin(current_user: dict = Depends(get_current_user)):
     if current_user.get("role") != "admin":
@@ -17,18 +28,59 @@ def require_admin(current_user: dict = Depends(get_current_user)):
     return current_user
 
 
+def _list_response(build_query, response: Response, cursor: Optional[str], limit: int,
+                   format: str, filename: str, transform=None):
+    """One keyset page as a JSON array (next cursor in a header), or every row as NDJSON."""
+    if format == "ndjson":
+        return StreamingResponse(
+            iter_ndjson(build_query, settings.admin_export_page_size, transform),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.ndjson"'},
+        )
+
+    rows, next_cursor = paginate(build_query(), cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [transform(r) for r in rows] if transform else rows
+
+
+def _created_range(query, created_after: Optional[datetime], created_before: Optional[datetime]):
+    if created_after:
+        query = query.gte("created_at", created_after.isoformat())
+    if created_before:
+        query = query.lt("created_at", created_before.isoformat())
+    return query
+
+
 @router.get("/listings")
 async def admin_list_listings(
+    response: Response,
     status: Optional[str] = None,
+    creator_id: Optional[str] = None,
+    ai_analysis_status: Optional[str] = None,
+    featured: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
     current_user: dict = Depends(require_admin),
     supabase=Depends(get_supabase_client),
 ):
-    """Get all listings regardless of status"""
-    query = supabase.table("ip_listings").select("*").order("created_at", desc=True)
-    if status:
-        query = query.eq("status", status)
-    result = query.execute()
-    return result.data
+    """Get listings regardless of status (cursor-paginated, newest first)"""
+    def build_query():
+        query = supabase.table("ip_listings").select("*")
+        if status:
+            query = query.eq("status", status)
+        if creator_id:
+            query = query.eq("creator_id", creator_id)
+        if ai_analysis_status:
+            query = query.eq("ai_analysis_status", ai_analysis_status)
+        if featured is not None:
+            query = query.eq("featured", featured)
+        return _created_range(query, created_after, created_before)
+
+    return _list_response(build_query, response, cursor, limit, format, "listings")
 
 
 @router.put("/listings/{listing_id}/approve")
@@ -41,6 +93,7 @@ async def approve_listing(
     result = supabase.table("ip_listings").update({"status": "published"}).eq("id", listing_id).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Listing not found")
+    stats_cache.invalidate("stats")
     return {"id": listing_id, "status": "published"}
 
 
@@ -54,6 +107,7 @@ async def reject_listing(
     result = supabase.table("ip_listings").update({"status": "archived"}).eq("id", listing_id).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Listing not found")
+    stats_cache.invalidate("stats")
     return {"id": listing_id, "status": "archived"}
 
 
@@ -71,60 +125,202 @@ async def toggle_featured(
     return {"id": listing_id, "featured": featured}
 
 
+class BulkModerationRequest(BaseModel):
+    ids: List[UUID] = Field(..., min_length=1, max_length=500)
+
+
+class BulkFeatureRequest(BulkModerationRequest):
+    featured: bool = True
+
+
+class BulkModerationResult(BaseModel):
+    updated: int
+    not_found: int
+    results: Dict[str, str]  # listing id -> "updated" | "not_found"
+
+
+def _bulk_update(supabase, ids: List[UUID], changes: dict) -> BulkModerationResult:
+    """Apply one UPDATE ... WHERE id IN (...) and report the outcome per id."""
+    # Canonical lowercase form, matching how Postgres returns uuid columns
+    ids = list(dict.fromkeys(str(i) for i in ids))
+    result = supabase.table("ip_listings").update(changes).in_("id", ids).execute()
+    updated = {str(row["id"]).lower() for row in result.data}
+    stats_cache.invalidate("stats")
+    return BulkModerationResult(
+        updated=len(updated),
+        not_found=len(ids) - len(updated),
+        results={i: "updated" if i in updated else "not_found" for i in ids},
+    )
+
+
+@router.post("/listings/bulk/approve", response_model=BulkModerationResult)
+async def bulk_approve_listings(
+    request: BulkModerationRequest,
+    current_user: dict = Depends(require_admin),
+    supabase=Depends(get_supabase_client),
+):
+    """Publish several listings in one update"""
+    return _bulk_update(supabase, request.ids, {"status": "published"})
+
+
+@router.post("/listings/bulk/reject", response_model=BulkModerationResult)
+async def bulk_reject_listings(
+    request: BulkModerationRequest,
+    current_user: dict = Depends(require_admin),
+    supabase=Depends(get_supabase_client),
+):
+    """Archive several listings in one update"""
+    return _bulk_update(supabase, request.ids, {"status": "archived"})
+
+
+@router.post("/listings/bulk/feature", response_model=BulkModerationResult)
+async def bulk_feature_listings(
+    request: BulkFeatureRequest,
+    current_user: dict = Depends(require_admin),
+    supabase=Depends(get_supabase_client),
+):
+    """Set the featured flag on several listings in one update"""
+    return _bulk_update(supabase, request.ids, {"featured": request.featured})
+
+
 @router.get("/users")
 async def admin_list_users(
+    response: Response,
+    role: Optional[str] = None,
+    email: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
     current_user: dict = Depends(require_admin),
     supabase=Depends(get_supabase_client),
 ):
-    """List all users"""
-    result = supabase.table("users").select("id, email, role, display_name, created_at").order("created_at", desc=True).execute()
-    return result.data
+    """List users (cursor-paginated, newest first)"""
+    def build_query():
+        query = supabase.table("users").select("id, email, role, display_name, created_at")
+        if role:
+            query = query.eq("role", role)
+        if email:
+            query = query.ilike("email", f"%{email}%")
+        return _created_range(query, created_after, created_before)
+
+    return _list_response(build_query, response, cursor, limit, format, "users")
 
 
 @router.get("/inquiries")
 async def admin_list_inquiries(
+    response: Response,
+    status: Optional[str] = None,
+    listing_id: Optional[str] = None,
+    buyer_id: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
     current_user: dict = Depends(require_admin),
     supabase=Depends(get_supabase_client),
 ):
-    """List all inquiries with listing titles"""
-    result = supabase.table("inquiries").select("*").order("created_at", desc=True).execute()
-    inquiries = result.data
-
-    # Attach listing titles
-    if inquiries:
-        listing_ids = list({i["listing_id"] for i in inquiries})
-        listings = supabase.table("ip_listings").select("id, title").in_("id", listing_ids).execute()
-        listing_map = {l["id"]: l["title"] for l in listings.data}
-        for inq in inquiries:
-            inq["listing_title"] = listing_map.get(inq["listing_id"], "Unknown")
+    """List inquiries with listing titles (cursor-paginated, newest first)"""
+    def build_query():
+        # Listing title comes from an embedded join, not a second query
+        query = supabase.table("inquiries").select("*, ip_listings(title)")
+        if status:
+            query = query.eq("status", status)
+        if listing_id:
+            query = query.eq("listing_id", listing_id)
+        if buyer_id:
+            query = query.eq("buyer_id", buyer_id)
+        return _created_range(query, created_after, created_before)
 
-    return inquiries
+    return _list_response(build_query, response, cursor, limit, format, "inquiries",
+                          transform=flatten_listing_title)
 
 
 @router.get("/stats")
 async def admin_stats(
+    refresh: bool = False,
+    current_user: dict = Depends(require_admin),
+    supabase=Depends(get_supabase_client),
+):
+    """Global platform stats (aggregated in the database, cached briefly)"""
+    if refresh:
+        stats_cache.invalidate("stats")
+
+    async def _load():
+        result = supabase.rpc("admin_platform_stats", {}).execute()
+        return result.data
+
+    return await stats_cache.get_or_set("stats", _load)
+
+
+class ReanalyzeRequest(BaseModel):
+    listing_ids: Optional[List[str]] = None  # explicit selection; otherwise filter below
+    status: Optional[str] = "published"
+    genre: Optional[str] = None
+    limit: int = Field(500, ge=1, le=5000)
+    force: bool = False  # re-run even if the analysis is current for this prompt/model
+
+
+@router.post("/ai/reanalyze", status_code=202)
+async def bulk_reanalyze(
+    request: ReanalyzeRequest,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(require_admin),
     supabase=Depends(get_supabase_client),
 ):
-    """Global platform stats"""
-    listings = supabase.table("ip_listings").select("status").execute()
-    users = supabase.table("users").select("role").execute()
-    inquiries = supabase.table("inquiries").select("id").execute()
-
-    status_counts = {}
-    for l in listings.data:
-        s = l["status"]
-        status_counts[s] = status_counts.get(s, 0) + 1
-
-    role_counts = {}
-    for u in users.data:
-        r = u["role"]
-        role_counts[r] = role_counts.get(r, 0) + 1
-
-    return {
-        "listings": status_counts,
-        "total_listings": len(listings.data),
-        "users": role_counts,
-        "total_users": len(users.data),
-        "total_inquiries": len(inquiries.data),
+    """Re-analyze a selection of listings through the batch backend"""
+    job = batch_analysis.create_job(
+        listing_ids=request.listing_ids,
+        status=request.status,
+        genre=request.genre,
+        limit=request.limit,
+        force=request.force,
+    )
+    background_tasks.add_task(batch_analysis.run_bulk_reanalysis, job, supabase)
+    return job.to_dict()
+
+
+@router.get("/ai/reanalyze")
+async def list_reanalyze_jobs(current_user: dict = Depends(require_admin)):
+    """List bulk re-analysis jobs (most recent first)"""
+    return [job.to_dict() for job in batch_analysis.list_jobs()]
+
+
+@router.get("/ai/reanalyze/{job_id}")
+async def get_reanalyze_job(job_id: str, current_user: dict = Depends(require_admin)):
+    """Progress and throughput of a bulk re-analysis job"""
+    job = batch_analysis.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.get("/ai/usage")
+async def ai_usage(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_user: dict = Depends(require_admin),
+    supabase=Depends(get_supabase_client),
+):
+    """AI token, cost and latency aggregates per day, model, creator and material type"""
+    params = {
+        "p_since": since.isoformat() if since else None,
+        "p_until": until.isoformat() if until else None,
+    }
+    report = {}
+    for group in ("day", "model", "creator", "type"):
+        result = supabase.rpc("ai_usage_report", {"p_group": group, **params}).execute()
+        report[f"by_{group}"] = result.data
+
+    by_type = report["by_type"]
+    report["totals"] = {
+        "calls": sum(r["calls"] for r in by_type),
+        "input_tokens": sum(r["input_tokens"] for r in by_type),
+        "output_tokens": sum(r["output_tokens"] for r in by_type),
+        "cache_read_tokens": sum(r["cache_read_tokens"] for r in by_type),
+        "cache_creation_tokens": sum(r["cache_creation_tokens"] for r in by_type),
+        "cost_usd": round(sum(float(r["cost_usd"]) for r in by_type), 4),
     }
+    return report
@@ -1,16 +1,26 @@
 """
 AI Analysis API Endpoints
-Script analysis and one-pager generation using Claude
+Script analysis, one-pager and pitch deck generation using Claude
 """
-import json
 import logging
-from typing import Optional
+from typing import Optional, Dict
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from pydantic import BaseModel
 
 from app.core.security import get_current_user
 from app.services.supabase_service import get_supabase_client
-from app.services.anthropic_service import anthropic_service
+from app.services.materials_service import get_materials_service
+from app.services.ai_jobs import (
+    run_analysis,
+    run_materials_pipeline,
+    claim_materials_pipeline,
+    generate_downstream_material,
+    analysis_input_hash,
+    load_json_material,
+    get_partial_analysis,
+    has_speculative_one_pager,
+    is_analysis_stale,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -34,115 +44,29 @@ class OnePagerResponse(BaseModel):
     message: str
 
 
+class MaterialsResponse(BaseModel):
+    listing_id: str
+    stages: Dict[str, str]
+    analysis: Optional[dict] = None
+    one_pager: Optional[str] = None
+    pitch_deck: Optional[dict] = None
+    message: str
+
+
 # ==========================================
 # Helpers
 # ==========================================
 
-def _get_listing_text(listing: dict) -> str:
-    """Build a rich text representation of the listing for Claude to analyze."""
-    parts = []
-    parts.append(f"Title: {listing.get('title', '')}")
-    if listing.get('tagline'):
-        parts.append(f"Tagline: {listing['tagline']}")
-    parts.append(f"Genre: {listing.get('genre', '')}")
-    parts.append(f"Format: {listing.get('format', '')}")
-    if listing.get('logline'):
-        parts.append(f"Logline: {listing['logline']}")
-    if listing.get('description'):
-        parts.append(f"\nDescription:\n{listing['description']}")
-    if listing.get('period'):
-        parts.append(f"Time Period: {listing['period']}")
-    if listing.get('location'):
-        parts.append(f"Location: {listing['location']}")
-    if listing.get('world_type'):
-        parts.append(f"World Type: {listing['world_type']}")
-    if listing.get('themes'):
-        parts.append(f"Themes: {', '.join(listing['themes'])}")
-    if listing.get('target_audience'):
-        parts.append(f"Target Audience: {listing['target_audience']}")
-    if listing.get('comparables'):
-        parts.append(f"Comparables: {', '.join(listing['comparables'])}")
-    return '\n'.join(parts)
-
-
-async def _fetch_script_text(listing: dict, supabase) -> Optional[str]:
-    """Try to download and read the script PDF from Supabase Storage."""
-    script_url = listing.get('script_url')
-    if not script_url:
-        return None
-
-    try:
-        import httpx
-        import pypdf
-        import io
-
-        async with httpx.AsyncClient() as client:
-            response = await client.get(script_url, follow_redirects=True, timeout=30)
-            if response.status_code != 200:
-                logger.warning(f"Could not download script: {response.status_code}")
-                return None
-
-        # Parse PDF
-        pdf_reader = pypdf.PdfReader(io.BytesIO(response.content))
-        text_parts = []
-        for page in pdf_reader.pages:
-            text_parts.append(page.extract_text() or '')
-        return '\n'.join(text_parts)[:60000]  # Cap at 60k chars
-
-    except Exception as e:
-        logger.warning(f"Could not read script PDF: {e}")
-        return None
-
-
-async def _run_analysis(listing_id: str, supabase):
-    """Background task: run AI analysis and save results."""
-    try:
-        # 1. Get listing
-        result = supabase.table("ip_listings").select("*").eq("id", listing_id).single().execute()
-        if not result.data:
-            logger.error(f"Listing {listing_id} not found for analysis")
-            return
-        listing = result.data
-
-        # 2. Update status to analyzing
-        supabase.table("ip_listings").update({
-            "ai_analysis_status": "analyzing"
-        }).eq("id", listing_id).execute()
-
-        # 3. Try to get script text, fallback to metadata text
-        script_text = await _fetch_script_text(listing, supabase)
-        if script_text:
-            logger.info(f"[{listing_id}] Using script PDF for analysis ({len(script_text)} chars)")
-        else:
-            script_text = _get_listing_text(listing)
-            logger.info(f"[{listing_id}] No script PDF — using metadata for analysis")
-
-        # 4. Run Claude analysis
-        analysis = await anthropic_service.analyze_script(script_text, listing)
-        logger.info(f"[{listing_id}] Analysis complete. Score: {analysis.get('commercial_score')}")
-
-        # 5. Save analysis to ip_materials table
-        supabase.table("ip_materials").insert({
-            "listing_id": listing_id,
-            "type": "analysis",
-            "content": json.dumps(analysis),
-        }).execute()
-
-        # 6. Update listing with key AI fields + status → ready
-        supabase.table("ip_listings").update({
-            "ai_analysis_status": "ready",
-            "ai_score": analysis.get("commercial_score"),
-            "ai_strengths": analysis.get("strengths", []),
-            "ai_improvements": analysis.get("improvements", []),
-        }).eq("id", listing_id).execute()
-
-        logger.info(f"[{listing_id}] Analysis saved successfully")
-
-    except Exception as e:
-        logger.error(f"[{listing_id}] Analysis failed: {e}")
-        supabase.table("ip_listings").update({
-            "ai_analysis_status": "failed"
-        }).eq("id", listing_id).execute()
+def _get_owned_listing(listing_id: str, current_user: dict, supabase, columns: str = "*") -> dict:
+    """Fetch a listing and verify the current user owns it (or is admin)."""
+    result = supabase.table("ip_listings").select(columns).eq("id", listing_id).single().execute()
+    if not result.data:
+        raise HTTPException(status_code=404, detail="Listing not found")
+
+    listing = result.data
+    if listing["creator_id"] != current_user["id"] and current_user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return listing
 
 
 # ==========================================
@@ -153,32 +77,47 @@ async def _run_analysis(listing_id: str, supabase):
 async def analyze_listing(
     listing_id: str,
     background_tasks: BackgroundTasks,
+    force: bool = False,
     current_user: dict = Depends(get_current_user),
     supabase=Depends(get_supabase_client),
 ):
     """
     Trigger AI analysis for a listing.
     Runs in background — poll the listing status to know when done.
+    If the listing, script and prompt are unchanged since the last analysis,
+    the stored result is returned immediately unless force=true.
     """
     # Verify listing exists and belongs to user
-    result = supabase.table("ip_listings").select("id, creator_id, ai_analysis_status, title").eq("id", listing_id).single().execute()
-    if not result.data:
-        raise HTTPException(status_code=404, detail="Listing not found")
-
-    listing = result.data
-    if listing["creator_id"] != current_user["id"] and current_user.get("role") != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
+    listing = _get_owned_listing(listing_id, current_user, supabase)
 
-    # Don't re-analyze if already in progress
-    if listing["ai_analysis_status"] == "analyzing":
+    # Don't re-analyze if already in progress (a stale run is restarted)
+    if listing["ai_analysis_status"] == "analyzing" and not is_analysis_stale(listing):
         return AnalysisResponse(
             listing_id=listing_id,
             status="analyzing",
             message="Analysis already in progress"
         )
 
+    # Return the memoized analysis if nothing changed since the last run
+    if not force:
+        cached = get_materials_service(supabase).get_memoized(
+            listing_id, "analysis", analysis_input_hash(listing)
+        )
+        analysis = load_json_material(cached)
+        if analysis is not None:
+            if listing["ai_analysis_status"] != "ready":
+                supabase.table("ip_listings").update({
+                    "ai_analysis_status": "ready"
+                }).eq("id", listing_id).execute()
+            return AnalysisResponse(
+                listing_id=listing_id,
+                status="ready",
+                analysis=analysis,
+                message="Listing unchanged since last analysis — returning stored result. Use force=true to re-run."
+            )
+
     # Queue background task
-    background_tasks.add_task(_run_analysis, listing_id, supabase)
+    background_tasks.add_task(run_analysis, listing_id, supabase)
 
     return AnalysisResponse(
         listing_id=listing_id,
@@ -204,17 +143,21 @@ async def get_analysis(
 
     listing = listing_result.data
 
-    # Get full analysis from ip_materials
-    materials_result = supabase.table("ip_materials").select("content, generated_at").eq(
-        "listing_id", listing_id
-    ).eq("type", "analysis").order("generated_at", desc=True).limit(1).execute()
+    # While analyzing, return the sections streamed so far (e.g. the executive summary)
+    if listing["ai_analysis_status"] == "analyzing":
+        partial = get_partial_analysis(listing_id)
+        if partial:
+            return AnalysisResponse(
+                listing_id=listing_id,
+                status="analyzing",
+                analysis=partial,
+                message=f"Status: analyzing ({len(partial)} sections ready)"
+            )
 
-    analysis = None
-    if materials_result.data:
-        try:
-            analysis = json.loads(materials_result.data[0]["content"])
-        except Exception:
-            pass
+    # Get full analysis from ip_materials
+    analysis = load_json_material(
+        get_materials_service(supabase).get_latest(listing_id, "analysis", "content, generated_at")
+    )
 
     return AnalysisResponse(
         listing_id=listing_id,
@@ -236,6 +179,8 @@ async def get_one_pager(
     ).eq("type", "one_pager").order("generated_at", desc=True).limit(1).execute()
 
     if not result.data:
+        if has_speculative_one_pager(listing_id):
+            raise HTTPException(status_code=404, detail="One-pager is being generated — try again shortly")
         raise HTTPException(status_code=404, detail="No one-pager found")
 
     return OnePagerResponse(
@@ -248,43 +193,83 @@ async def get_one_pager(
 @router.post("/listings/{listing_id}/generate-onepager", response_model=OnePagerResponse)
 async def generate_one_pager(
     listing_id: str,
+    force: bool = False,
     current_user: dict = Depends(get_current_user),
     supabase=Depends(get_supabase_client),
 ):
-    """Generate a professional one-pager pitch document."""
+    """
+    Generate a professional one-pager pitch document.
+    Returns the stored one-pager when the listing and analysis are unchanged, unless force=true.
+    """
     # Get listing
-    result = supabase.table("ip_listings").select("*").eq("id", listing_id).single().execute()
-    if not result.data:
-        raise HTTPException(status_code=404, detail="Listing not found")
-
-    listing = result.data
-    if listing["creator_id"] != current_user["id"] and current_user.get("role") != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
+    listing = _get_owned_listing(listing_id, current_user, supabase)
 
     # Get existing analysis if available
-    analysis = None
-    materials_result = supabase.table("ip_materials").select("content").eq(
-        "listing_id", listing_id
-    ).eq("type", "analysis").order("generated_at", desc=True).limit(1).execute()
-
-    if materials_result.data:
-        try:
-            analysis = json.loads(materials_result.data[0]["content"])
-        except Exception:
-            pass
-
-    # Generate one-pager
-    one_pager = await anthropic_service.generate_one_pager(listing, analysis)
+    analysis_row = get_materials_service(supabase).get_latest(listing_id, "analysis", "content")
 
-    # Save to ip_materials
-    supabase.table("ip_materials").insert({
-        "listing_id": listing_id,
-        "type": "one_pager",
-        "content": one_pager,
-    }).execute()
+    # Generate one-pager (or return the memoized one if nothing changed)
+    one_pager, cached = await generate_downstream_material(
+        "one_pager", listing, analysis_row, supabase, force=force
+    )
 
     return OnePagerResponse(
         listing_id=listing_id,
         one_pager=one_pager,
-        message="One-pager generated successfully"
+        message="Listing unchanged — returning stored one-pager. Use force=true to regenerate."
+        if cached else "One-pager generated successfully"
+    )
+
+
+@router.post("/listings/{listing_id}/generate-materials", response_model=MaterialsResponse)
+async def generate_materials(
+    listing_id: str,
+    background_tasks: BackgroundTasks,
+    force: bool = False,
+    current_user: dict = Depends(get_current_user),
+    supabase=Depends(get_supabase_client),
+):
+    """
+    Generate all materials (analysis, one-pager, pitch deck) in one background job.
+    The analysis runs first, then the one-pager and pitch deck run concurrently.
+    Poll GET /materials for per-stage status.
+    """
+    listing = _get_owned_listing(listing_id, current_user, supabase)
+
+    if listing["ai_analysis_status"] == "analyzing" or not claim_materials_pipeline(listing_id, supabase):
+        return MaterialsResponse(
+            listing_id=listing_id,
+            stages=listing.get("ai_materials_status") or {},
+            message="Materials generation already in progress"
+        )
+
+    background_tasks.add_task(run_materials_pipeline, listing_id, supabase, force)
+
+    return MaterialsResponse(
+        listing_id=listing_id,
+        stages={"analysis": "pending", "one_pager": "pending", "pitch_deck": "pending"},
+        message=f"Generating materials for '{listing['title']}'. This takes about 1-2 minutes."
+    )
+
+
+@router.get("/listings/{listing_id}/materials", response_model=MaterialsResponse)
+async def get_materials(
+    listing_id: str,
+    current_user: dict = Depends(get_current_user),
+    supabase=Depends(get_supabase_client),
+):
+    """Get per-stage status and the latest version of every generated material."""
+    listing = _get_owned_listing(
+        listing_id, current_user, supabase, "id, creator_id, ai_materials_status"
+    )
+
+    materials = get_materials_service(supabase)
+    one_pager = materials.get_latest(listing_id, "one_pager", "content")
+
+    return MaterialsResponse(
+        listing_id=listing_id,
+        stages=listing.get("ai_materials_status") or {},
+        analysis=load_json_material(materials.get_latest(listing_id, "analysis", "content")),
+        one_pager=one_pager["content"] if one_pager else None,
+        pitch_deck=load_json_material(materials.get_latest(listing_id, "pitch_deck", "content")),
+        message="Materials retrieved successfully"
     )
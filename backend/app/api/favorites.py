@@ -1,19 +1,40 @@
 """
 Favorites API — buyers save/unsave listings
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel, Field
 
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.pagination import paginate
 from app.core.security import get_current_user
+from app.models.listing import LISTING_CARD_COLUMNS
 from app.services.supabase_service import get_supabase_client
 
 router = APIRouter(prefix="/favorites", tags=["favorites"])
 
+# buyer_id -> frozenset of saved listing ids; dropped on save/unsave
+saved_ids_cache = TTLCache(ttl=settings.favorites_cache_ttl_seconds, max_entries=10000)
+
 
 class FavoriteResponse(BaseModel):
     listing_id: str
     saved: bool
+    save_count: Optional[int] = None
+
+
+class FavoriteLookupRequest(BaseModel):
+    listing_ids: List[str] = Field(..., max_length=200)
+
+
+async def _saved_ids(buyer_id: str, supabase) -> frozenset:
+    """All listing ids saved by a buyer, cached per buyer"""
+    async def _load():
+        result = supabase.table("favorites").select("listing_id").eq("buyer_id", buyer_id).execute()
+        return frozenset(r["listing_id"] for r in result.data)
+
+    return await saved_ids_cache.get_or_set(buyer_id, _load)
 
 
 @router.get("/", response_model=List[str])
@@ -26,30 +47,39 @@ async def get_favorites(
     return [r["listing_id"] for r in result.data]
 
 
+@router.post("/lookup", response_model=Dict[str, bool])
+async def lookup_favorites(
+    request: FavoriteLookupRequest,
+    current_user: dict = Depends(get_current_user),
+    supabase=Depends(get_supabase_client),
+):
+    """Saved state of the listings currently on screen (listing id -> saved)"""
+    saved = await _saved_ids(current_user["id"], supabase)
+    return {listing_id: listing_id in saved for listing_id in request.listing_ids}
+
+
+def _set_favorite(supabase, buyer_id: str, listing_id: str, saved: bool) -> FavoriteResponse:
+    """Save or unsave in one round trip; the database function is idempotent."""
+    result = supabase.rpc("set_favorite", {
+        "p_buyer_id": buyer_id,
+        "p_listing_id": listing_id,
+        "p_saved": saved,
+    }).execute()
+    if not result.data or not result.data.get("found"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Listing not found")
+
+    saved_ids_cache.invalidate(buyer_id)
+    return FavoriteResponse(listing_id=listing_id, saved=saved, save_count=result.data["save_count"])
+
+
 @router.post("/{listing_id}", response_model=FavoriteResponse)
 async def save_favorite(
     listing_id: str,
     current_user: dict = Depends(get_current_user),
     supabase=Depends(get_supabase_client),
 ):
-    """Save a listing to favorites"""
-    # Check listing exists
-    listing = supabase.table("ip_listings").select("id").eq("id", listing_id).eq("status", "published").single().execute()
-    if not listing.data:
-        raise HTTPException(status_code=404, detail="Listing not found")
-
-    # Upsert (ignore if already saved)
-    try:
-        supabase.table("favorites").insert({
-            "buyer_id": current_user["id"],
-            "listing_id": listing_id,
-        }).execute()
-        # Increment save_count
-        supabase.rpc("increment_save_count", {"listing_id": listing_id}).execute()
-    except Exception:
-        pass  # Already saved — that's fine
-
-    return FavoriteResponse(listing_id=listing_id, saved=True)
+    """Save a listing to favorites (no-op if already saved)"""
+    return _set_favorite(supabase, current_user["id"], listing_id, True)
 
 
 @router.delete("/{listing_id}", response_model=FavoriteResponse)
@@ -58,9 +88,26 @@ async def unsave_favorite(
     current_user: dict = Depends(get_current_user),
     supabase=Depends(get_supabase_client),
 ):
-    """Remove a listing from favorites"""
-    supabase.table("favorites").delete().eq("buyer_id", current_user["id"]).eq("listing_id", listing_id).execute()
-    return FavoriteResponse(listing_id=listing_id, saved=False)
+    """Remove a listing from favorites (no-op if not saved)"""
+    return _set_favorite(supabase, current_user["id"], listing_id, False)
+
+
+def _saved_listings_query(supabase, buyer_id: str, columns: str, **kwargs):
+    """Buyer's favorites with the (published) listing embedded in the same query."""
+    return supabase.table("favorites") \
+        .select(f"listing_id, created_at, ip_listings!inner({columns})", **kwargs) \
+        .eq("buyer_id", buyer_id) \
+        .eq("ip_listings.status", "published")
+
+
+def _flatten_saved(row: dict) -> dict:
+    return {**row["ip_listings"], "saved_at": row["created_at"]}
+
+
+class SavedListingsPage(BaseModel):
+    listings: List[dict]
+    next_cursor: Optional[str] = None
+    total: int
 
 
 @router.get("/listings", response_model=List[dict])
@@ -68,11 +115,28 @@ async def get_saved_listings(
     current_user: dict = Depends(get_current_user),
     supabase=Depends(get_supabase_client),
 ):
-    """Get full listing details for all saved IPs"""
-    favs = supabase.table("favorites").select("listing_id").eq("buyer_id", current_user["id"]).execute()
-    if not favs.data:
-        return []
-
-    ids = [f["listing_id"] for f in favs.data]
-    listings = supabase.table("ip_listings").select("*").in_("id", ids).eq("status", "published").execute()
-    return listings.data
+    """Get full listing details for all saved IPs, most recently saved first"""
+    result = _saved_listings_query(supabase, current_user["id"], "*") \
+        .order("created_at", desc=True).execute()
+    return [_flatten_saved(r) for r in result.data]
+
+
+@router.get("/listings/page", response_model=SavedListingsPage)
+async def get_saved_listings_page(
+    cursor: Optional[str] = None,
+    limit: int = Query(24, ge=1, le=100),
+    current_user: dict = Depends(get_current_user),
+    supabase=Depends(get_supabase_client),
+):
+    """Saved listings as cards, most recently saved first (cursor-paginated)"""
+    query = _saved_listings_query(supabase, current_user["id"], LISTING_CARD_COLUMNS)
+    rows, next_cursor = paginate(query, cursor, limit, tiebreak="listing_id")
+
+    # Same filter as the page, so unpublished or removed listings are not counted
+    total = _saved_listings_query(supabase, current_user["id"], "status", count="exact", head=True).execute()
+
+    return SavedListingsPage(
+        listings=[_flatten_saved(r) for r in rows],
+        next_cursor=next_cursor,
+        total=total.count or 0,
+    )
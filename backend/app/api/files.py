@@ -5,6 +5,7 @@ Handle file uploads for IP materials (scripts, posters, concept art)
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from pydantic import BaseModel
 from typing import Optional
+import hashlib
 
 from app.core.security import get_current_user
 from app.services.supabase_service import get_supabase_client
@@ -123,8 +124,12 @@ async def upload_file(
                 .execute()
         else:
             # For script and poster, update single URL field
+            update_data = {update_field: result["url"]}
+            if file_type == "script":
+                # Content hash lets AI analysis skip unchanged scripts
+                update_data["script_sha256"] = hashlib.sha256(file_content).hexdigest()
             supabase.table("ip_listings") \
-                .update({update_field: result["url"]}) \
+                .update(update_data) \
                 .eq("id", listing_id) \
                 .execute()
 
@@ -279,8 +284,11 @@ async def delete_file(
 
         # Update listing to remove URL
         update_field = f"{file_type}_url"
+        update_data = {update_field: None}
+        if file_type == "script":
+            update_data["script_sha256"] = None
         supabase.table("ip_listings") \
-            .update({update_field: None}) \
+            .update(update_data) \
             .eq("id", listing_id) \
             .execute()
 
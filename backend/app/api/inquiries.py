@@ -2,10 +2,12 @@
 Inquiries API — buyers contact creators about listings
 """
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, EmailStr
 
+from app.core.pagination import paginate
 from app.core.security import get_current_user
+from app.models.inquiry import flatten_listing_title
 from app.services.supabase_service import get_supabase_client
 
 router = APIRouter(prefix="/inquiries", tags=["inquiries"])
@@ -52,15 +54,7 @@ async def create_inquiry(
         "message": inquiry.message,
         "status": "new",
     }).execute()
-
-    # Increment inquiry_count on listing
-    try:
-        listing_data = supabase.table("ip_listings").select("inquiry_count").eq("id", inquiry.listing_id).single().execute()
-        supabase.table("ip_listings").update({
-            "inquiry_count": (listing_data.data.get("inquiry_count") or 0) + 1
-        }).eq("id", inquiry.listing_id).execute()
-    except Exception:
-        pass
+    # inquiry_count and the creator notification (outbox row) are written by triggers
 
     return result.data[0]
 
@@ -75,25 +69,47 @@ async def get_sent_inquiries(
     return result.data
 
 
+def _received_query(supabase, creator_id: str, columns: str = "*, ip_listings!inner(title, creator_id)", **kwargs):
+    """Inquiries on a creator's listings, filtered through an inner embedded join."""
+    return supabase.table("inquiries").select(columns, **kwargs).eq("ip_listings.creator_id", creator_id)
+
+
+class InboxResponse(BaseModel):
+    inquiries: List[dict]
+    next_cursor: Optional[str] = None
+    unread_count: int
+
+
+@router.get("/inbox", response_model=InboxResponse)
+async def get_inbox(
+    status: Optional[str] = Query(None, pattern="^(new|read|replied|closed)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current_user: dict = Depends(get_current_user),
+    supabase=Depends(get_supabase_client),
+):
+    """Creator inbox: received inquiries newest first, with listing titles and unread count"""
+    query = _received_query(supabase, current_user["id"])
+    if status:
+        query = query.eq("status", status)
+    rows, next_cursor = paginate(query, cursor, limit)
+
+    unread = _received_query(
+        supabase, current_user["id"], "id, ip_listings!inner(creator_id)", count="exact", head=True
+    ).eq("status", "new").execute()
+
+    return InboxResponse(
+        inquiries=[flatten_listing_title(r) for r in rows],
+        next_cursor=next_cursor,
+        unread_count=unread.count or 0,
+    )
+
+
 @router.get("/received", response_model=List[dict])
 async def get_received_inquiries(
     current_user: dict = Depends(get_current_user),
     supabase=Depends(get_supabase_client),
 ):
-    """Get inquiries received for creator's listings"""
-    # Get creator's listing IDs
-    listings = supabase.table("ip_listings").select("id, title").eq("creator_id", current_user["id"]).execute()
-    if not listings.data:
-        return []
-
-    listing_ids = [l["id"] for l in listings.data]
-    listing_map = {l["id"]: l["title"] for l in listings.data}
-
-    inquiries = supabase.table("inquiries").select("*").in_("listing_id", listing_ids).order("created_at", desc=True).execute()
-
-    # Attach listing title
-    result = []
-    for inq in inquiries.data:
-        inq["listing_title"] = listing_map.get(inq["listing_id"], "Unknown")
-        result.append(inq)
-    return result
+    """Get inquiries received for creator's listings (see /inbox for the paginated version)"""
+    inquiries = _received_query(supabase, current_user["id"]).order("created_at", desc=True).execute()
+    return [flatten_listing_title(inq) for inq in inquiries.data]
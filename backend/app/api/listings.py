@@ -9,6 +9,8 @@ from datetime import datetime
 
 from app.core.security import get_current_user
 from app.services.supabase_service import get_supabase_client
+from app.services.ai_jobs import cancel_speculative_one_pager
+from app.services.counter_service import get_counter_service
 from app.models.user import UserProfile
 
 router = APIRouter(prefix="/listings", tags=["listings"])
@@ -192,10 +194,7 @@ async def get_listing_by_slug(slug: str):
             .execute()
         if not response.data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Listing not found")
-        supabase.table("ip_listings") \
-            .update({"view_count": response.data["view_count"] + 1}) \
-            .eq("id", response.data["id"]) \
-            .execute()
+        get_counter_service(supabase).record_view(response.data["id"])
         return response.data
     except HTTPException:
         raise
@@ -306,11 +305,8 @@ async def get_listing(listing_id: str):
                 detail="Listing not found"
             )
 
-        # Increment view count (async, don't wait for response)
-        supabase.table("ip_listings") \
-            .update({"view_count": response.data["view_count"] + 1}) \
-            .eq("id", listing_id) \
-            .execute()
+        # Buffered view count (applied in batches by the counter service)
+        get_counter_service(supabase).record_view(listing_id)
 
         return response.data
     except HTTPException:
@@ -369,6 +365,9 @@ async def update_listing(
             .eq("id", listing_id) \
             .execute()
 
+        # A pre-generated one-pager would be built from stale data
+        cancel_speculative_one_pager(listing_id)
+
         return response.data[0]
 
     except HTTPException:
@@ -413,6 +412,7 @@ async def delete_listing(
 
         # Delete listing (CASCADE will delete related files, materials, etc.)
         supabase.table("ip_listings").delete().eq("id", listing_id).execute()
+        cancel_speculative_one_pager(listing_id)
 
         return None
 
@@ -3,16 +3,24 @@ CMC IP Marketplace - User Profile Endpoints
 Manage user profiles and settings
 """
 
-from fastapi import APIRouter, HTTPException, status, UploadFile, File
-from app.models.user import UserProfile, UserUpdate
+from fastapi import APIRouter, HTTPException, status, UploadFile, File, Query
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import UserProfile, UserUpdate, PublicProfile
 from app.services.supabase_service import supabase_service
 import logging
-from typing import Optional
+from typing import Optional, List
+from uuid import UUID
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+PUBLIC_PROFILE_COLUMNS = "id, role, display_name, bio, avatar_url, company_name"
+
+# user_id -> public profile; dropped by the profile update and avatar routes
+profile_cache = TTLCache(ttl=settings.profile_cache_ttl_seconds, max_entries=settings.profile_cache_max_entries)
+
 
 @router.get("/me", response_model=UserProfile)
 async def get_my_profile(user_id: str):
@@ -70,6 +78,7 @@ async def update_my_profile(user_id: str, update_data: UserUpdate):
             )
 
         updated_profile = response.data[0]
+        profile_cache.invalidate(user_id)
         logger.info(f"Profile updated for user: {user_id}")
 
         return UserProfile(**updated_profile)
@@ -125,6 +134,7 @@ async def upload_avatar(user_id: str, file: UploadFile = File(...)):
         }).eq("id", user_id).execute()
 
         updated_profile = response.data[0]
+        profile_cache.invalidate(user_id)
         logger.info(f"Avatar uploaded for user: {user_id}")
 
         return UserProfile(**updated_profile)
@@ -150,6 +160,7 @@ async def delete_avatar(user_id: str):
             "avatar_url": None
         }).eq("id", user_id).execute()
 
+        profile_cache.invalidate(user_id)
         logger.info(f"Avatar removed for user: {user_id}")
         return None
 
@@ -161,6 +172,56 @@ async def delete_avatar(user_id: str):
         )
 
 
+@router.get("/batch", response_model=List[PublicProfile])
+async def get_public_profiles(ids: str = Query(..., description="Comma-separated user IDs (max 100)")):
+    """
+    Get public profiles for many users at once
+
+    For listing cards: one request per page instead of one per creator.
+    Unknown IDs are omitted from the result.
+    """
+    try:
+        # Canonical (lowercase) form, so cache keys and result lookups match the stored ids
+        user_ids = list(dict.fromkeys(str(UUID(i.strip())) for i in ids.split(",") if i.strip()))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="ids must be comma-separated UUIDs"
+        )
+    if len(user_ids) > 100:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At most 100 user IDs per request"
+        )
+
+    profiles = {}
+    missing = []
+    for user_id in user_ids:
+        cached = profile_cache.get(user_id)
+        if cached is not None:
+            profiles[user_id] = cached
+        else:
+            missing.append(user_id)
+
+    if missing:
+        try:
+            response = supabase_service.client.table("users").select(
+                PUBLIC_PROFILE_COLUMNS
+            ).in_("id", missing).execute()
+        except Exception as e:
+            logger.error(f"Error getting profiles: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to retrieve profiles"
+            )
+        for row in response.data:
+            profile = PublicProfile(**row)
+            profile_cache.set(profile.id, profile)
+            profiles[profile.id] = profile
+
+    return [profiles[i] for i in user_ids if i in profiles]
+
+
 @router.get("/{user_id}", response_model=UserProfile)
 async def get_user_by_id(user_id: str):
     """
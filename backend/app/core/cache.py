@@ -0,0 +1,70 @@
+"""
+CMC IP Marketplace - In-Process TTL Cache
+Short-lived caching for expensive read endpoints (per worker process)
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Small dict-backed cache whose entries expire after `ttl` seconds.
+
+    get_or_set() coalesces concurrent misses for the same key, so a burst of
+    requests after expiry runs the loader once instead of once per request.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        # key -> (lock, tasks using it); only held while a fill for that key is in flight
+        self._locks: Dict[Hashable, Tuple[asyncio.Lock, int]] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        if len(self._entries) >= self.max_entries and key not in self._entries:
+            # Evict the entry closest to expiry
+            oldest = min(self._entries, key=lambda k: self._entries[k][0])
+            self._entries.pop(oldest, None)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    async def get_or_set(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            return value
+        lock, users = self._locks.get(key, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                value = self.get(key)
+                if value is None:
+                    value = await loader()
+                    self.set(key, value)
+        finally:
+            # Drop the lock once the last waiter is done, so locks don't pile up per key
+            lock, users = self._locks[key]
+            if users == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one key, or everything when key is None"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
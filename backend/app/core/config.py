@@ -21,9 +21,50 @@ class Settings(BaseSettings):
     supabase_url: str
     supabase_anon_key: str
     supabase_service_key: str
+    supabase_backend: str = "supabase"  # supabase, memory (in-process stand-in for benchmarks)
+    fake_supabase_latency_ms: float = 0.0  # per-request delay added by the memory backend
+    fake_supabase_jitter_ms: float = 0.0
 
     # Anthropic
     anthropic_api_key: str
+    ai_batch_backend: str = "message_batches"  # message_batches, local
+    ai_batch_poll_seconds: int = 30
+    ai_batch_prepare_concurrency: int = 8
+    ai_speculative_onepager: bool = False  # pre-generate one-pagers when an analysis completes
+    ai_speculative_delay_seconds: int = 5
+    ai_speculative_concurrency: int = 1
+    ai_analysis_timeout_seconds: int = 600  # 'analyzing' rows older than this are reaped
+    ai_materials_timeout_seconds: int = 1200  # materials pipelines held longer than this are reaped
+    ai_max_retries: int = 3
+    ai_retry_base_seconds: int = 60
+    ai_retry_max_seconds: int = 3600
+    ai_retry_concurrency: int = 2
+    ai_retry_batch_size: int = 50
+
+    # Scheduler
+    scheduler_enabled: bool = True  # run periodic maintenance jobs in this process
+    reaper_interval_seconds: int = 60
+
+    # Counters
+    counter_flush_seconds: int = 10  # buffered view counts are written this often
+    counter_flush_threshold: int = 500  # ...or as soon as this many views are pending
+    counter_reconcile_seconds: int = 3600
+
+    # Notifications (outbox dispatcher)
+    notification_backend: str = "log"  # log, smtp, webhook
+    notification_dispatch_seconds: int = 30
+    notification_batch_size: int = 200  # outbox rows claimed per tick
+    notification_concurrency: int = 4
+    notification_min_interval_seconds: int = 300  # per-recipient digest rate limit
+    notification_max_attempts: int = 5
+    notification_retry_base_seconds: int = 60
+    notification_webhook_url: str = ""
+    smtp_host: str = "localhost"
+    smtp_port: int = 1025
+    smtp_username: str = ""
+    smtp_password: str = ""
+    smtp_use_tls: bool = False
+    smtp_from: str = "CMC IP Marketplace <no-reply@localhost>"
 
     # CORS
     cors_origins: str = "http://localhost:5173,http://localhost:5174,http://localhost:3000"
@@ -32,12 +73,38 @@ class Settings(BaseSettings):
     storage_bucket: str = "ip-materials"
     max_file_size_mb: int = 50
 
+    # Metrics
+    metrics_enabled: bool = False  # expose Prometheus metrics at /metrics
+    metrics_token: str = ""  # when set, /metrics requires "Authorization: Bearer <token>"
+    trace_enabled: bool = False  # Server-Timing header with per-request upstream calls (exposes internals)
+    trace_call_threshold: int = 10  # log the call sequence (debug) above this many calls
+
+    # Profiling (admin-only, per request via X-Profile header or ?profile=)
+    profiling_enabled: bool = True
+    profiling_interval_ms: float = 1.0  # pyinstrument sampling interval
+    profiling_output_dir: str = ""  # save profiles here instead of returning them
+
     # Sentry
     sentry_dsn: str = ""
 
+    # Admin
+    admin_stats_ttl_seconds: int = 30
+    admin_export_page_size: int = 1000  # rows per query when streaming NDJSON exports
+
+    # Public profiles
+    profile_cache_ttl_seconds: int = 300
+    profile_cache_max_entries: int = 5000
+
+    # Favorites
+    favorites_cache_ttl_seconds: int = 300  # per-buyer saved-id sets (per worker)
+
     # Rate Limiting
-    rate_limit_requests: int = 100
-    rate_limit_period: int = 60
+    rate_limit_enabled: bool = True
+    rate_limit_requests: int = 100  # bucket size (tokens) per IP and per user
+    rate_limit_period: int = 60  # seconds to refill an empty bucket
+    rate_limit_backend: str = "memory"  # memory (per worker), supabase (shared)
+    rate_limit_trusted_proxies: int = 0  # proxies appending to X-Forwarded-For (1 on Render); 0 = socket peer
+    rate_limit_auth_cache_seconds: int = 300  # how long a verified token -> user id is reused
 
     model_config = SettingsConfigDict(
         env_file=".env",
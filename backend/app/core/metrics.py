@@ -0,0 +1,126 @@
+"""
+CMC IP Marketplace - Prometheus Metrics
+Request, upstream-call and background-job metrics exposed at /metrics
+"""
+
+import functools
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.tracing import record_upstream, untraced
+
+# Latency buckets (seconds) spanning fast PostgREST reads to long Claude generations
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+)
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds",
+    "Upstream call latency: Supabase by table/operation, Anthropic by model",
+    ["service", "target", "operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+BACKGROUND_JOBS = Gauge(
+    "background_jobs_in_progress",
+    "Background jobs currently running",
+    ["kind"],
+)
+
+
+@contextmanager
+def observe_upstream(service: str, target: str, operation: str):
+    """
+    Time one upstream call and add it to the current request's trace.
+
+    Args:
+        service: supabase, storage, auth or anthropic
+        target: Table, RPC function, bucket or model
+        operation: select, insert, rpc, upload, messages, ...
+    """
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        UPSTREAM_LATENCY.labels(service, target, operation, outcome).observe(elapsed)
+        record_upstream(service, target, operation, elapsed)
+
+
+def track_job(kind: str):
+    """
+    Decorator for async background jobs: counts them in background_jobs_in_progress
+    and runs them outside the trace of the request that started them
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            gauge = BACKGROUND_JOBS.labels(kind)
+            gauge.inc()
+            try:
+                with untraced():
+                    return await fn(*args, **kwargs)
+            finally:
+                gauge.dec()
+        return wrapper
+    return decorator
+
+
+def _route_template(scope) -> Optional[str]:
+    route = scope.get("route")
+    return getattr(route, "path", None)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request count, latency and in-flight requests.
+
+    Labels use the matched route template (/api/listings/{listing_id}), never
+    the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = _route_template(scope) or "unmatched"
+            method = scope["method"]
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
@@ -0,0 +1,79 @@
+"""
+CMC IP Marketplace - Keyset Pagination
+Opaque cursors over (created_at, id) and NDJSON streaming of paged queries
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+# Header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(row: Dict, tiebreak: str = "id") -> str:
+    """Cursor pointing just after `row` in (created_at DESC, <tiebreak> DESC) order"""
+    raw = json.dumps([row["created_at"], row[tiebreak]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    (created_at, id) from a cursor; both are validated because they are
+    spliced into a PostgREST filter and the cursor comes from the client
+    """
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        datetime.fromisoformat(created_at)
+        return created_at, str(uuid.UUID(row_id))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(query, cursor: Optional[str], limit: int, tiebreak: str = "id") -> Tuple[List[Dict], Optional[str]]:
+    """
+    Run a PostgREST select as one keyset page, newest first.
+
+    The query must select created_at and the tiebreak column (a unique
+    key, id by default). One extra row is fetched to tell whether another
+    page exists, so no count query is needed.
+
+    Returns:
+        Tuple of (rows, cursor of the next page or None)
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # Quoted values: timestamps contain ':' and '+', which PostgREST reserves
+        query = query.or_(
+            f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",{tiebreak}.lt."{row_id}")'
+        )
+    rows = query.order("created_at", desc=True).order(tiebreak, desc=True).limit(limit + 1).execute().data
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1], tiebreak)
+    return rows, None
+
+
+async def iter_ndjson(
+    build_query: Callable[[], Any],
+    page_size: int,
+    transform: Optional[Callable[[Dict], Dict]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Stream every row of a query as newline-delimited JSON, one page at a time.
+
+    build_query must return a fresh (unexecuted) query on each call.
+    """
+    cursor = None
+    while True:
+        rows, cursor = paginate(build_query(), cursor, page_size)
+        for row in rows:
+            if transform:
+                row = transform(row)
+            yield (json.dumps(row, default=str) + "\n").encode("utf-8")
+        if not cursor:
+            break
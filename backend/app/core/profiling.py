@@ -0,0 +1,156 @@
+"""
+CMC IP Marketplace - On-demand Request Profiling
+Samples a single request with pyinstrument when an admin asks for it
+
+Send `X-Profile: html` (or `speedscope`), or add `?profile=html` to the URL,
+with an admin bearer token. The response body is replaced by the profile, or,
+when settings.profiling_output_dir is set, the normal response is returned and
+the profile is written to that directory (path in the X-Profile-Path header).
+
+Requests without the header/flag are passed straight through: pyinstrument is
+only imported the first time a profile is actually taken.
+"""
+
+import logging
+import os
+import time
+import uuid
+from typing import Optional
+from urllib.parse import parse_qs
+
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.responses import JSONResponse, Response
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_FORMATS = {"html", "speedscope"}
+
+
+def _requested_format(scope) -> Optional[str]:
+    """Profile format asked for by header or query flag, if any"""
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return value.decode("latin-1").strip().lower() or "html"
+    query = scope.get("query_string", b"")
+    if b"profile=" in query:
+        values = parse_qs(query.decode("latin-1")).get("profile")
+        if values:
+            return values[0].lower()
+    return None
+
+
+def _bearer_token(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            auth = value.decode("latin-1")
+            if auth.lower().startswith("bearer "):
+                return auth[7:]
+    return None
+
+
+async def _is_admin(scope) -> bool:
+    from app.core.security import get_current_user
+
+    token = _bearer_token(scope)
+    if not token:
+        return False
+    try:
+        user = await get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+    except Exception:
+        return False
+    return user.get("role") == "admin"
+
+
+def _render(profiler, fmt: str) -> bytes:
+    if fmt == "speedscope":
+        from pyinstrument.renderers import SpeedscopeRenderer
+        return profiler.output(SpeedscopeRenderer()).encode()
+    return profiler.output_html().encode()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles admin-flagged requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        fmt = _requested_format(scope)
+        if fmt is None:
+            await self.app(scope, receive, send)
+            return
+
+        if fmt not in PROFILE_FORMATS:
+            await JSONResponse(
+                status_code=400,
+                content={"detail": f"Unknown profile format '{fmt}'. Use one of: {', '.join(sorted(PROFILE_FORMATS))}"},
+            )(scope, receive, send)
+            return
+
+        if not await _is_admin(scope):
+            await JSONResponse(status_code=403, content={"detail": "Profiling requires admin role"})(scope, receive, send)
+            return
+
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            await JSONResponse(status_code=501, content={"detail": "pyinstrument is not installed"})(scope, receive, send)
+            return
+
+        profiler = Profiler(interval=settings.profiling_interval_ms / 1000, async_mode="enabled")
+        if settings.profiling_output_dir:
+            await self._profile_to_file(profiler, fmt, scope, receive, send)
+        else:
+            await self._profile_to_response(profiler, fmt, scope, receive, send)
+
+    async def _profile_to_response(self, profiler, fmt: str, scope, receive, send):
+        status_code = 500
+
+        async def discard(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.stop()
+
+        media_type = "application/json" if fmt == "speedscope" else "text/html"
+        response = Response(
+            _render(profiler, fmt),
+            media_type=media_type,
+            headers={"X-Profiled-Status": str(status_code)},
+        )
+        await response(scope, receive, send)
+
+    async def _profile_to_file(self, profiler, fmt: str, scope, receive, send):
+        extension = "speedscope.json" if fmt == "speedscope" else "html"
+        filename = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.{extension}"
+        path = os.path.join(settings.profiling_output_dir, filename)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-path", path.encode())]
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            try:
+                os.makedirs(settings.profiling_output_dir, exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(_render(profiler, fmt))
+                logger.info(f"Saved profile of {scope['method']} {scope['path']} to {path}")
+            except OSError as e:
+                logger.error(f"Failed to save profile to {path}: {e}")
@@ -0,0 +1,241 @@
+"""
+CMC IP Marketplace - Rate Limiting
+Token-bucket rate limiting middleware driven by settings.rate_limit_*
+
+Every request draws from a per-IP bucket and, when a valid bearer token is
+present, a per-user bucket. Buckets hold rate_limit_requests tokens and
+refill over rate_limit_period seconds. Expensive routes (AI generation,
+uploads) cost more than one token, capped at the bucket size.
+"""
+
+import asyncio
+import logging
+import math
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (method, path pattern, cost) — first match wins, default cost is 1
+ROUTE_COSTS: List[Tuple[str, re.Pattern, int]] = [
+    ("POST", re.compile(r"^/api/admin/ai/reanalyze$"), 20),
+    ("POST", re.compile(r"^/api/ai/"), 10),
+    ("POST", re.compile(r"^/api/files/upload$"), 5),
+    ("POST", re.compile(r"^/api/users/me/avatar$"), 5),
+    ("POST", re.compile(r"^/api/auth/"), 3),
+]
+
+# Large pages cost extra: one token per this many rows requested via ?limit=
+ROWS_PER_TOKEN = 50
+
+EXEMPT_PATHS = {"/", "/health", "/metrics", "/docs", "/redoc", "/openapi.json"}
+
+
+def request_cost(method: str, path: str, query_limit: Optional[str] = None) -> int:
+    cost = 1
+    for route_method, pattern, route_cost in ROUTE_COSTS:
+        if method == route_method and pattern.match(path):
+            cost = route_cost
+            break
+    if method == "GET" and query_limit and query_limit.isdigit():
+        cost += int(query_limit) // ROWS_PER_TOKEN
+    return cost
+
+
+# ==========================================
+# Bucket stores
+# ==========================================
+
+class RateLimitStore(ABC):
+    """Atomically refill a bucket and take `cost` tokens if available"""
+
+    @abstractmethod
+    async def consume(self, key: str, cost: float, capacity: float, refill_per_sec: float) -> Tuple[bool, float]:
+        """Returns (allowed, tokens left)"""
+
+    @abstractmethod
+    async def refund(self, key: str, cost: float, capacity: float):
+        """Give back tokens taken by consume() for a request that was rejected anyway"""
+
+
+class MemoryStore(RateLimitStore):
+    """Per-process buckets (limits apply per worker)"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # key -> (tokens, updated_at)
+
+    def _prune(self, now: float, capacity: float, refill_per_sec: float):
+        # Buckets that have refilled completely carry no state worth keeping
+        full_after = capacity / refill_per_sec
+        self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < full_after}
+
+    async def consume(self, key: str, cost: float, capacity: float, refill_per_sec: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_per_sec)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        if len(self._buckets) >= self.max_keys:
+            self._prune(now, capacity, refill_per_sec)
+        self._buckets[key] = (tokens, now)
+        return allowed, tokens
+
+    async def refund(self, key: str, cost: float, capacity: float):
+        if key in self._buckets:
+            tokens, updated_at = self._buckets[key]
+            self._buckets[key] = (min(capacity, tokens + cost), updated_at)
+
+
+class SupabaseStore(RateLimitStore):
+    """
+    Buckets shared by all workers via the rate_limit_consume() database function.
+
+    Falls back to the in-process store if the database call fails, so an
+    outage degrades to per-worker limits instead of rejecting traffic.
+    """
+
+    def __init__(self, supabase_client, fallback: Optional[RateLimitStore] = None):
+        self.client = supabase_client
+        self.fallback = fallback or MemoryStore()
+
+    async def consume(self, key: str, cost: float, capacity: float, refill_per_sec: float) -> Tuple[bool, float]:
+        try:
+            result = await asyncio.to_thread(lambda: self.client.rpc("rate_limit_consume", {
+                "p_key": key,
+                "p_cost": cost,
+                "p_capacity": capacity,
+                "p_refill_per_sec": refill_per_sec,
+            }).execute())
+            return bool(result.data["allowed"]), float(result.data["tokens"])
+        except Exception as e:
+            logger.warning(f"Shared rate limit store unavailable, using local buckets: {e}")
+            return await self.fallback.consume(key, cost, capacity, refill_per_sec)
+
+    async def refund(self, key: str, cost: float, capacity: float):
+        try:
+            await asyncio.to_thread(lambda: self.client.rpc("rate_limit_refund", {
+                "p_key": key,
+                "p_cost": cost,
+                "p_capacity": capacity,
+            }).execute())
+        except Exception as e:
+            logger.warning(f"Shared rate limit store unavailable, refunding local bucket: {e}")
+            await self.fallback.refund(key, cost, capacity)
+
+
+def get_rate_limit_store() -> RateLimitStore:
+    """Store selected by settings.rate_limit_backend"""
+    if settings.rate_limit_backend == "supabase":
+        from app.services.supabase_service import get_supabase_client
+        return SupabaseStore(get_supabase_client())
+    return MemoryStore()
+
+
+# ==========================================
+# Middleware
+# ==========================================
+
+def _client_ip(request: Request) -> str:
+    """
+    Address the outermost trusted proxy saw the request come from.
+
+    Each proxy appends its peer to X-Forwarded-For, so with N trusted
+    proxies the client is the Nth entry from the right; anything further
+    left was supplied by the client and can be forged.
+    """
+    hops = settings.rate_limit_trusted_proxies
+    if hops > 0:
+        forwarded = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.client.host if request.client else "unknown"
+
+
+# bearer token -> verified user id, or "" when Supabase Auth rejected the token
+_verified_tokens = TTLCache(ttl=settings.rate_limit_auth_cache_seconds, max_entries=10000)
+
+
+async def _verified_user_id(request: Request) -> Optional[str]:
+    """
+    Owner of the bearer token, verified with Supabase Auth like get_current_user.
+
+    The subject of an unverified token can't be trusted: anyone could drain
+    another user's bucket by sending tokens with their id. Invalid tokens
+    only draw from the per-IP bucket.
+    """
+    auth = request.headers.get("authorization", "")
+    if not auth.lower().startswith("bearer "):
+        return None
+    token = auth[7:]
+    user_id = _verified_tokens.get(token)
+    if user_id is None:
+        from app.services.supabase_service import supabase_service
+        try:
+            response = await asyncio.to_thread(supabase_service.client.auth.get_user, token)
+            user_id = response.user.id if response and response.user else ""
+        except Exception:
+            user_id = ""
+        _verified_tokens.set(token, user_id)
+    return user_id or None
+
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+    """Rejects over-limit requests with 429 and sets RateLimit-* headers"""
+
+    def __init__(self, app, store: Optional[RateLimitStore] = None):
+        super().__init__(app)
+        self.store = store or get_rate_limit_store()
+        self.capacity = float(settings.rate_limit_requests)
+        self.refill_per_sec = settings.rate_limit_requests / settings.rate_limit_period
+
+    async def dispatch(self, request: Request, call_next):
+        if request.method == "OPTIONS" or request.url.path in EXEMPT_PATHS:
+            return await call_next(request)
+
+        # A request can never need more than a full bucket; oversized ?limit= values reach validation
+        cost = min(request_cost(request.method, request.url.path, request.query_params.get("limit")), self.capacity)
+        ip_key = f"ip:{_client_ip(request)}"
+
+        allowed, remaining = await self.store.consume(ip_key, cost, self.capacity, self.refill_per_sec)
+        if not allowed:
+            return self._reject(cost, remaining)
+
+        # Verified only after the IP bucket admits the request, so floods don't reach Supabase Auth
+        user_id = await _verified_user_id(request)
+        if user_id:
+            allowed, tokens = await self.store.consume(f"user:{user_id}", cost, self.capacity, self.refill_per_sec)
+            if not allowed:
+                await self.store.refund(ip_key, cost, self.capacity)
+                return self._reject(cost, tokens)
+            remaining = min(remaining, tokens)
+
+        response = await call_next(request)
+        response.headers.update(self._headers(remaining))
+        return response
+
+    def _reject(self, cost: float, tokens: float) -> JSONResponse:
+        retry_after = math.ceil((cost - tokens) / self.refill_per_sec)
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Rate limit exceeded. Try again later."},
+            headers={**self._headers(tokens), "Retry-After": str(retry_after)},
+        )
+
+    def _headers(self, remaining: float) -> Dict[str, str]:
+        reset = math.ceil((self.capacity - remaining) / self.refill_per_sec)
+        return {
+            "RateLimit-Limit": str(int(self.capacity)),
+            "RateLimit-Remaining": str(max(0, math.floor(remaining))),
+            "RateLimit-Reset": str(reset),
+        }
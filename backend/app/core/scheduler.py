@@ -0,0 +1,89 @@
+"""
+CMC IP Marketplace - Periodic Task Scheduler
+Runs registered maintenance jobs on a fixed interval inside the API process
+"""
+
+import asyncio
+import logging
+import random
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.core.metrics import BACKGROUND_JOBS
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """A coroutine function run every `interval` seconds"""
+
+    def __init__(self, name: str, interval: float, func: Callable[[], Awaitable], jitter: float = 0.1):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.jitter = jitter
+        self.task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.last_error: Optional[str] = None
+
+    def _next_delay(self) -> float:
+        # Jitter keeps several workers started by one deploy from ticking in lockstep
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    async def _loop(self):
+        await asyncio.sleep(self._next_delay())
+        while True:
+            gauge = BACKGROUND_JOBS.labels(self.name)
+            gauge.inc()
+            try:
+                await self.func()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Periodic task '{self.name}' failed: {e}")
+            finally:
+                gauge.dec()
+            self.runs += 1
+            await asyncio.sleep(self._next_delay())
+
+
+class Scheduler:
+    """Registry of periodic tasks, started and stopped with the application"""
+
+    def __init__(self):
+        self._tasks: Dict[str, PeriodicTask] = {}
+
+    def add(self, name: str, interval: float, func: Callable[[], Awaitable]):
+        """Register a job (replaces any job with the same name)"""
+        self._tasks[name] = PeriodicTask(name, interval, func)
+
+    def start(self):
+        for periodic in self._tasks.values():
+            if periodic.task is None or periodic.task.done():
+                periodic.task = asyncio.create_task(periodic._loop())
+                logger.info(f"Scheduled '{periodic.name}' every {periodic.interval}s")
+
+    async def stop(self):
+        tasks: List[asyncio.Task] = [p.task for p in self._tasks.values() if p.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for periodic in self._tasks.values():
+            periodic.task = None
+
+    def status(self) -> List[Dict]:
+        return [
+            {
+                "name": p.name,
+                "interval_seconds": p.interval,
+                "running": bool(p.task and not p.task.done()),
+                "runs": p.runs,
+                "last_error": p.last_error,
+            }
+            for p in self._tasks.values()
+        ]
+
+
+# Global scheduler instance
+scheduler = Scheduler()
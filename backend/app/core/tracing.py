@@ -0,0 +1,137 @@
+"""
+CMC IP Marketplace - Per-request Upstream Tracing
+Records every Supabase/Storage/Auth/Anthropic call made while serving a request
+"""
+
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (service, target, operation, duration in seconds)
+UpstreamCall = Tuple[str, str, str, float]
+
+
+class RequestTrace:
+    """Upstream calls made while serving one request, in order"""
+
+    __slots__ = ("calls",)
+
+    def __init__(self):
+        self.calls: List[UpstreamCall] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.calls)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(call[3] for call in self.calls)
+
+    def by_service(self) -> Dict[str, Tuple[int, float]]:
+        """service -> (calls, cumulative seconds)"""
+        totals: Dict[str, Tuple[int, float]] = {}
+        for service, _, _, duration in self.calls:
+            count, seconds = totals.get(service, (0, 0.0))
+            totals[service] = (count + 1, seconds + duration)
+        return totals
+
+    def repeated(self) -> List[Tuple[str, int]]:
+        """Calls issued more than once with the same service/target/operation (N+1 candidates)"""
+        counts = Counter(f"{s}:{o} {t}" for s, t, o, _ in self.calls)
+        return [(call, n) for call, n in counts.most_common() if n > 1]
+
+    def server_timing(self, elapsed: float) -> str:
+        """Server-Timing header value, one metric per upstream service plus the total"""
+        parts = [
+            f'{service};dur={seconds * 1000:.1f};desc="{count} calls"'
+            for service, (count, seconds) in self.by_service().items()
+        ]
+        parts.append(f"total;dur={elapsed * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+def record_upstream(service: str, target: str, operation: str, duration: float):
+    """Append a call to the active request's trace (no-op outside a traced request)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.calls.append((service, target, operation, duration))
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def untraced():
+    """
+    Detach from the active request's trace.
+
+    Background work (BackgroundTasks, asyncio.create_task) inherits the
+    request's context and would otherwise keep appending to its trace
+    after the response has gone out.
+    """
+    token = _current_trace.set(None)
+    try:
+        yield
+    finally:
+        _current_trace.reset(token)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that traces upstream calls per request.
+
+    Adds a Server-Timing header summarising time spent per upstream service and
+    logs the call sequence at debug level when a request makes more than
+    settings.trace_call_threshold calls.
+
+    The trace lives in a context variable, so calls made from worker threads
+    (asyncio.to_thread, sync endpoints) are attributed to the right request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+        token = _current_trace.set(trace)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                header = trace.server_timing(time.perf_counter() - started)
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            if trace.count > settings.trace_call_threshold:
+                self._log(scope, trace)
+
+    @staticmethod
+    def _log(scope, trace: RequestTrace):
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        sequence = " -> ".join(f"{o} {t}" for _, t, o, _ in trace.calls)
+        repeated = ", ".join(f"{call} x{n}" for call, n in trace.repeated())
+        logger.debug(
+            f"{scope['method']} {scope['path']} made {trace.count} upstream calls "
+            f"({trace.total_seconds * 1000:.1f}ms): {sequence}"
+            + (f" | repeated: {repeated}" if repeated else "")
+        )
@@ -3,8 +3,10 @@ CMC IP Marketplace - Main FastAPI Application
 """
 
 import sentry_sdk
-from fastapi import FastAPI
+import secrets
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from app.core.config import settings
 import logging
 
@@ -32,13 +34,34 @@ app = FastAPI(
     debug=settings.debug
 )
 
-# CORS middleware
+# On-demand profiling of single requests (admin only)
+if settings.profiling_enabled:
+    from app.core.profiling import ProfilingMiddleware
+    app.add_middleware(ProfilingMiddleware)
+
+# Rate limiting (per-IP and per-user token buckets)
+if settings.rate_limit_enabled:
+    from app.core.rate_limit import RateLimitMiddleware
+    app.add_middleware(RateLimitMiddleware)
+
+# Per-request upstream call tracing (Server-Timing header)
+if settings.trace_enabled:
+    from app.core.tracing import TracingMiddleware
+    app.add_middleware(TracingMiddleware)
+
+# Request metrics (outside the other middleware, so rejected and failed requests are counted too)
+if settings.metrics_enabled:
+    from app.core.metrics import MetricsMiddleware
+    app.add_middleware(MetricsMiddleware)
+
+# CORS middleware (added last, so it is outermost and 429s and profiler errors carry CORS headers)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins_list,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "Retry-After", "Server-Timing", "X-Profile-Path", "X-Profiled-Status"],
 )
 
 
@@ -57,6 +80,18 @@ async def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus metrics"""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if settings.metrics_token and not secrets.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {settings.metrics_token}"
+    ):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -94,11 +129,38 @@ async def startup_event():
     logger.info(f"Environment: {settings.environment}")
     logger.info(f"Debug mode: {settings.debug}")
 
+    if settings.scheduler_enabled:
+        from app.core.scheduler import scheduler
+        from app.services.ai_jobs import reap_analyses
+        from app.services.counter_service import get_counter_service
+        from app.services.notification_service import get_notification_dispatcher
+        from app.services.supabase_service import get_supabase_client
+
+        supabase = get_supabase_client()
+        counters = get_counter_service(supabase)
+        scheduler.add("analysis_reaper", settings.reaper_interval_seconds, lambda: reap_analyses(supabase))
+        scheduler.add("view_count_flush", settings.counter_flush_seconds, counters.flush)
+        scheduler.add("counter_reconcile", settings.counter_reconcile_seconds, counters.reconcile)
+        scheduler.add(
+            "notification_dispatch",
+            settings.notification_dispatch_seconds,
+            get_notification_dispatcher(supabase).dispatch,
+        )
+        scheduler.start()
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown"""
+    from app.core.scheduler import scheduler
+    from app.services.counter_service import get_counter_service
+    from app.services.http_client import close_http_client
+    from app.services.supabase_service import get_supabase_client
+
     logger.info(f"Shutting down {settings.app_name}")
+    await scheduler.stop()
+    await get_counter_service(get_supabase_client()).flush()
+    await close_http_client()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,43 @@
+"""
+CMC IP Marketplace - AI Output Models
+Schemas that structured Claude responses are validated against
+"""
+
+from pydantic import BaseModel, Field
+from typing import Optional, List, Union
+
+
+class Comparable(BaseModel):
+    """Comparable title with the reason it applies"""
+    title: str
+    reason: Optional[str] = None
+
+
+class ScriptAnalysis(BaseModel):
+    """Script analysis returned by Claude"""
+    model_config = {"extra": "allow"}
+
+    executive_summary: str
+    commercial_score: float = Field(..., ge=1, le=10)
+    commercial_justification: str = ""
+    strengths: List[str] = []
+    improvements: List[str] = []
+    comparables: List[Union[Comparable, str]] = []
+    target_audience: str = ""
+    budget_range: str = ""
+    themes: List[str] = []
+
+
+class PitchDeckSlide(BaseModel):
+    """One slide of a pitch deck outline"""
+    slide_number: int
+    title: str
+    key_points: List[str] = []
+    visual_suggestion: Optional[str] = None
+
+
+class PitchDeckOutline(BaseModel):
+    """Pitch deck outline returned by Claude"""
+    model_config = {"extra": "allow"}
+
+    slides: List[PitchDeckSlide] = Field(..., min_length=1)
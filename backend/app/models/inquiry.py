@@ -0,0 +1,11 @@
+"""
+CMC IP Marketplace - Inquiry Models
+Row shapes shared by the inquiry and admin endpoints
+"""
+
+
+def flatten_listing_title(inquiry: dict) -> dict:
+    """Replace the embedded ip_listings(title) join with a flat listing_title field"""
+    listing = inquiry.pop("ip_listings", None) or {}
+    inquiry["listing_title"] = listing.get("title", "Unknown")
+    return inquiry
@@ -32,6 +32,13 @@ class AIAnalysisStatus(str, Enum):
     FAILED = "failed"
 
 
+# Slim projection for listing cards (catalog grids, saved lists)
+LISTING_CARD_COLUMNS = (
+    "id, slug, title, tagline, genre, format, tier, poster_url, "
+    "ai_score, view_count, save_count, status, creator_id, created_at"
+)
+
+
 class ListingCreate(BaseModel):
     """Create new IP listing"""
     title: str = Field(..., min_length=2, max_length=200)
@@ -37,6 +37,16 @@ class UserProfile(BaseModel):
     updated_at: datetime
 
 
+class PublicProfile(BaseModel):
+    """Public profile fields (safe to show on listing cards)"""
+    id: str
+    role: UserRole
+    display_name: str
+    bio: Optional[str] = None
+    avatar_url: Optional[str] = None
+    company_name: Optional[str] = None
+
+
 class UserUpdate(BaseModel):
     """User profile update data"""
     display_name: Optional[str] = Field(None, min_length=2, max_length=100)
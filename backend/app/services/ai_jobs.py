@@ -0,0 +1,577 @@
+"""
+CMC IP Marketplace - AI Jobs
+Background jobs that generate AI materials (analysis, one-pager, pitch deck)
+"""
+
+import asyncio
+import json
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import track_job
+from app.services.anthropic_service import anthropic_service, PROMPT_VERSIONS
+from app.services.materials_service import get_materials_service, compute_input_hash, content_hash
+from app.services.storage_service import get_storage_service
+
+logger = logging.getLogger(__name__)
+
+# Downstream materials generated from a finished analysis
+DOWNSTREAM_STAGES = ["one_pager", "pitch_deck"]
+
+# Sections of in-flight analyses, surfaced before the full response has arrived
+_partial_analyses: Dict[str, Dict] = {}
+
+
+# Listings with an analysis running in this process (never reaped as stale)
+_running_analyses: set = set()
+
+
+def get_partial_analysis(listing_id: str) -> Optional[Dict]:
+    """Sections streamed so far for an analysis that is still running."""
+    partial = _partial_analyses.get(listing_id)
+    return dict(partial) if partial else None
+
+
+# ==========================================
+# Helpers
+# ==========================================
+
+def get_listing_text(listing: dict) -> str:
+    """Build a rich text representation of the listing for Claude to analyze."""
+    parts = []
+    parts.append(f"Title: {listing.get('title', '')}")
+    if listing.get('tagline'):
+        parts.append(f"Tagline: {listing['tagline']}")
+    parts.append(f"Genre: {listing.get('genre', '')}")
+    parts.append(f"Format: {listing.get('format', '')}")
+    if listing.get('logline'):
+        parts.append(f"Logline: {listing['logline']}")
+    if listing.get('description'):
+        parts.append(f"\nDescription:\n{listing['description']}")
+    if listing.get('period'):
+        parts.append(f"Time Period: {listing['period']}")
+    if listing.get('location'):
+        parts.append(f"Location: {listing['location']}")
+    if listing.get('world_type'):
+        parts.append(f"World Type: {listing['world_type']}")
+    if listing.get('themes'):
+        parts.append(f"Themes: {', '.join(listing['themes'])}")
+    if listing.get('target_audience'):
+        parts.append(f"Target Audience: {listing['target_audience']}")
+    if listing.get('comparables'):
+        parts.append(f"Comparables: {', '.join(listing['comparables'])}")
+    return '\n'.join(parts)
+
+
+def analysis_input_hash(listing: dict) -> str:
+    """Memoization key for a listing's analysis."""
+    return compute_input_hash(PROMPT_VERSIONS["analysis"], anthropic_service.model, listing)
+
+
+def downstream_input_hash(material_type: str, listing: dict, analysis_row: Optional[dict]) -> str:
+    """Memoization key for a one-pager or pitch deck — also depends on the analysis it is built from."""
+    extra = {"analysis": content_hash(analysis_row["content"])} if analysis_row else None
+    return compute_input_hash(PROMPT_VERSIONS[material_type], anthropic_service.model, listing, extra=extra)
+
+
+def load_json_material(material: Optional[dict]) -> Optional[dict]:
+    """Decode the JSON content of an analysis or pitch deck material row."""
+    if not material:
+        return None
+    try:
+        content = material["content"]
+        return json.loads(content) if isinstance(content, str) else content
+    except Exception:
+        return None
+
+
+# Stop extracting once the analysis prompt limit is covered
+SCRIPT_TEXT_LIMIT = 60000
+
+
+def _extract_pdf_text(spool) -> str:
+    """Extract text from a spooled PDF, memory-mapping it when it lives on disk."""
+    import mmap
+    import pypdf
+    from app.services.storage_service import SPOOL_MEMORY_BYTES
+
+    spool.seek(0, 2)
+    size = spool.tell()
+    spool.seek(0)
+
+    mapped = None
+    try:
+        if size > SPOOL_MEMORY_BYTES:
+            mapped = mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ)
+        pdf_reader = pypdf.PdfReader(mapped if mapped is not None else spool)
+
+        text_parts = []
+        length = 0
+        for page in pdf_reader.pages:
+            text = page.extract_text() or ''
+            text_parts.append(text)
+            length += len(text) + 1
+            if length >= SCRIPT_TEXT_LIMIT:
+                break
+        return '\n'.join(text_parts)[:SCRIPT_TEXT_LIMIT]
+    finally:
+        if mapped is not None:
+            mapped.close()
+
+
+async def fetch_script_text(listing: dict, supabase) -> Optional[str]:
+    """Stream the script PDF from Supabase Storage to a bounded temp file and read it."""
+    script_url = listing.get('script_url')
+    if not script_url:
+        return None
+
+    storage = get_storage_service(supabase)
+    try:
+        spool = await storage.download_to_spool(
+            storage.path_from_url(script_url),
+            max_bytes=settings.max_file_size_mb * 1024 * 1024,
+        )
+    except Exception as e:
+        logger.warning(f"Could not download script: {e}")
+        return None
+
+    try:
+        # Parse off the event loop — large PDFs take a while
+        return await asyncio.to_thread(_extract_pdf_text, spool)
+    except Exception as e:
+        logger.warning(f"Could not read script PDF: {e}")
+        return None
+    finally:
+        spool.close()
+
+
+async def get_analysis_input(listing: dict, supabase) -> str:
+    """Script text for analysis, falling back to the listing metadata text."""
+    listing_id = listing.get("id")
+    script_text = await fetch_script_text(listing, supabase)
+    if script_text:
+        logger.info(f"[{listing_id}] Using script PDF for analysis ({len(script_text)} chars)")
+        return script_text
+    logger.info(f"[{listing_id}] No script PDF — using metadata for analysis")
+    return get_listing_text(listing)
+
+
+# ==========================================
+# Analysis
+# ==========================================
+
+@track_job("analysis")
+async def run_analysis(listing_id: str, supabase, speculate: bool = True, retry: bool = False) -> Optional[Dict]:
+    """
+    Background task: run AI analysis and save results.
+
+    Args:
+        listing_id: Listing to analyze
+        supabase: Supabase client
+        speculate: Queue a low-priority one-pager when the analysis is ready
+            (if enabled in settings)
+        retry: Run started by the retry scheduler (keeps the retry count;
+            a fresh request resets it)
+
+    Returns:
+        The saved analysis material row, or None if the analysis failed
+    """
+    _running_analyses.add(listing_id)
+    listing = None
+    try:
+        # 1. Get listing
+        result = supabase.table("ip_listings").select("*").eq("id", listing_id).single().execute()
+        if not result.data:
+            logger.error(f"Listing {listing_id} not found for analysis")
+            return None
+        listing = result.data
+
+        # 2. Update status to analyzing
+        started = {
+            "ai_analysis_status": "analyzing",
+            "ai_analysis_started_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if not retry:
+            started.update({"ai_retry_count": 0, "ai_next_retry_at": None})
+            listing["ai_retry_count"] = 0
+        supabase.table("ip_listings").update(started).eq("id", listing_id).execute()
+
+        # 3. Try to get script text, fallback to metadata text
+        script_text = await get_analysis_input(listing, supabase)
+
+        # 4. Run Claude analysis, exposing sections as they stream in
+        partial = _partial_analyses.setdefault(listing_id, {})
+        analysis, usage = await anthropic_service.analyze_script(
+            script_text, listing, on_section=partial.__setitem__
+        )
+        logger.info(f"[{listing_id}] Analysis complete. Score: {analysis.get('commercial_score')}")
+
+        # 5. Save analysis to ip_materials table (keyed for memoization)
+        material = get_materials_service(supabase).save(
+            listing_id, "analysis", json.dumps(analysis),
+            input_hash=analysis_input_hash(listing), usage=usage,
+        )
+
+        # 6. Update listing with key AI fields + status → ready
+        supabase.table("ip_listings").update({
+            "ai_analysis_status": "ready",
+            "ai_score": analysis.get("commercial_score"),
+            "ai_strengths": analysis.get("strengths", []),
+            "ai_improvements": analysis.get("improvements", []),
+            "ai_retry_count": 0,
+            "ai_last_error": None,
+            "ai_next_retry_at": None,
+        }).eq("id", listing_id).execute()
+
+        logger.info(f"[{listing_id}] Analysis saved successfully")
+
+        if speculate and settings.ai_speculative_onepager:
+            schedule_speculative_one_pager(listing_id, supabase)
+        return material
+
+    except Exception as e:
+        logger.error(f"[{listing_id}] Analysis failed: {e}")
+        retry_count = (listing or {}).get("ai_retry_count") or 0
+        supabase.table("ip_listings").update(
+            _failure_update(str(e), retry_count)
+        ).eq("id", listing_id).execute()
+        return None
+    finally:
+        _partial_analyses.pop(listing_id, None)
+        _running_analyses.discard(listing_id)
+
+
+# ==========================================
+# Stale / failed analysis recovery
+# ==========================================
+
+# Caps concurrent retries across all scheduler ticks
+_retry_slots = asyncio.Semaphore(settings.ai_retry_concurrency)
+_retry_tasks: set = set()
+
+
+def retry_delay_seconds(retry_count: int) -> float:
+    """Exponential backoff with ±20% jitter so failed rows don't retry in lockstep."""
+    delay = min(settings.ai_retry_base_seconds * (2 ** retry_count), settings.ai_retry_max_seconds)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _failure_update(error: str, retry_count: int) -> Dict:
+    """Listing columns for a failed analysis, scheduling the next retry if any remain."""
+    next_retry_at = None
+    if retry_count < settings.ai_max_retries:
+        next_retry_at = (
+            datetime.now(timezone.utc) + timedelta(seconds=retry_delay_seconds(retry_count))
+        ).isoformat()
+    return {
+        "ai_analysis_status": "failed",
+        "ai_last_error": error[:1000],
+        "ai_next_retry_at": next_retry_at,
+    }
+
+
+def is_analysis_stale(listing: Dict) -> bool:
+    """True if the listing says 'analyzing' but no worker has finished it in time."""
+    if listing.get("ai_analysis_status") != "analyzing" or listing.get("id") in _running_analyses:
+        return False
+    started = listing.get("ai_analysis_started_at")
+    if not started:
+        return True
+    started_at = datetime.fromisoformat(started.replace("Z", "+00:00"))
+    deadline = timedelta(seconds=settings.ai_analysis_timeout_seconds)
+    return datetime.now(timezone.utc) - started_at > deadline
+
+
+async def _run_retry(listing_id: str, supabase):
+    async with _retry_slots:
+        await run_analysis(listing_id, supabase, speculate=False, retry=True)
+
+
+async def reap_analyses(supabase) -> Dict[str, int]:
+    """
+    Periodic job: recover analyses stuck in 'analyzing' and retry failed ones.
+
+    1. Rows in 'analyzing' past the deadline (worker restarted mid-run) are
+       marked failed with a backed-off next_retry_at
+    2. Materials pipelines still holding their listing past the deadline are
+       released, with their unfinished stages marked failed
+    3. Failed rows whose next_retry_at has passed are claimed (retry count
+       bumped with a compare-and-set) and re-enqueued, limited to the free
+       retry slots so a backlog drains gradually after a deploy
+    """
+    columns = "id, ai_analysis_status, ai_analysis_started_at, ai_retry_count"
+    now = datetime.now(timezone.utc)
+
+    # 1. Stale analyzing rows
+    deadline = (now - timedelta(seconds=settings.ai_analysis_timeout_seconds)).isoformat()
+    stale_rows = supabase.table("ip_listings").select(columns) \
+        .eq("ai_analysis_status", "analyzing") \
+        .or_(f"ai_analysis_started_at.is.null,ai_analysis_started_at.lt.{deadline}") \
+        .limit(settings.ai_retry_batch_size).execute().data
+    stale = 0
+    for row in stale_rows:
+        if not is_analysis_stale(row):
+            continue
+        supabase.table("ip_listings").update(
+            _failure_update("Analysis timed out (worker did not finish)", row.get("ai_retry_count") or 0)
+        ).eq("id", row["id"]).eq("ai_analysis_status", "analyzing").execute()
+        stale += 1
+
+    # 2. Materials pipelines whose worker died
+    materials_deadline = (now - timedelta(seconds=settings.ai_materials_timeout_seconds)).isoformat()
+    held_rows = supabase.table("ip_listings").select("id, ai_materials_status, ai_materials_started_at") \
+        .lt("ai_materials_started_at", materials_deadline) \
+        .limit(settings.ai_retry_batch_size).execute().data
+    released = 0
+    for row in held_rows:
+        supabase.table("ip_listings").update({
+            "ai_materials_status": _unfinished_failed(row.get("ai_materials_status") or {}),
+            "ai_materials_started_at": None,
+        }).eq("id", row["id"]).eq("ai_materials_started_at", row["ai_materials_started_at"]).execute()
+        released += 1
+
+    # 3. Due retries, up to the number of free slots
+    free = settings.ai_retry_concurrency - len(_retry_tasks)
+    if free <= 0:
+        return {"stale": stale, "released": released, "retried": 0}
+
+    due_rows = supabase.table("ip_listings").select(columns) \
+        .eq("ai_analysis_status", "failed") \
+        .lt("ai_retry_count", settings.ai_max_retries) \
+        .lte("ai_next_retry_at", now.isoformat()) \
+        .order("ai_next_retry_at").limit(free).execute().data
+    retried = 0
+    for row in due_rows:
+        retry_count = row.get("ai_retry_count") or 0
+        # Claim: only one worker wins the compare-and-set on the retry count
+        claimed = supabase.table("ip_listings").update({
+            "ai_analysis_status": "analyzing",
+            "ai_analysis_started_at": now.isoformat(),
+            "ai_retry_count": retry_count + 1,
+            "ai_next_retry_at": None,
+        }).eq("id", row["id"]).eq("ai_analysis_status", "failed") \
+            .eq("ai_retry_count", retry_count).execute().data
+        if not claimed:
+            continue
+
+        logger.info(f"[{row['id']}] Retrying analysis (attempt {retry_count + 1}/{settings.ai_max_retries})")
+        task = asyncio.create_task(_run_retry(row["id"], supabase))
+        _retry_tasks.add(task)
+        task.add_done_callback(_retry_tasks.discard)
+        retried += 1
+
+    if stale or released or retried:
+        logger.info(f"Analysis reaper: {stale} stale, {released} materials runs released, {retried} retried")
+    return {"stale": stale, "released": released, "retried": retried}
+
+
+# ==========================================
+# One-pager / Pitch deck
+# ==========================================
+
+async def generate_downstream_material(
+    material_type: str,
+    listing: dict,
+    analysis_row: Optional[dict],
+    supabase,
+    force: bool = False,
+) -> Tuple[str, bool]:
+    """
+    Generate (or reuse) a one-pager or pitch deck outline and persist it.
+
+    Returns:
+        Tuple of (stored content, whether it came from the memo cache)
+    """
+    materials = get_materials_service(supabase)
+    input_hash = downstream_input_hash(material_type, listing, analysis_row)
+
+    if not force:
+        cached = materials.get_memoized(listing["id"], material_type, input_hash)
+        if cached:
+            return cached["content"], True
+
+    analysis = load_json_material(analysis_row)
+    if material_type == "one_pager":
+        content, usage = await anthropic_service.generate_one_pager(listing, analysis)
+    else:
+        deck, usage = await anthropic_service.generate_pitch_deck_outline(listing, analysis or {})
+        content = json.dumps(deck)
+
+    materials.save(listing["id"], material_type, content, input_hash=input_hash, usage=usage)
+    return content, False
+
+
+# ==========================================
+# Speculative one-pagers
+# ==========================================
+
+# At most one pending speculative task per listing
+_speculative_tasks: Dict[str, asyncio.Task] = {}
+_speculative_slots = asyncio.Semaphore(settings.ai_speculative_concurrency)
+
+
+def schedule_speculative_one_pager(listing_id: str, supabase):
+    """Queue a low-priority one-pager, superseding any pending one for the listing."""
+    cancel_speculative_one_pager(listing_id)
+    task = asyncio.create_task(_speculative_one_pager(listing_id, supabase))
+    _speculative_tasks[listing_id] = task
+
+    def _forget(t: asyncio.Task):
+        if _speculative_tasks.get(listing_id) is t:
+            del _speculative_tasks[listing_id]
+
+    task.add_done_callback(_forget)
+
+
+def cancel_speculative_one_pager(listing_id: str) -> bool:
+    """Cancel a pending speculative one-pager (e.g. because the listing was edited)."""
+    task = _speculative_tasks.pop(listing_id, None)
+    if task and not task.done():
+        task.cancel()
+        logger.info(f"[{listing_id}] Speculative one-pager cancelled")
+        return True
+    return False
+
+
+def has_speculative_one_pager(listing_id: str) -> bool:
+    return listing_id in _speculative_tasks
+
+
+@track_job("speculative_one_pager")
+async def _speculative_one_pager(listing_id: str, supabase):
+    """Generate a one-pager ahead of the creator asking for it, yielding to interactive work."""
+    await asyncio.sleep(settings.ai_speculative_delay_seconds)
+    async with _speculative_slots:
+        try:
+            result = supabase.table("ip_listings").select("*").eq("id", listing_id).single().execute()
+            listing = result.data
+            if not listing or listing.get("ai_analysis_status") != "ready":
+                return
+
+            # Skip if the listing changed since the analysis was produced
+            analysis_row = get_materials_service(supabase).get_latest(listing_id, "analysis")
+            if not analysis_row or analysis_row.get("input_hash") != analysis_input_hash(listing):
+                logger.info(f"[{listing_id}] Speculative one-pager superseded by listing edit")
+                return
+
+            _, cached = await generate_downstream_material("one_pager", listing, analysis_row, supabase)
+            if not cached:
+                logger.info(f"[{listing_id}] Speculative one-pager ready")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[{listing_id}] Speculative one-pager failed: {e}")
+
+
+# ==========================================
+# Materials pipeline
+# ==========================================
+
+def _initial_stages() -> Dict[str, str]:
+    return {"analysis": "pending", **{s: "pending" for s in DOWNSTREAM_STAGES}}
+
+
+def claim_materials_pipeline(listing_id: str, supabase) -> bool:
+    """
+    Claim a listing for one materials pipeline run.
+
+    Compare-and-set on ai_materials_started_at: only succeeds when no run holds
+    the listing, or the holder is past ai_materials_timeout_seconds (its worker
+    died), so two concurrent requests can't both start a pipeline.
+    """
+    now = datetime.now(timezone.utc)
+    deadline = (now - timedelta(seconds=settings.ai_materials_timeout_seconds)).isoformat()
+    claimed = supabase.table("ip_listings").update({
+        "ai_materials_started_at": now.isoformat(),
+        "ai_materials_status": _initial_stages(),
+    }).eq("id", listing_id) \
+        .or_(f"ai_materials_started_at.is.null,ai_materials_started_at.lt.{deadline}") \
+        .execute().data
+    return bool(claimed)
+
+
+def _unfinished_failed(stages: Dict[str, str]) -> Dict[str, str]:
+    return {stage: "failed" if state in ("pending", "running") else state for stage, state in stages.items()}
+
+
+class _StageTracker:
+    """Holds per-stage status for one pipeline run and mirrors it to the listing."""
+
+    def __init__(self, listing_id: str, supabase):
+        self.listing_id = listing_id
+        self.supabase = supabase
+        self.stages = _initial_stages()
+
+    def set(self, stage: str, state: str):
+        self.stages[stage] = state
+        try:
+            self.supabase.table("ip_listings").update({
+                "ai_materials_status": dict(self.stages)
+            }).eq("id", self.listing_id).execute()
+        except Exception as e:
+            logger.warning(f"[{self.listing_id}] Could not record stage status: {e}")
+
+    def release(self):
+        """Fail any unfinished stage and release the claim on the listing."""
+        self.stages = _unfinished_failed(self.stages)
+        try:
+            self.supabase.table("ip_listings").update({
+                "ai_materials_status": dict(self.stages),
+                "ai_materials_started_at": None,
+            }).eq("id", self.listing_id).execute()
+        except Exception as e:
+            logger.warning(f"[{self.listing_id}] Could not release materials pipeline: {e}")
+
+
+@track_job("materials_pipeline")
+async def run_materials_pipeline(listing_id: str, supabase, force: bool = False):
+    """
+    Background task: generate all materials for a listing.
+
+    Runs the analysis first, then the one-pager and pitch deck concurrently.
+    Each output is persisted as soon as it completes, so wall time is roughly
+    the analysis plus the slowest downstream step. The caller must have
+    claimed the listing with claim_materials_pipeline; the claim is released
+    when the run ends, however it ends.
+    """
+    tracker = _StageTracker(listing_id, supabase)
+    try:
+        result = supabase.table("ip_listings").select("*").eq("id", listing_id).single().execute()
+        if not result.data:
+            logger.error(f"Listing {listing_id} not found for materials pipeline")
+            return
+        listing = result.data
+
+        # 1. Analysis (reuse the memoized one when inputs are unchanged)
+        tracker.set("analysis", "running")
+        analysis_row = None
+        if not force:
+            analysis_row = get_materials_service(supabase).get_memoized(
+                listing_id, "analysis", analysis_input_hash(listing)
+            )
+        if analysis_row is None:
+            analysis_row = await run_analysis(listing_id, supabase, speculate=False)
+        if analysis_row is None:
+            tracker.set("analysis", "failed")
+            for stage in DOWNSTREAM_STAGES:
+                tracker.set(stage, "skipped")
+            return
+        tracker.set("analysis", "ready")
+
+        # 2. Fan out downstream materials concurrently
+        async def _stage(material_type: str):
+            tracker.set(material_type, "running")
+            try:
+                await generate_downstream_material(material_type, listing, analysis_row, supabase, force=force)
+                tracker.set(material_type, "ready")
+            except Exception as e:
+                logger.error(f"[{listing_id}] {material_type} generation failed: {e}")
+                tracker.set(material_type, "failed")
+
+        await asyncio.gather(*(_stage(s) for s in DOWNSTREAM_STAGES))
+        logger.info(f"[{listing_id}] Materials pipeline finished: {tracker.stages}")
+    finally:
+        tracker.release()
@@ -4,34 +4,183 @@ AI-powered script analysis and material generation using Claude
 """
 
 import anthropic
+from pydantic import BaseModel
 from app.core.config import settings
-from typing import Dict, List, Optional
+from app.core.metrics import observe_upstream
+from app.models.ai import ScriptAnalysis, PitchDeckOutline
+from app.services.structured_output import (
+    IncrementalJSONParser,
+    StructuredOutputError,
+    parse_structured,
+    validate_structured,
+)
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
 import logging
 import json
+import time
 
 logger = logging.getLogger(__name__)
 
+# Bump when a prompt template changes so memoized materials are regenerated
+PROMPT_VERSIONS = {
+    "analysis": "analysis-v2",
+    "one_pager": "one-pager-v1",
+    "pitch_deck": "pitch-deck-v2",
+}
+
+# USD per million tokens
+MODEL_PRICING = {
+    "claude-sonnet-4-5-20250929": {"input": 3.00, "output": 15.00, "cache_write": 3.75, "cache_read": 0.30},
+    "claude-haiku-4-5-20251001": {"input": 1.00, "output": 5.00, "cache_write": 1.25, "cache_read": 0.10},
+}
+BATCH_DISCOUNT = 0.5  # Message Batches are billed at half price
+
+
+def build_usage(model: str, usage: Any, latency_ms: Optional[int] = None, batch: bool = False) -> Dict:
+    """
+    Normalize an Anthropic usage object (or dict) into ip_materials accounting columns.
+
+    Args:
+        model: Model that served the call
+        usage: response.usage from the Messages API
+        latency_ms: Wall time of the call, if measured
+        batch: Whether the call went through Message Batches
+
+    Returns:
+        Dict with token counts, latency and computed cost
+    """
+    def _get(field: str) -> int:
+        value = usage.get(field) if isinstance(usage, dict) else getattr(usage, field, None)
+        return int(value or 0)
+
+    input_tokens = _get("input_tokens")
+    output_tokens = _get("output_tokens")
+    cache_read = _get("cache_read_input_tokens")
+    cache_write = _get("cache_creation_input_tokens")
+
+    pricing = MODEL_PRICING.get(model)
+    cost = None
+    if pricing:
+        cost = (
+            input_tokens * pricing["input"]
+            + output_tokens * pricing["output"]
+            + cache_write * pricing["cache_write"]
+            + cache_read * pricing["cache_read"]
+        ) / 1_000_000
+        if batch:
+            cost *= BATCH_DISCOUNT
+        cost = round(cost, 4)
+
+    return {
+        "model_used": model,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cache_read_tokens": cache_read,
+        "cache_creation_tokens": cache_write,
+        "tokens_used": input_tokens + output_tokens + cache_read + cache_write,
+        "latency_ms": latency_ms,
+        "cost_usd": cost,
+    }
+
+
+def merge_usage(*usages: Optional[Dict]) -> Optional[Dict]:
+    """Combine the usage of several calls that produced one material"""
+    usages = [u for u in usages if u]
+    if not usages:
+        return None
+    merged = dict(usages[0])
+    for usage in usages[1:]:
+        for field in ("input_tokens", "output_tokens", "cache_read_tokens",
+                      "cache_creation_tokens", "tokens_used", "latency_ms", "cost_usd"):
+            if usage.get(field) is not None:
+                merged[field] = (merged.get(field) or 0) + usage[field]
+    if merged.get("cost_usd") is not None:
+        merged["cost_usd"] = round(merged["cost_usd"], 4)
+    return merged
+
 
 class AnthropicService:
     """Claude AI service for script analysis and content generation"""
 
     def __init__(self):
-        self.client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
+        # Async client so concurrent generations don't block the event loop
+        self.client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
         self.model = "claude-sonnet-4-5-20250929"  # Latest Sonnet 4.5
-
-    async def analyze_script(self, script_text: str, metadata: Dict) -> Dict:
+        self.repair_model = "claude-haiku-4-5-20251001"  # Cheap model for JSON repair
+
+    async def create_message(self, **params) -> Tuple[Any, Dict]:
+        """Call the Messages API and measure usage, latency and cost"""
+        started = time.perf_counter()
+        with observe_upstream("anthropic", params["model"], "messages"):
+            response = await self.client.messages.create(**params)
+        latency_ms = int((time.perf_counter() - started) * 1000)
+        return response, build_usage(params["model"], response.usage, latency_ms)
+
+    async def generate_structured(
+        self,
+        params: Dict,
+        schema: Type[BaseModel],
+        on_section: Optional[Callable[[str, Any], None]] = None,
+    ) -> Tuple[Dict, Dict]:
         """
-        Analyze a script and provide executive summary, strengths, improvements, etc.
+        Stream a response and parse its JSON object incrementally.
 
         Args:
-            script_text: Full text of the script
-            metadata: IP listing metadata (title, genre, format, etc.)
+            params: Messages API parameters
+            schema: Model the final object is validated against
+            on_section: Called with (key, value) as each top-level member completes
 
         Returns:
-            Dict with analysis results
+            Tuple of (validated object, usage accounting including any repair call)
         """
+        parser = IncrementalJSONParser()
+        started = time.perf_counter()
+        with observe_upstream("anthropic", params["model"], "stream"):
+            async with self.client.messages.stream(**params) as stream:
+                async for text in stream.text_stream:
+                    for key, value in parser.feed(text):
+                        if on_section:
+                            on_section(key, value)
+                message = await stream.get_final_message()
+        latency_ms = int((time.perf_counter() - started) * 1000)
+        usage = build_usage(params["model"], message.usage, latency_ms)
+
         try:
-            prompt = f"""You are an experienced Hollywood script analyst and IP evaluator. Analyze this script and provide a detailed professional assessment.
+            return validate_structured(parser.result(), schema), usage
+        except StructuredOutputError as e:
+            raw = "".join(block.text for block in message.content if block.type == "text")
+            repaired, repair_usage = await self.repair_structured(raw, schema, str(e))
+            return repaired, merge_usage(usage, repair_usage)
+
+    async def repair_structured(self, raw: str, schema: Type[BaseModel], error: str) -> Tuple[Dict, Dict]:
+        """
+        Single cheap call that fixes a malformed structured response.
+        Raises StructuredOutputError if the repaired output is still invalid.
+        """
+        logger.warning(f"Structured output invalid ({error[:200]}), attempting repair")
+        prompt = f"""The following response was supposed to be a single JSON object matching this JSON Schema, but it is invalid.
+
+**JSON Schema:**
+{json.dumps(schema.model_json_schema())}
+
+**Problem:** {error[:2000]}
+
+**Response:**
+{raw[:30000]}
+
+Return only the corrected JSON object. Keep the original content; do not invent values that are not in the response.
+"""
+        response, usage = await self.create_message(
+            model=self.repair_model,
+            max_tokens=4096,
+            temperature=0,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return parse_structured(response.content[0].text, schema), usage
+
+    def build_analysis_prompt(self, script_text: str, metadata: Dict) -> str:
+        """Build the script analysis prompt (shared by live and batch analysis)"""
+        return f"""You are an experienced Hollywood script analyst and IP evaluator. Analyze this script and provide a detailed professional assessment.
 
 **Script Title:** {metadata.get('title', 'Unknown')}
 **Genre:** {metadata.get('genre', 'Unknown')}
@@ -68,36 +217,60 @@ Return your response in JSON format with these keys:
 - target_audience (string)
 - budget_range (string)
 - themes (array of strings)
+
+Respond with only the JSON object — no markdown fences or commentary.
 """
 
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=4096,
-                temperature=0.7,
-                messages=[{"role": "user", "content": prompt}]
-            )
+    def analysis_request_params(self, script_text: str, metadata: Dict) -> Dict:
+        """Messages API parameters for a script analysis request"""
+        return {
+            "model": self.model,
+            "max_tokens": 4096,
+            "temperature": 0.7,
+            "messages": [{"role": "user", "content": self.build_analysis_prompt(script_text, metadata)}],
+        }
 
-            # Extract JSON from response
-            content = response.content[0].text
-            # Try to parse as JSON, fallback to structured extraction if needed
-            try:
-                analysis = json.loads(content)
-            except json.JSONDecodeError:
-                # If not valid JSON, extract structured data manually
-                logger.warning("Claude response not valid JSON, parsing manually")
-                analysis = self._parse_analysis_from_text(content)
+    async def parse_analysis(self, content: str) -> Tuple[Dict, Optional[Dict]]:
+        """
+        Parse a complete analysis response (e.g. from a batch), repairing it once if needed.
 
-            # Add metadata
-            analysis["tokens_used"] = response.usage.input_tokens + response.usage.output_tokens
-            analysis["model_used"] = self.model
+        Returns:
+            Tuple of (validated analysis, usage of the repair call or None)
+        """
+        try:
+            return parse_structured(content, ScriptAnalysis), None
+        except StructuredOutputError as e:
+            return await self.repair_structured(content, ScriptAnalysis, str(e))
+
+    async def analyze_script(
+        self,
+        script_text: str,
+        metadata: Dict,
+        on_section: Optional[Callable[[str, Any], None]] = None,
+    ) -> Tuple[Dict, Dict]:
+        """
+        Analyze a script and provide executive summary, strengths, improvements, etc.
 
-            return analysis
+        Args:
+            script_text: Full text of the script
+            metadata: IP listing metadata (title, genre, format, etc.)
+            on_section: Called with (key, value) as each analysis section is streamed
+
+        Returns:
+            Tuple of (analysis results, usage accounting)
+        """
+        try:
+            return await self.generate_structured(
+                self.analysis_request_params(script_text, metadata),
+                ScriptAnalysis,
+                on_section=on_section,
+            )
 
         except Exception as e:
             logger.error(f"Error analyzing script: {e}")
             raise
 
-    async def generate_one_pager(self, listing_data: Dict, analysis: Optional[Dict] = None) -> str:
+    async def generate_one_pager(self, listing_data: Dict, analysis: Optional[Dict] = None) -> Tuple[str, Dict]:
         """
         Generate a professional one-pager pitch document in markdown.
 
@@ -106,7 +279,7 @@ Return your response in JSON format with these keys:
             analysis: Optional AI analysis results
 
         Returns:
-            Markdown formatted one-pager
+            Tuple of (markdown formatted one-pager, usage accounting)
         """
         try:
             # Load reference examples for context
@@ -163,7 +336,7 @@ Create a professional, compelling one-pager in markdown format. Make it concise
 Use markdown formatting (headers, bold, lists) for readability.
 """
 
-            response = self.client.messages.create(
+            response, usage = await self.create_message(
                 model=self.model,
                 max_tokens=2048,
                 temperature=0.8,
@@ -171,16 +344,16 @@ Use markdown formatting (headers, bold, lists) for readability.
             )
 
             one_pager = response.content[0].text
-            return one_pager
+            return one_pager, usage
 
         except Exception as e:
             logger.error(f"Error generating one-pager: {e}")
             raise
 
-    async def generate_pitch_deck_outline(self, listing_data: Dict, analysis: Dict) -> Dict:
+    async def generate_pitch_deck_outline(self, listing_data: Dict, analysis: Dict) -> Tuple[Dict, Dict]:
         """
         Generate an outline for a full pitch deck (10-15 slides).
-        Returns structured data that can be used to create slides.
+        Returns structured data that can be used to create slides, plus usage accounting.
         """
         try:
             prompt = f"""You are a pitch deck consultant for Hollywood studios. Create a slide-by-slide outline for a pitch deck.
@@ -196,45 +369,25 @@ Create a 10-12 slide pitch deck outline with:
 - Key points (2-4 bullets per slide)
 - Visual suggestions
 
-Return as JSON array of slides with: slide_number, title, key_points (array), visual_suggestion
+Return a JSON object with a "slides" array. Each slide has: slide_number, title, key_points (array), visual_suggestion
+
+Respond with only the JSON object — no markdown fences or commentary.
 """
 
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=2048,
-                temperature=0.7,
-                messages=[{"role": "user", "content": prompt}]
+            return await self.generate_structured(
+                {
+                    "model": self.model,
+                    "max_tokens": 2048,
+                    "temperature": 0.7,
+                    "messages": [{"role": "user", "content": prompt}],
+                },
+                PitchDeckOutline,
             )
 
-            content = response.content[0].text
-            try:
-                deck_outline = json.loads(content)
-            except json.JSONDecodeError:
-                logger.warning("Deck outline not valid JSON")
-                deck_outline = {"slides": []}
-
-            return deck_outline
-
         except Exception as e:
             logger.error(f"Error generating pitch deck: {e}")
             raise
 
-    def _parse_analysis_from_text(self, text: str) -> Dict:
-        """Fallback parser if Claude doesn't return valid JSON"""
-        # Simple extraction logic (can be improved)
-        return {
-            "executive_summary": "Analysis completed. See full text for details.",
-            "commercial_score": 7.0,
-            "commercial_justification": "Strong commercial potential based on genre and concept.",
-            "strengths": ["Unique premise", "Strong characters", "Market appeal"],
-            "improvements": ["Further development needed"],
-            "comparables": [],
-            "target_audience": "General audience",
-            "budget_range": "Mid-budget",
-            "themes": [],
-            "raw_text": text
-        }
-
 
 # Global service instance
 anthropic_service = AnthropicService()
@@ -0,0 +1,362 @@
+"""
+CMC IP Marketplace - Bulk Re-analysis
+Re-score many listings through a batch interface (Anthropic Message Batches,
+or a local stand-in) and write the results back in bulk
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, AsyncIterator
+
+from app.core.config import settings
+from app.core.metrics import track_job
+from app.services.anthropic_service import anthropic_service, build_usage, merge_usage
+from app.services.structured_output import StructuredOutputError
+from app.services.ai_jobs import analysis_input_hash, get_analysis_input
+
+logger = logging.getLogger(__name__)
+
+# Rows per bulk INSERT / RPC call and ids per in_() filter
+WRITE_CHUNK_SIZE = 100
+ID_CHUNK_SIZE = 200
+
+
+def _chunks(items: List, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+# ==========================================
+# Batch backends
+# ==========================================
+
+class BatchBackend(ABC):
+    """
+    Minimal batch interface.
+
+    Requests are dicts with "custom_id" and Messages API "params".
+    Results are dicts with "custom_id" and either "text" + "usage" or "error".
+    """
+
+    @abstractmethod
+    async def submit(self, requests: List[Dict]) -> str:
+        ...
+
+    @abstractmethod
+    async def status(self, batch_id: str) -> Dict:
+        """Return {"ended": bool, "processing": n, "succeeded": n, "errored": n}"""
+
+    @abstractmethod
+    def results(self, batch_id: str) -> AsyncIterator[Dict]:
+        ...
+
+
+class MessageBatchesBackend(BatchBackend):
+    """Anthropic Message Batches API"""
+
+    def __init__(self, client=None):
+        self.client = client or anthropic_service.client
+
+    async def submit(self, requests: List[Dict]) -> str:
+        batch = await self.client.messages.batches.create(requests=requests)
+        return batch.id
+
+    async def status(self, batch_id: str) -> Dict:
+        batch = await self.client.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return {
+            "ended": batch.processing_status == "ended",
+            "processing": counts.processing,
+            "succeeded": counts.succeeded,
+            "errored": counts.errored + counts.canceled + counts.expired,
+        }
+
+    async def results(self, batch_id: str) -> AsyncIterator[Dict]:
+        async for entry in await self.client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                message = entry.result.message
+                yield {
+                    "custom_id": entry.custom_id,
+                    "text": message.content[0].text,
+                    "usage": build_usage(message.model, message.usage, batch=True),
+                }
+            else:
+                yield {"custom_id": entry.custom_id, "error": entry.result.type}
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    In-process stand-in for Message Batches.
+
+    Runs each request through `runner` (Messages API by default) with bounded
+    concurrency. A runner takes the request params and returns
+    {"text": ..., "usage": ...}. Useful for tests, local development and
+    small re-runs.
+    """
+
+    def __init__(self, runner=None, concurrency: int = 4):
+        self.runner = runner or self._call_messages_api
+        self.concurrency = concurrency
+        self._batches: Dict[str, Dict] = {}
+
+    @staticmethod
+    async def _call_messages_api(params: Dict) -> Dict:
+        response, usage = await anthropic_service.create_message(**params)
+        return {"text": response.content[0].text, "usage": usage}
+
+    async def submit(self, requests: List[Dict]) -> str:
+        batch_id = f"local_{uuid.uuid4().hex}"
+        batch = {"requests": requests, "results": [], "task": None}
+        batch["task"] = asyncio.create_task(self._process(batch))
+        self._batches[batch_id] = batch
+        return batch_id
+
+    async def _process(self, batch: Dict):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _one(request: Dict):
+            async with semaphore:
+                try:
+                    output = await self.runner(request["params"])
+                    batch["results"].append({"custom_id": request["custom_id"], **output})
+                except Exception as e:
+                    batch["results"].append({"custom_id": request["custom_id"], "error": str(e)})
+
+        await asyncio.gather(*(_one(r) for r in batch["requests"]))
+
+    async def status(self, batch_id: str) -> Dict:
+        batch = self._batches[batch_id]
+        errored = sum(1 for r in batch["results"] if "error" in r)
+        return {
+            "ended": batch["task"].done(),
+            "processing": len(batch["requests"]) - len(batch["results"]),
+            "succeeded": len(batch["results"]) - errored,
+            "errored": errored,
+        }
+
+    async def results(self, batch_id: str) -> AsyncIterator[Dict]:
+        for result in self._batches.pop(batch_id)["results"]:
+            yield result
+
+
+def get_batch_backend() -> BatchBackend:
+    """Batch backend selected by settings.ai_batch_backend"""
+    if settings.ai_batch_backend == "local":
+        return LocalBatchBackend()
+    return MessageBatchesBackend()
+
+
+# ==========================================
+# Bulk re-analysis jobs
+# ==========================================
+
+class BulkReanalysisJob:
+    """Progress of one bulk re-analysis run"""
+
+    def __init__(self, listing_ids: Optional[List[str]], status: Optional[str], genre: Optional[str],
+                 limit: int, force: bool):
+        self.id = uuid.uuid4().hex
+        self.listing_ids = listing_ids
+        self.status_filter = status
+        self.genre = genre
+        self.limit = limit
+        self.force = force
+
+        self.phase = "queued"  # queued, preparing, processing, writing, done, failed
+        self.batch_id: Optional[str] = None
+        self.total = 0
+        self.skipped = 0
+        self.submitted = 0
+        self.processing = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.written = 0
+        self.error: Optional[str] = None
+        self.created_at = datetime.now(timezone.utc)
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        elapsed = 0.0
+        if self._started:
+            elapsed = (self._finished or time.monotonic()) - self._started
+        completed = self.succeeded + self.failed
+        return {
+            "id": self.id,
+            "phase": self.phase,
+            "batch_id": self.batch_id,
+            "total": self.total,
+            "skipped": self.skipped,
+            "submitted": self.submitted,
+            "processing": self.processing,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "written": self.written,
+            "progress": round(completed / self.submitted, 3) if self.submitted else 0.0,
+            "elapsed_seconds": round(elapsed, 1),
+            "listings_per_minute": round(completed / elapsed * 60, 2) if elapsed else 0.0,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+_jobs: Dict[str, BulkReanalysisJob] = {}
+
+
+def create_job(**selection) -> BulkReanalysisJob:
+    job = BulkReanalysisJob(**selection)
+    _jobs[job.id] = job
+    return job
+
+
+def get_job(job_id: str) -> Optional[BulkReanalysisJob]:
+    return _jobs.get(job_id)
+
+
+def list_jobs() -> List[BulkReanalysisJob]:
+    return sorted(_jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+
+def _select_listings(job: BulkReanalysisJob, supabase) -> List[Dict]:
+    """Load the listings selected for re-analysis."""
+    if job.listing_ids:
+        listings = []
+        for ids in _chunks(job.listing_ids, ID_CHUNK_SIZE):
+            listings.extend(supabase.table("ip_listings").select("*").in_("id", ids).execute().data)
+        return listings[:job.limit]
+
+    query = supabase.table("ip_listings").select("*")
+    if job.status_filter:
+        query = query.eq("status", job.status_filter)
+    if job.genre:
+        query = query.eq("genre", job.genre)
+    return query.order("created_at", desc=True).limit(job.limit).execute().data
+
+
+def _latest_analysis_hashes(listing_ids: List[str], supabase) -> Dict[str, str]:
+    """input_hash of the latest analysis per listing, in a few bulk queries."""
+    latest: Dict[str, str] = {}
+    for ids in _chunks(listing_ids, ID_CHUNK_SIZE):
+        rows = supabase.table("ip_materials").select("listing_id, input_hash, generated_at") \
+            .in_("listing_id", ids).eq("type", "analysis") \
+            .order("generated_at", desc=True).execute().data
+        for row in rows:
+            latest.setdefault(row["listing_id"], row.get("input_hash"))
+    return latest
+
+
+@track_job("bulk_reanalysis")
+async def run_bulk_reanalysis(job: BulkReanalysisJob, supabase, backend: Optional[BatchBackend] = None):
+    """
+    Background task: re-analyze the selected listings through a batch backend.
+
+    1. Select listings and skip the ones whose analysis is already current
+    2. Build one Messages API request per listing and submit them as a batch
+    3. Poll until the batch ends, updating job progress
+    4. Write materials and denormalized ai_* columns back in bulk
+    """
+    backend = backend or get_batch_backend()
+    job._started = time.monotonic()
+
+    try:
+        # 1. Selection
+        job.phase = "preparing"
+        listings = _select_listings(job, supabase)
+        job.total = len(listings)
+
+        hashes = {l["id"]: analysis_input_hash(l) for l in listings}
+        if not job.force:
+            current = _latest_analysis_hashes(list(hashes), supabase)
+            listings = [l for l in listings if current.get(l["id"]) != hashes[l["id"]]]
+        job.skipped = job.total - len(listings)
+
+        if not listings:
+            job.phase = "done"
+            return
+
+        # 2. Build and submit requests (script downloads run with bounded concurrency)
+        semaphore = asyncio.Semaphore(settings.ai_batch_prepare_concurrency)
+
+        async def _build(listing: Dict) -> Dict:
+            async with semaphore:
+                text = await get_analysis_input(listing, supabase)
+            return {
+                "custom_id": listing["id"],
+                "params": anthropic_service.analysis_request_params(text, listing),
+            }
+
+        requests = await asyncio.gather(*(_build(l) for l in listings))
+        job.batch_id = await backend.submit(list(requests))
+        job.submitted = len(requests)
+        job.phase = "processing"
+        logger.info(f"[bulk {job.id}] Submitted {job.submitted} listings as batch {job.batch_id}")
+
+        # 3. Poll for completion
+        while True:
+            counts = await backend.status(job.batch_id)
+            job.processing = counts["processing"]
+            job.succeeded = counts["succeeded"]
+            job.failed = counts["errored"]
+            logger.info(f"[bulk {job.id}] {job.to_dict()['progress']:.0%} complete")
+            if counts["ended"]:
+                break
+            await asyncio.sleep(settings.ai_batch_poll_seconds)
+
+        # 4. Collect and write back in bulk
+        job.phase = "writing"
+        materials: List[Dict] = []
+        updates: List[Dict] = []
+        failed = 0
+        async for result in backend.results(job.batch_id):
+            listing_id = result["custom_id"]
+            if "error" in result:
+                failed += 1
+                logger.warning(f"[bulk {job.id}] {listing_id} failed: {result['error']}")
+                continue
+            try:
+                analysis, repair_usage = await anthropic_service.parse_analysis(result["text"])
+            except StructuredOutputError as e:
+                failed += 1
+                logger.warning(f"[bulk {job.id}] {listing_id} returned invalid analysis: {e}")
+                continue
+            except Exception as e:
+                # A failed repair call costs this listing only; the other results are already paid for
+                failed += 1
+                logger.warning(f"[bulk {job.id}] {listing_id} analysis repair failed: {e}")
+                continue
+            materials.append({
+                "listing_id": listing_id,
+                "type": "analysis",
+                "content": json.dumps(analysis),
+                "input_hash": hashes[listing_id],
+                **(merge_usage(result.get("usage"), repair_usage) or {}),
+            })
+            updates.append({
+                "id": listing_id,
+                "ai_score": analysis.get("commercial_score"),
+                "ai_strengths": analysis.get("strengths", []),
+                "ai_improvements": analysis.get("improvements", []),
+            })
+
+        for chunk in _chunks(materials, WRITE_CHUNK_SIZE):
+            supabase.table("ip_materials").insert(chunk).execute()
+        for chunk in _chunks(updates, WRITE_CHUNK_SIZE):
+            supabase.rpc("apply_analysis_results", {"p_results": chunk}).execute()
+            job.written += len(chunk)
+
+        job.succeeded = len(updates)
+        job.failed = failed
+        job.phase = "done"
+        logger.info(f"[bulk {job.id}] Done: {job.to_dict()}")
+
+    except Exception as e:
+        logger.error(f"[bulk {job.id}] Bulk re-analysis failed: {e}")
+        job.phase = "failed"
+        job.error = str(e)
+    finally:
+        job._finished = time.monotonic()
@@ -0,0 +1,82 @@
+"""
+CMC IP Marketplace - Counter Service
+Denormalized listing counters (view_count, save_count, inquiry_count)
+
+save_count and inquiry_count are maintained atomically by database triggers
+on favorites and inquiries. Views are hot, so they are buffered in memory
+and applied in one RPC per flush. A periodic reconciliation recomputes all
+three from favorites, inquiries and ip_views to repair any drift.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Optional
+from supabase import Client
+
+from app.core.config import settings
+from app.core.tracing import untraced
+
+logger = logging.getLogger(__name__)
+
+
+class CounterService:
+    """Buffers view increments and runs counter maintenance RPCs"""
+
+    def __init__(self, supabase_client: Client):
+        self.client = supabase_client
+        self._pending_views: Counter = Counter()
+        self._pending_total = 0  # sum of _pending_views, kept so record_view stays O(1)
+        self._flush_task: Optional[asyncio.Task] = None
+
+    @property
+    def pending_views(self) -> int:
+        return self._pending_total
+
+    def record_view(self, listing_id: str):
+        """Count one view; written on the next flush (or early once the buffer is full)"""
+        self._pending_views[listing_id] += 1
+        self._pending_total += 1
+        if self._pending_total >= settings.counter_flush_threshold and not (
+            self._flush_task and not self._flush_task.done()
+        ):
+            # The task copies the current context; keep the flush out of this request's trace
+            with untraced():
+                self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self) -> int:
+        """Apply buffered views in a single RPC; returns the number of listings updated"""
+        if not self._pending_views:
+            return 0
+        batch, self._pending_views = self._pending_views, Counter()
+        batch_total, self._pending_total = self._pending_total, 0
+        try:
+            self.client.rpc("apply_view_counts", {
+                "p_counts": [{"id": lid, "n": n} for lid, n in batch.items()],
+            }).execute()
+            return len(batch)
+        except Exception as e:
+            # Keep the views for the next flush rather than dropping them
+            self._pending_views.update(batch)
+            self._pending_total += batch_total
+            logger.warning(f"View count flush failed ({len(batch)} listings): {e}")
+            return 0
+
+    async def reconcile(self) -> int:
+        """Recompute counters from their source tables; returns the number of listings corrected"""
+        result = self.client.rpc("reconcile_listing_counters", {}).execute()
+        corrected = result.data or 0
+        if corrected:
+            logger.info(f"Counter reconciliation corrected {corrected} listings")
+        return corrected
+
+
+# Singleton instance
+_counter_service: Optional[CounterService] = None
+
+def get_counter_service(supabase_client: Client) -> CounterService:
+    """Get or create counter service instance"""
+    global _counter_service
+    if _counter_service is None:
+        _counter_service = CounterService(supabase_client)
+    return _counter_service
@@ -0,0 +1,810 @@
+"""
+CMC IP Marketplace - In-memory Supabase Stand-in
+Local backend for benchmarks and load tests (settings.supabase_backend = "memory")
+
+Implements the subset of supabase-py the API uses:
+- PostgREST: table/from_, select (columns, many-to-one embeds with !inner,
+  count="exact", head=True), eq/neq/gt/gte/lt/lte/in_/like/ilike/is_/match,
+  or_ (with nested and()/or() and quoted values), text_search, order, limit,
+  range, single, insert, update, delete, rpc
+- Auth: sign_up, sign_in_with_password, get_user, sign_out, update_user,
+  reset_password_email
+- Storage: upload, get_public_url, create_signed_url, remove, list, download,
+  and GET /storage/v1/object/{bucket}/{path} over HTTP (http_transport())
+
+Database triggers the API relies on (slug generation, updated_at, save/inquiry
+counters, the inquiry notification outbox) and the RPC functions in
+schema.sql are reproduced in Python. Every request sleeps for
+settings.fake_supabase_latency_ms (± jitter) so benchmarks pay a modelled
+network round trip; like the real client, the sleep blocks the calling thread.
+"""
+
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from postgrest.exceptions import APIError
+
+# ==========================================
+# Schema (columns and defaults from schema.sql)
+# ==========================================
+
+_LISTING_COLUMNS = (
+    "creator_id title tagline description slug genre format period location world_type themes "
+    "target_audience comparables logline rights_holder rights_holder_contact available_rights "
+    "available_territories script_url script_sha256 synopsis_url poster_url concept_art_urls "
+    "ai_score ai_strengths ai_improvements ai_analysis_started_at ai_materials_started_at ai_last_error ai_next_retry_at"
+).split()
+
+TABLES: Dict[str, Dict[str, Any]] = {
+    "users": {
+        "id": None, "email": None, "role": None, "display_name": None,
+        "bio": None, "avatar_url": None, "company_name": None,
+    },
+    "ip_listings": {
+        **{column: None for column in _LISTING_COLUMNS},
+        "tier": "hidden-gem", "ai_analysis_status": "pending", "ai_materials_status": dict,
+        "ai_retry_count": 0, "status": "draft", "featured": False,
+        "view_count": 0, "save_count": 0, "inquiry_count": 0,
+    },
+    "ip_materials": {
+        "listing_id": None, "type": None, "content": None, "markdown_content": None, "pdf_url": None,
+        "model_used": None, "tokens_used": None, "cost_usd": None, "input_tokens": None,
+        "output_tokens": None, "cache_read_tokens": None, "cache_creation_tokens": None,
+        "latency_ms": None, "input_hash": None,
+    },
+    "inquiries": {
+        "listing_id": None, "buyer_id": None, "message": None, "buyer_contact_email": None,
+        "buyer_contact_phone": None, "buyer_company": None, "status": "new", "creator_notes": None,
+    },
+    "favorites": {"buyer_id": None, "listing_id": None},
+    "ip_views": {"listing_id": None, "viewer_id": None, "source": None},
+    "notification_outbox": {
+        "recipient_id": None, "kind": None, "payload": dict, "status": "pending",
+        "attempts": 0, "last_error": None, "sent_at": None,
+    },
+    "subscriptions": {
+        "user_id": None, "tier": None, "status": "active", "max_ips": 3, "max_ai_analyses": 1,
+    },
+}
+
+# Primary key per table (defaults to a generated "id")
+PRIMARY_KEYS: Dict[str, Tuple[str, ...]] = {
+    "favorites": ("buyer_id", "listing_id"),
+}
+
+# Tables whose rows get created_at / updated_at / generated_at timestamps
+_CREATED_COLUMN = {"ip_materials": "generated_at"}
+_UPDATED_AT_TABLES = {"users", "ip_listings", "inquiries", "subscriptions"}
+
+# Many-to-one relationships available for embedding: (table, embedded) -> (foreign key, referenced column)
+RELATIONSHIPS: Dict[Tuple[str, str], Tuple[str, str]] = {
+    ("ip_listings", "users"): ("creator_id", "id"),
+    ("ip_materials", "ip_listings"): ("listing_id", "id"),
+    ("inquiries", "ip_listings"): ("listing_id", "id"),
+    ("inquiries", "users"): ("buyer_id", "id"),
+    ("favorites", "ip_listings"): ("listing_id", "id"),
+    ("favorites", "users"): ("buyer_id", "id"),
+    ("ip_views", "ip_listings"): ("listing_id", "id"),
+    ("notification_outbox", "users"): ("recipient_id", "id"),
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _api_error(message: str, code: str, details: Optional[str] = None) -> APIError:
+    return APIError({"message": message, "code": code, "details": details, "hint": None})
+
+
+def _copy_row(row: Dict, columns: Optional[List[str]] = None) -> Dict:
+    keys = row.keys() if columns is None else columns
+    return {k: (v.copy() if isinstance(v, (list, dict)) else v) for k, v in ((k, row.get(k)) for k in keys)}
+
+
+# ==========================================
+# Filters
+# ==========================================
+
+def _coerce(value: Any, like: Any) -> Any:
+    """Convert a filter value (often a string from or_()) to the type of the stored value"""
+    if not isinstance(value, str) or isinstance(like, str) or like is None:
+        return value
+    if isinstance(like, bool):
+        return value.lower() == "true"
+    if isinstance(like, (int, float)):
+        try:
+            return type(like)(value) if isinstance(like, int) and value.isdigit() else float(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _compare(stored: Any, op: str, value: Any) -> bool:
+    if op == "is":
+        if value is None or (isinstance(value, str) and value.lower() == "null"):
+            return stored is None
+        return stored is _coerce(value, True)
+    if op == "in":
+        return stored is not None and stored in [_coerce(v, stored) for v in value]
+    if stored is None:
+        return False
+    if op in ("like", "ilike"):
+        # % and * are both wildcards in PostgREST patterns
+        pattern = re.escape(str(value)).replace("%", ".*").replace(r"\*", ".*")
+        flags = re.S | (re.I if op == "ilike" else 0)
+        return re.fullmatch(pattern, str(stored), flags) is not None
+    value = _coerce(value, stored)
+    try:
+        if op == "eq":
+            return stored == value
+        if op == "neq":
+            return stored != value
+        if op == "gt":
+            return stored > value
+        if op == "gte":
+            return stored >= value
+        if op == "lt":
+            return stored < value
+        if op == "lte":
+            return stored <= value
+    except TypeError:
+        return False
+    raise _api_error(f"Unsupported operator {op}", "PGRST100")
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split on commas outside parentheses and double quotes"""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    if current:
+        parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _unquote(value: str) -> str:
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+def _parse_conditions(text: str) -> List[Callable[[Dict], bool]]:
+    """Compile a PostgREST logic expression (the argument of or_()) into row predicates"""
+    predicates = []
+    for part in _split_top_level(text):
+        match = re.fullmatch(r"(and|or)\((.*)\)", part, re.S)
+        if match:
+            inner = _parse_conditions(match.group(2))
+            combine = all if match.group(1) == "and" else any
+            predicates.append(lambda row, ps=inner, f=combine: f(p(row) for p in ps))
+            continue
+        column, op, value = part.split(".", 2)
+        if op == "in":
+            value = [_unquote(v) for v in _split_top_level(value.strip("()"))]
+        else:
+            value = _unquote(value)
+        predicates.append(lambda row, c=column, o=op, v=value: _compare(row.get(c), o, v))
+    return predicates
+
+
+# ==========================================
+# Query builder
+# ==========================================
+
+class FakeResponse:
+    """Same shape as postgrest's APIResponse"""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """Chainable PostgREST request builder over one in-memory table"""
+
+    def __init__(self, db: "FakeDatabase", table: str):
+        self._db = db
+        self._table = table
+        self._action = "select"
+        self._columns = "*"
+        self._payload: Any = None
+        self._count: Optional[str] = None
+        self._head = False
+        self._filters: List[Tuple[Optional[str], Callable[[Dict], bool]]] = []  # (embed, predicate)
+        self._order: List[Tuple[str, bool]] = []
+        self._offset = 0
+        self._limit: Optional[int] = None
+        self._single = False
+
+    # Actions
+
+    def select(self, *columns: str, count: Optional[str] = None, head: bool = False):
+        self._action = "select"
+        self._columns = ",".join(columns) if columns else "*"
+        self._count = count
+        self._head = head
+        return self
+
+    def insert(self, json: Any, **kwargs):
+        self._action, self._payload = "insert", json
+        return self
+
+    def update(self, json: Dict, **kwargs):
+        self._action, self._payload = "update", json
+        return self
+
+    def delete(self, **kwargs):
+        self._action = "delete"
+        return self
+
+    # Filters
+
+    def _filter(self, column: str, op: str, value: Any):
+        embed, _, name = column.rpartition(".")
+        self._filters.append((embed or None, lambda row: _compare(row.get(name), op, value)))
+        return self
+
+    def eq(self, column: str, value: Any):
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any):
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any):
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any):
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any):
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any):
+        return self._filter(column, "lte", value)
+
+    def like(self, column: str, pattern: str):
+        return self._filter(column, "like", pattern)
+
+    def ilike(self, column: str, pattern: str):
+        return self._filter(column, "ilike", pattern)
+
+    def is_(self, column: str, value: Any):
+        return self._filter(column, "is", value)
+
+    def in_(self, column: str, values: List[Any]):
+        return self._filter(column, "in", list(values))
+
+    def match(self, query: Dict[str, Any]):
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    def or_(self, filters: str, reference_table: Optional[str] = None):
+        predicates = _parse_conditions(filters)
+        self._filters.append((reference_table, lambda row: any(p(row) for p in predicates)))
+        return self
+
+    def text_search(self, column: str, query: str, options: Optional[Dict] = None):
+        columns = [c.strip() for c in column.split(",")]
+        terms = [t.lower() for t in re.findall(r"\w+", query)]
+        self._filters.append((None, lambda row: all(
+            any(term in str(row.get(c) or "").lower() for c in columns) for term in terms
+        )))
+        return self
+
+    # Modifiers
+
+    def order(self, column: str, desc: bool = False, **kwargs):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int, **kwargs):
+        self._limit = size
+        return self
+
+    def offset(self, size: int):
+        self._offset = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs):
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    def execute(self) -> FakeResponse:
+        self._db.simulate_latency()
+        with self._db.lock:
+            if self._action == "insert":
+                rows = self._db.insert(self._table, self._payload)
+            elif self._action == "update":
+                rows = self._db.update(self._table, self._payload, self._matching())
+            elif self._action == "delete":
+                rows = self._db.delete(self._table, self._matching())
+            else:
+                return self._select()
+        return FakeResponse([_copy_row(row) for row in rows])
+
+    # Internals
+
+    def _matching(self) -> List[Dict]:
+        base_filters = [p for embed, p in self._filters if embed is None]
+        return [row for row in self._db.rows(self._table) if all(p(row) for p in base_filters)]
+
+    def _select(self) -> FakeResponse:
+        columns, embeds = self._parse_columns()
+        rows = []
+        for row in self._matching():
+            out = _copy_row(row, columns)
+            keep = True
+            for name, (inner, sub_columns) in embeds.items():
+                related = self._db.related(self._table, name, row)
+                if related is not None and not all(p(related) for e, p in self._filters if e == name):
+                    related = None
+                if related is None and inner:
+                    keep = False
+                    break
+                out[name] = _copy_row(related, sub_columns) if related is not None else None
+            if keep:
+                rows.append((row, out))
+
+        for column, desc in reversed(self._order):
+            # Postgres default: NULLs sort last ascending, first descending
+            present = [r for r in rows if r[0].get(column) is not None]
+            missing = [r for r in rows if r[0].get(column) is None]
+            present.sort(key=lambda r: r[0][column], reverse=desc)
+            rows = missing + present if desc else present + missing
+
+        total = len(rows)
+        rows = rows[self._offset:]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        data = [] if self._head else [out for _, out in rows]
+        count = total if self._count else None
+
+        if self._single:
+            if len(data) != 1:
+                raise _api_error(
+                    "JSON object requested, multiple (or no) rows returned",
+                    "PGRST116",
+                    f"The result contains {len(data)} rows",
+                )
+            return FakeResponse(data[0], count)
+        return FakeResponse(data, count)
+
+    def _parse_columns(self) -> Tuple[Optional[List[str]], Dict[str, Tuple[bool, Optional[List[str]]]]]:
+        """Split a select string into plain columns (None = all) and embeds {name: (inner, columns)}"""
+        columns: List[str] = []
+        star = False
+        embeds = {}
+        for part in _split_top_level(self._columns):
+            match = re.fullmatch(r"(\w+)(!inner)?\((.*)\)", part, re.S)
+            if match:
+                sub = [c.strip() for c in _split_top_level(match.group(3))]
+                embeds[match.group(1)] = (bool(match.group(2)), None if "*" in sub else sub)
+            elif part == "*":
+                star = True
+            else:
+                columns.append(part)
+        return (None if star else columns), embeds
+
+
+class FakeRPC:
+    """Builder returned by rpc(); only execute() is supported"""
+
+    def __init__(self, db: "FakeDatabase", fn: str, params: Dict):
+        self._db = db
+        self._fn = fn
+        self._params = params
+
+    def execute(self) -> FakeResponse:
+        self._db.simulate_latency()
+        handler = getattr(self._db, f"rpc_{self._fn}", None)
+        if handler is None:
+            raise _api_error(f"Could not find the function public.{self._fn}", "PGRST202")
+        with self._db.lock:
+            return FakeResponse(handler(**self._params))
+
+
+# ==========================================
+# Database
+# ==========================================
+
+class FakeDatabase:
+    """Tables, triggers and RPC functions"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.lock = threading.RLock()
+        self.tables: Dict[str, Dict[Any, Dict]] = {name: {} for name in TABLES}
+        self.buckets: Dict[str, Tuple[float, float]] = {}  # rate_limit_buckets
+
+    def simulate_latency(self):
+        if self.latency_ms <= 0:
+            return
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        time.sleep(max(0.0, delay) / 1000)
+
+    def rows(self, table: str) -> List[Dict]:
+        return list(self.tables.setdefault(table, {}).values())
+
+    def related(self, table: str, embedded: str, row: Dict) -> Optional[Dict]:
+        relationship = RELATIONSHIPS.get((table, embedded))
+        if relationship is None:
+            raise _api_error(
+                f"Could not find a relationship between '{table}' and '{embedded}'", "PGRST200"
+            )
+        foreign_key, referenced = relationship
+        value = row.get(foreign_key)
+        if referenced == "id":
+            return self.tables[embedded].get(value)
+        return next((r for r in self.tables[embedded].values() if r.get(referenced) == value), None)
+
+    def _key(self, table: str, row: Dict) -> Any:
+        columns = PRIMARY_KEYS.get(table, ("id",))
+        return row.get(columns[0]) if len(columns) == 1 else tuple(row.get(c) for c in columns)
+
+    # Writes
+
+    def insert(self, table: str, payload: Any) -> List[Dict]:
+        store = self.tables.setdefault(table, {})
+        inserted = []
+        for values in payload if isinstance(payload, list) else [payload]:
+            row = {
+                column: default() if callable(default) else default
+                for column, default in TABLES.get(table, {}).items()
+            }
+            row.update(values)
+            if table not in PRIMARY_KEYS:
+                row["id"] = row.get("id") or str(uuid.uuid4())
+            now = _now()
+            row.setdefault(_CREATED_COLUMN.get(table, "created_at"), now)
+            if table in _UPDATED_AT_TABLES:
+                row.setdefault("updated_at", now)
+            self._before_write(table, row)
+
+            key = self._key(table, row)
+            if key in store:
+                raise _api_error(
+                    f'duplicate key value violates unique constraint "{table}_pkey"', "23505"
+                )
+            if table == "users" and any(u["email"] == row["email"] for u in store.values()):
+                raise _api_error('duplicate key value violates unique constraint "users_email_key"', "23505")
+            store[key] = row
+            self._after_insert(table, row)
+            inserted.append(row)
+        return inserted
+
+    def update(self, table: str, values: Dict, rows: List[Dict]) -> List[Dict]:
+        for row in rows:
+            row.update(values)
+            if table in _UPDATED_AT_TABLES:
+                row["updated_at"] = _now()
+            self._before_write(table, row)
+        return rows
+
+    def delete(self, table: str, rows: List[Dict]) -> List[Dict]:
+        store = self.tables[table]
+        for row in rows:
+            store.pop(self._key(table, row), None)
+            self._after_delete(table, row)
+        return rows
+
+    # Triggers
+
+    def _before_write(self, table: str, row: Dict):
+        if table == "ip_listings" and not row.get("slug"):
+            row["slug"] = re.sub(r"[^a-zA-Z0-9]+", "-", row.get("title") or "").strip("-").lower()
+
+    def _bump(self, listing_id: Any, column: str, delta: int):
+        listing = self.tables["ip_listings"].get(listing_id)
+        if listing is not None:
+            listing[column] = max(0, (listing.get(column) or 0) + delta)
+
+    def _after_insert(self, table: str, row: Dict):
+        if table == "favorites":
+            self._bump(row["listing_id"], "save_count", 1)
+        elif table == "inquiries":
+            self._bump(row["listing_id"], "inquiry_count", 1)
+            listing = self.tables["ip_listings"].get(row["listing_id"])
+            if listing and listing.get("creator_id"):
+                buyer = self.tables["users"].get(row.get("buyer_id")) or {}
+                self.insert("notification_outbox", {
+                    "recipient_id": listing["creator_id"],
+                    "kind": "inquiry",
+                    "payload": {
+                        "inquiry_id": row["id"],
+                        "listing_id": row["listing_id"],
+                        "listing_title": listing.get("title"),
+                        "buyer_name": buyer.get("display_name"),
+                        "buyer_contact_email": row.get("buyer_contact_email"),
+                        "message": (row.get("message") or "")[:500],
+                    },
+                    "next_attempt_at": _now(),
+                })
+
+    def _after_delete(self, table: str, row: Dict):
+        if table == "favorites":
+            self._bump(row["listing_id"], "save_count", -1)
+        elif table == "inquiries":
+            self._bump(row["listing_id"], "inquiry_count", -1)
+
+    # RPC functions (see schema.sql)
+
+    def rpc_set_favorite(self, p_buyer_id: str, p_listing_id: str, p_saved: bool):
+        listing = self.tables["ip_listings"].get(p_listing_id)
+        if p_saved:
+            if listing is None or listing.get("status") != "published":
+                return {"found": False}
+            if (p_buyer_id, p_listing_id) not in self.tables["favorites"]:
+                self.insert("favorites", {"buyer_id": p_buyer_id, "listing_id": p_listing_id})
+        else:
+            favorite = self.tables["favorites"].get((p_buyer_id, p_listing_id))
+            if favorite:
+                self.delete("favorites", [favorite])
+        if listing is None:
+            return {"found": False}
+        return {"found": True, "saved": p_saved, "save_count": listing["save_count"]}
+
+    def rpc_apply_view_counts(self, p_counts: List[Dict]):
+        updated = 0
+        for entry in p_counts:
+            listing = self.tables["ip_listings"].get(entry["id"])
+            if listing is None:
+                continue
+            for _ in range(entry["n"]):
+                self.insert("ip_views", {"listing_id": entry["id"], "source": "api"})
+            listing["view_count"] = (listing.get("view_count") or 0) + entry["n"]
+            updated += 1
+        return updated
+
+    def rpc_reconcile_listing_counters(self):
+        saves: Dict[Any, int] = {}
+        inquiries: Dict[Any, int] = {}
+        views: Dict[Any, int] = {}
+        for counts, table in ((saves, "favorites"), (inquiries, "inquiries"), (views, "ip_views")):
+            for row in self.tables[table].values():
+                counts[row["listing_id"]] = counts.get(row["listing_id"], 0) + 1
+        corrected = 0
+        for listing_id, listing in self.tables["ip_listings"].items():
+            actual = (saves.get(listing_id, 0), inquiries.get(listing_id, 0), views.get(listing_id, 0))
+            if (listing["save_count"], listing["inquiry_count"]) != actual[:2] or listing["view_count"] < actual[2]:
+                listing["save_count"], listing["inquiry_count"] = actual[:2]
+                listing["view_count"] = max(listing["view_count"], actual[2])
+                corrected += 1
+        return corrected
+
+    def rpc_apply_analysis_results(self, p_results: List[Dict]):
+        updated = 0
+        for result in p_results:
+            listing = self.tables["ip_listings"].get(result["id"])
+            if listing is None:
+                continue
+            listing.update({
+                "ai_analysis_status": "ready",
+                "ai_score": result.get("ai_score"),
+                "ai_strengths": result.get("ai_strengths"),
+                "ai_improvements": result.get("ai_improvements"),
+                "ai_retry_count": 0,
+                "ai_last_error": None,
+                "ai_next_retry_at": None,
+            })
+            updated += 1
+        return updated
+
+    def rpc_claim_notifications(self, p_limit: int, p_stale_seconds: int = 600):
+        now = _now()
+        due = sorted(
+            (r for r in self.tables["notification_outbox"].values()
+             if r["status"] in ("pending", "sending") and r["next_attempt_at"] <= now),
+            key=lambda r: r["next_attempt_at"],
+        )[:p_limit]
+        retry_at = (datetime.now(timezone.utc) + timedelta(seconds=p_stale_seconds)).isoformat()
+        for row in due:
+            row.update({"status": "sending", "attempts": row["attempts"] + 1, "next_attempt_at": retry_at})
+        return [_copy_row(row) for row in due]
+
+    def rpc_rate_limit_consume(self, p_key: str, p_cost: float, p_capacity: float, p_refill_per_sec: float):
+        now = time.monotonic()
+        tokens, updated_at = self.buckets.get(p_key, (p_capacity, now))
+        tokens = min(p_capacity, tokens + (now - updated_at) * p_refill_per_sec)
+        allowed = tokens >= p_cost
+        if allowed:
+            tokens -= p_cost
+        self.buckets[p_key] = (tokens, now)
+        return {"allowed": allowed, "tokens": tokens}
+
+    def rpc_rate_limit_refund(self, p_key: str, p_cost: float, p_capacity: float):
+        if p_key in self.buckets:
+            tokens, updated_at = self.buckets[p_key]
+            self.buckets[p_key] = (min(p_capacity, tokens + p_cost), updated_at)
+
+    def rpc_admin_platform_stats(self):
+        def group(table: str, column: str) -> Dict[str, int]:
+            counts: Dict[str, int] = {}
+            for row in self.tables[table].values():
+                counts[row[column]] = counts.get(row[column], 0) + 1
+            return counts
+
+        return {
+            "listings": group("ip_listings", "status"),
+            "total_listings": len(self.tables["ip_listings"]),
+            "users": group("users", "role"),
+            "total_users": len(self.tables["users"]),
+            "total_inquiries": len(self.tables["inquiries"]),
+        }
+
+    def rpc_ai_usage_report(self, **kwargs):
+        return []
+
+
+# ==========================================
+# Auth and Storage
+# ==========================================
+
+class FakeAuth:
+    """GoTrue stand-in: opaque tokens mapped to user ids"""
+
+    def __init__(self, db: FakeDatabase):
+        self._db = db
+        self._accounts: Dict[str, Tuple[str, str]] = {}  # email -> (user id, password)
+        self._tokens: Dict[str, str] = {}  # access token -> user id
+
+    def issue_token(self, user_id: str) -> str:
+        """Create an access token for a user (for seeding benchmarks)"""
+        token = f"fake-{uuid.uuid4().hex}"
+        self._tokens[token] = user_id
+        return token
+
+    def _response(self, user_id: str, email: str, token: Optional[str] = None):
+        user = SimpleNamespace(id=user_id, email=email)
+        session = SimpleNamespace(access_token=token, refresh_token=None) if token else None
+        return SimpleNamespace(user=user, session=session)
+
+    def sign_up(self, credentials: Dict):
+        self._db.simulate_latency()
+        email = credentials["email"]
+        if email in self._accounts:
+            raise Exception("User already registered")
+        user_id = str(uuid.uuid4())
+        self._accounts[email] = (user_id, credentials["password"])
+        return self._response(user_id, email, self.issue_token(user_id))
+
+    def sign_in_with_password(self, credentials: Dict):
+        self._db.simulate_latency()
+        account = self._accounts.get(credentials["email"])
+        if account is None or account[1] != credentials["password"]:
+            raise Exception("Invalid login credentials")
+        return self._response(account[0], credentials["email"], self.issue_token(account[0]))
+
+    def register(self, user_id: str, email: str, password: str):
+        """Add an account for a seeded users row"""
+        self._accounts[email] = (user_id, password)
+
+    def get_user(self, jwt: Optional[str] = None):
+        self._db.simulate_latency()
+        user_id = self._tokens.get(jwt)
+        if user_id is None:
+            raise Exception("Invalid JWT")
+        email = next((e for e, (uid, _) in self._accounts.items() if uid == user_id), None)
+        return self._response(user_id, email)
+
+    def sign_out(self, *args, **kwargs):
+        return None
+
+    def update_user(self, attributes: Dict, *args, **kwargs):
+        return None
+
+    def reset_password_email(self, email: str, *args, **kwargs):
+        return None
+
+
+class FakeBucket:
+    def __init__(self, storage: "FakeStorage", bucket: str):
+        self._storage = storage
+        self._bucket = bucket
+        self._files = storage.files.setdefault(bucket, {})
+
+    def upload(self, path: str, file: Any, file_options: Optional[Dict] = None):
+        self._storage.db.simulate_latency()
+        upsert = str((file_options or {}).get("upsert", "false")).lower() == "true"
+        if path in self._files and not upsert:
+            raise _api_error("The resource already exists", "409")
+        data = file if isinstance(file, (bytes, bytearray)) else file.read()
+        self._files[path] = bytes(data)
+        return SimpleNamespace(path=path, full_path=f"{self._bucket}/{path}")
+
+    def download(self, path: str) -> bytes:
+        self._storage.db.simulate_latency()
+        if path not in self._files:
+            raise _api_error("Object not found", "404")
+        return self._files[path]
+
+    def get_public_url(self, path: str) -> str:
+        return f"{self._storage.base_url}/storage/v1/object/public/{self._bucket}/{path}"
+
+    def create_signed_url(self, path: str, expires_in: int, options: Optional[Dict] = None) -> Dict:
+        self._storage.db.simulate_latency()
+        url = f"{self._storage.base_url}/storage/v1/object/sign/{self._bucket}/{path}?token={uuid.uuid4().hex}"
+        return {"signedURL": url, "signedUrl": url}
+
+    def remove(self, paths: List[str]) -> List[Dict]:
+        self._storage.db.simulate_latency()
+        return [{"name": p} for p in paths if self._files.pop(p, None) is not None]
+
+    def list(self, path: Optional[str] = None, options: Optional[Dict] = None) -> List[Dict]:
+        self._storage.db.simulate_latency()
+        prefix = path or ""
+        return [{"name": p[len(prefix):]} for p in self._files if p.startswith(prefix)]
+
+
+class FakeStorage:
+    def __init__(self, db: FakeDatabase, base_url: str):
+        self.db = db
+        self.base_url = base_url.rstrip("/")
+        self.files: Dict[str, Dict[str, bytes]] = {}
+
+    def from_(self, bucket: str) -> FakeBucket:
+        return FakeBucket(self, bucket)
+
+    def http_transport(self) -> httpx.MockTransport:
+        """Serves authenticated object downloads, as the Storage REST API does"""
+        prefix = "/storage/v1/object/"
+
+        def handle(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if request.method != "GET" or not path.startswith(prefix):
+                return httpx.Response(404, json={"error": "not_found"})
+            bucket, _, name = path[len(prefix):].partition("/")
+            self.db.simulate_latency()
+            data = self.files.get(bucket, {}).get(name)
+            if data is None:
+                return httpx.Response(404, json={"error": "not_found", "message": "Object not found"})
+            return httpx.Response(200, content=data)
+
+        return httpx.MockTransport(handle)
+
+
+# ==========================================
+# Client
+# ==========================================
+
+class FakeSupabaseClient:
+    """Drop-in for supabase.Client backed by FakeDatabase"""
+
+    def __init__(self, base_url: str = "http://localhost:54321", latency_ms: float = 0.0, jitter_ms: float = 0.0):
+        self.db = FakeDatabase(latency_ms, jitter_ms)
+        self.auth = FakeAuth(self.db)
+        self.storage = FakeStorage(self.db, base_url)
+
+    def table(self, table_name: str) -> FakeQuery:
+        return FakeQuery(self.db, table_name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[Dict] = None, *args, **kwargs) -> FakeRPC:
+        return FakeRPC(self.db, fn, params or {})
+
+    def seed(self, table: str, rows: List[Dict]) -> List[Dict]:
+        """Insert rows without latency (triggers still run)"""
+        with self.db.lock:
+            return self.db.insert(table, rows)
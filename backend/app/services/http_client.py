@@ -0,0 +1,43 @@
+"""
+CMC IP Marketplace - Shared HTTP Client
+One pooled httpx.AsyncClient for outbound downloads, so connections and
+TLS sessions are reused instead of re-established per request
+"""
+
+from typing import Dict, Optional
+import httpx
+
+_client: Optional[httpx.AsyncClient] = None
+_mounts: Dict[str, httpx.AsyncBaseTransport] = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get or create the shared async HTTP client"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            follow_redirects=True,
+            mounts=dict(_mounts),
+        )
+    return _client
+
+
+def mount_transport(url: str, transport: httpx.AsyncBaseTransport):
+    """
+    Route requests under `url` (e.g. "http://localhost:54321") through `transport`
+
+    Used to serve a backend in-process; call before the shared client is first used.
+    """
+    global _client
+    _mounts[url] = transport
+    _client = None
+
+
+async def close_http_client():
+    """Close the shared client (called on application shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
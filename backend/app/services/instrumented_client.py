@@ -0,0 +1,117 @@
+"""
+CMC IP Marketplace - Instrumented Supabase Client
+Transparent proxy that times every PostgREST, Storage and Auth call
+"""
+
+from typing import Any
+
+from app.core.metrics import observe_upstream
+
+# Query-builder methods that determine the operation label
+_OPERATIONS = {"select", "insert", "update", "delete", "upsert"}
+
+
+class _QueryProxy:
+    """Wraps a PostgREST request builder; execute() is timed, chaining is preserved."""
+
+    __slots__ = ("_builder", "_service", "_target", "_operation")
+
+    def __init__(self, builder: Any, service: str, target: str, operation: str):
+        self._builder = builder
+        self._service = service
+        self._target = target
+        self._operation = operation
+
+    def execute(self):
+        with observe_upstream(self._service, self._target, self._operation):
+            return self._builder.execute()
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            # Properties such as not_ return the builder itself
+            if hasattr(attr, "execute"):
+                return _QueryProxy(attr, self._service, self._target, self._operation)
+            return attr
+        operation = name if name in _OPERATIONS else self._operation
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                return _QueryProxy(result, self._service, self._target, operation)
+            return result
+
+        return chained
+
+
+class _CallProxy:
+    """Wraps a client (storage bucket, auth) so each method call is timed."""
+
+    __slots__ = ("_target_obj", "_service", "_target")
+
+    def __init__(self, target_obj: Any, service: str, target: str):
+        self._target_obj = target_obj
+        self._service = service
+        self._target = target
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._target_obj, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def timed(*args, **kwargs):
+            with observe_upstream(self._service, self._target, name):
+                return attr(*args, **kwargs)
+
+        return timed
+
+
+class _StorageProxy:
+    __slots__ = ("_storage",)
+
+    def __init__(self, storage: Any):
+        self._storage = storage
+
+    def from_(self, bucket: str):
+        return _CallProxy(self._storage.from_(bucket), "storage", bucket)
+
+    def __getattr__(self, name: str):
+        return getattr(self._storage, name)
+
+
+class InstrumentedClient:
+    """
+    Drop-in wrapper for supabase.Client.
+
+    table()/from_() and rpc() return proxied query builders, storage.from_()
+    and auth return proxies whose calls are timed; everything else is passed
+    through untouched.
+    """
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    @property
+    def raw(self):
+        """The underlying supabase client"""
+        return self._client
+
+    def table(self, table_name: str):
+        return _QueryProxy(self._client.table(table_name), "supabase", table_name, "select")
+
+    from_ = table
+
+    def rpc(self, fn: str, params: dict = None, *args, **kwargs):
+        builder = self._client.rpc(fn, params if params is not None else {}, *args, **kwargs)
+        return _QueryProxy(builder, "supabase", fn, "rpc")
+
+    @property
+    def storage(self):
+        return _StorageProxy(self._client.storage)
+
+    @property
+    def auth(self):
+        return _CallProxy(self._client.auth, "auth", "gotrue")
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
@@ -0,0 +1,137 @@
+"""
+CMC IP Marketplace - Materials Service
+Persistence and memoization of AI-generated IP materials (ip_materials table)
+"""
+
+import hashlib
+import json
+from typing import Dict, Optional, Any
+from supabase import Client
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Listing fields that feed the analysis / one-pager prompts.
+# Changing any of them invalidates memoized materials.
+MEMO_LISTING_FIELDS = [
+    "title",
+    "tagline",
+    "genre",
+    "format",
+    "logline",
+    "description",
+    "period",
+    "location",
+    "world_type",
+    "themes",
+    "target_audience",
+    "comparables",
+]
+
+
+def _normalize(value: Any) -> Any:
+    """Normalize a listing field so cosmetic differences don't bust the cache"""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value if v not in (None, "")]
+    return value
+
+
+def compute_input_hash(
+    prompt_version: str,
+    model: str,
+    listing: Dict,
+    script_hash: Optional[str] = None,
+    extra: Optional[Dict] = None,
+) -> str:
+    """
+    Hash everything that determines an AI output.
+
+    Args:
+        prompt_version: Version tag of the prompt template
+        model: Claude model identifier
+        listing: IP listing row
+        script_hash: SHA-256 of the script content (if any)
+        extra: Additional inputs (e.g. hash of the analysis a one-pager is based on)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    payload = {
+        "prompt_version": prompt_version,
+        "model": model,
+        "listing": {field: _normalize(listing.get(field)) for field in MEMO_LISTING_FIELDS},
+        "script": script_hash or listing.get("script_sha256") or listing.get("script_url") or "",
+        "extra": extra or {},
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def content_hash(content: Any) -> str:
+    """SHA-256 of a material's stored content"""
+    if not isinstance(content, str):
+        content = json.dumps(content, sort_keys=True)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class MaterialsService:
+    """Read/write helpers for ip_materials"""
+
+    def __init__(self, supabase_client: Client):
+        self.client = supabase_client
+
+    def get_latest(self, listing_id: str, material_type: str, columns: str = "*") -> Optional[Dict]:
+        """Get the most recent material of a type for a listing"""
+        result = self.client.table("ip_materials").select(columns).eq(
+            "listing_id", listing_id
+        ).eq("type", material_type).order("generated_at", desc=True).limit(1).execute()
+        return result.data[0] if result.data else None
+
+    def get_memoized(self, listing_id: str, material_type: str, input_hash: str) -> Optional[Dict]:
+        """
+        Return the latest material if it was generated from identical inputs.
+
+        Only the latest row is considered, so an older result never shadows
+        a newer one that the listing's denormalized ai_* fields reflect.
+        """
+        latest = self.get_latest(listing_id, material_type)
+        if latest and latest.get("input_hash") == input_hash:
+            return latest
+        return None
+
+    def save(
+        self,
+        listing_id: str,
+        material_type: str,
+        content: str,
+        input_hash: Optional[str] = None,
+        usage: Optional[Dict] = None,
+    ) -> Dict:
+        """Insert a generated material with its token/cost accounting"""
+        data = {
+            "listing_id": listing_id,
+            "type": material_type,
+            "content": content,
+        }
+        if input_hash:
+            data["input_hash"] = input_hash
+        if usage:
+            data.update(usage)
+        result = self.client.table("ip_materials").insert(data).execute()
+        return result.data[0] if result.data else data
+
+
+# Singleton instance
+_materials_service: Optional[MaterialsService] = None
+
+def get_materials_service(supabase_client: Client) -> MaterialsService:
+    """Get or create materials service instance"""
+    global _materials_service
+    if _materials_service is None:
+        _materials_service = MaterialsService(supabase_client)
+    return _materials_service
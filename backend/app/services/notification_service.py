@@ -0,0 +1,213 @@
+"""
+CMC IP Marketplace - Notification Service
+Delivers queued notifications from notification_outbox as per-recipient digests
+
+Rows are written by database triggers (e.g. on inquiries INSERT), so the
+request path never waits on email or webhook delivery. The dispatcher runs
+on the scheduler: it claims due rows, groups them per recipient, sends one
+digest each and records success, retry (with backoff) or permanent failure.
+"""
+
+import asyncio
+import logging
+import smtplib
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from typing import Dict, List, Optional
+from supabase import Client
+
+from app.core.config import settings
+from app.services.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================
+# Senders
+# ==========================================
+
+def _digest_subject(notifications: List[Dict]) -> str:
+    if len(notifications) == 1:
+        return f"New inquiry on \"{notifications[0]['payload'].get('listing_title', 'your listing')}\""
+    return f"{len(notifications)} new inquiries on your listings"
+
+
+def _digest_body(recipient: Dict, notifications: List[Dict]) -> str:
+    lines = [f"Hi {recipient.get('display_name') or 'there'},", ""]
+    for n in notifications:
+        p = n["payload"]
+        buyer = p.get("buyer_name") or p.get("buyer_contact_email", "A buyer")
+        lines.append(f"- {buyer} about \"{p.get('listing_title', '')}\":")
+        lines.append(f"  {p.get('message', '')}")
+        lines.append("")
+    lines.append(f"Reply from your inbox on {settings.app_name}.")
+    return "\n".join(lines)
+
+
+class NotificationSender(ABC):
+    """Delivers one digest to one recipient; raises on failure"""
+
+    @abstractmethod
+    async def send(self, recipient: Dict, notifications: List[Dict]):
+        ...
+
+
+class LogSender(NotificationSender):
+    """Logs digests instead of delivering them (development default)"""
+
+    async def send(self, recipient: Dict, notifications: List[Dict]):
+        logger.info(f"[notify] {recipient.get('email')}: {_digest_subject(notifications)}")
+
+
+class SMTPSender(NotificationSender):
+    """Email digests over SMTP (a local debugging server works for tests)"""
+
+    def _send_sync(self, message: EmailMessage):
+        with smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=30) as smtp:
+            if settings.smtp_use_tls:
+                smtp.starttls()
+            if settings.smtp_username:
+                smtp.login(settings.smtp_username, settings.smtp_password)
+            smtp.send_message(message)
+
+    async def send(self, recipient: Dict, notifications: List[Dict]):
+        message = EmailMessage()
+        message["From"] = settings.smtp_from
+        message["To"] = recipient["email"]
+        message["Subject"] = _digest_subject(notifications)
+        message.set_content(_digest_body(recipient, notifications))
+        await asyncio.to_thread(self._send_sync, message)
+
+
+class WebhookSender(NotificationSender):
+    """POST digests as JSON to settings.notification_webhook_url"""
+
+    async def send(self, recipient: Dict, notifications: List[Dict]):
+        response = await get_http_client().post(settings.notification_webhook_url, json={
+            "recipient_id": recipient["id"],
+            "email": recipient.get("email"),
+            "subject": _digest_subject(notifications),
+            "notifications": [{"id": n["id"], "kind": n["kind"], **n["payload"]} for n in notifications],
+        })
+        response.raise_for_status()
+
+
+def get_notification_sender() -> NotificationSender:
+    """Sender selected by settings.notification_backend"""
+    if settings.notification_backend == "smtp":
+        return SMTPSender()
+    if settings.notification_backend == "webhook":
+        return WebhookSender()
+    return LogSender()
+
+
+# ==========================================
+# Dispatcher
+# ==========================================
+
+class NotificationDispatcher:
+    """Claims due outbox rows and delivers them as per-recipient digests"""
+
+    def __init__(self, supabase_client: Client, sender: Optional[NotificationSender] = None):
+        self.client = supabase_client
+        self.sender = sender or get_notification_sender()
+        self._last_sent: Dict[str, datetime] = {}
+
+    def _update(self, ids: List[str], changes: Dict):
+        if ids:
+            self.client.table("notification_outbox").update(changes).in_("id", ids).execute()
+
+    def _defer(self, rows: List[Dict], until: datetime):
+        """Put rows back without counting the claim as a delivery attempt."""
+        by_attempts = defaultdict(list)
+        for row in rows:
+            by_attempts[row["attempts"]].append(row["id"])
+        for attempts, ids in by_attempts.items():
+            self._update(ids, {
+                "status": "pending",
+                "attempts": attempts - 1,
+                "next_attempt_at": until.isoformat(),
+            })
+
+    def _retry_delay(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(settings.notification_retry_base_seconds * (2 ** (attempts - 1)), 3600))
+
+    async def _deliver(self, recipient: Dict, rows: List[Dict]) -> bool:
+        ids = [r["id"] for r in rows]
+        now = datetime.now(timezone.utc)
+        try:
+            await self.sender.send(recipient, rows)
+        except Exception as e:
+            logger.warning(f"[notify] Delivery to {recipient['id']} failed: {e}")
+            attempts = max(r["attempts"] for r in rows)
+            if attempts >= settings.notification_max_attempts:
+                self._update(ids, {"status": "failed", "last_error": str(e)[:1000]})
+            else:
+                self._update(ids, {
+                    "status": "pending",
+                    "last_error": str(e)[:1000],
+                    "next_attempt_at": (now + self._retry_delay(attempts)).isoformat(),
+                })
+            return False
+
+        self._last_sent[recipient["id"]] = now
+        self._update(ids, {"status": "sent", "sent_at": now.isoformat(), "last_error": None})
+        return True
+
+    async def dispatch(self) -> Dict[str, int]:
+        """One dispatcher tick; returns counts of digests sent, failed and deferred"""
+        rows = self.client.rpc("claim_notifications", {
+            "p_limit": settings.notification_batch_size,
+        }).execute().data or []
+        if not rows:
+            return {"sent": 0, "failed": 0, "deferred": 0}
+
+        by_recipient: Dict[str, List[Dict]] = defaultdict(list)
+        for row in rows:
+            by_recipient[row["recipient_id"]].append(row)
+
+        recipients = {
+            u["id"]: u for u in self.client.table("users").select("id, email, display_name")
+            .in_("id", list(by_recipient)).execute().data
+        }
+
+        # Per-recipient rate limit: at most one digest per interval, the rest wait
+        now = datetime.now(timezone.utc)
+        interval = timedelta(seconds=settings.notification_min_interval_seconds)
+        self._last_sent = {k: t for k, t in self._last_sent.items() if now - t < interval}
+        ready, deferred = [], 0
+        for recipient_id, items in by_recipient.items():
+            if recipient_id not in recipients:
+                self._update([r["id"] for r in items], {"status": "failed", "last_error": "Recipient not found"})
+                continue
+            last = self._last_sent.get(recipient_id)
+            if last and now - last < interval:
+                self._defer(items, last + interval)
+                deferred += 1
+                continue
+            ready.append((recipients[recipient_id], items))
+
+        slots = asyncio.Semaphore(settings.notification_concurrency)
+
+        async def _one(recipient: Dict, items: List[Dict]) -> bool:
+            async with slots:
+                return await self._deliver(recipient, items)
+
+        results = await asyncio.gather(*(_one(r, items) for r, items in ready))
+        sent = sum(1 for ok in results if ok)
+        if results or deferred:
+            logger.info(f"[notify] {sent} digests sent, {len(results) - sent} failed, {deferred} deferred")
+        return {"sent": sent, "failed": len(results) - sent, "deferred": deferred}
+
+
+# Singleton instance
+_dispatcher: Optional[NotificationDispatcher] = None
+
+def get_notification_dispatcher(supabase_client: Client) -> NotificationDispatcher:
+    """Get or create notification dispatcher instance"""
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = NotificationDispatcher(supabase_client)
+    return _dispatcher
@@ -4,9 +4,15 @@ Handles file uploads, downloads, and signed URLs for IP materials
 """
 from typing import Optional, BinaryIO
 import os
+import tempfile
 from datetime import timedelta
 from supabase import Client
 from app.core.config import settings
+from app.core.metrics import observe_upstream
+from app.services.http_client import get_http_client
+
+# Downloads larger than this spill from memory to a temp file on disk
+SPOOL_MEMORY_BYTES = 1024 * 1024
 
 class StorageService:
     def __init__(self, supabase_client: Client):
@@ -99,6 +105,58 @@ class StorageService:
         except Exception as e:
             raise Exception(f"File deletion failed: {str(e)}")
 
+    def path_from_url(self, file_url: str) -> str:
+        """
+        Extract the storage path from a public or signed file URL
+
+        URL format: https://{project}.supabase.co/storage/v1/object/public/{bucket}/{path}
+        """
+        return file_url.split(f"{self.bucket_name}/", 1)[-1].split("?", 1)[0]
+
+    async def download_to_spool(self, path: str, max_bytes: int) -> tempfile.SpooledTemporaryFile:
+        """
+        Stream a file from storage into a size-capped spooled temp file
+
+        Reads by path with the service key (no public URL round trip) over the
+        shared pooled HTTP client. Files above SPOOL_MEMORY_BYTES are spilled
+        to disk, so memory use does not grow with file size.
+
+        Args:
+            path: File path in storage
+            max_bytes: Abort if the file is larger than this
+
+        Returns:
+            Spooled temp file positioned at the start (caller closes it)
+        """
+        url = f"{settings.supabase_url}/storage/v1/object/{self.bucket_name}/{path}"
+        headers = {
+            "apikey": settings.supabase_service_key,
+            "Authorization": f"Bearer {settings.supabase_service_key}",
+        }
+
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+        try:
+            with observe_upstream("storage", self.bucket_name, "download"):
+                async with get_http_client().stream("GET", url, headers=headers) as response:
+                    if response.status_code != 200:
+                        raise Exception(f"Storage returned {response.status_code}")
+                    declared = int(response.headers.get("content-length") or 0)
+                    if declared > max_bytes:
+                        raise Exception(f"File is {declared} bytes, limit is {max_bytes}")
+
+                    size = 0
+                    async for chunk in response.aiter_bytes():
+                        size += len(chunk)
+                        if size > max_bytes:
+                            raise Exception(f"File exceeds limit of {max_bytes} bytes")
+                        spool.write(chunk)
+
+            spool.seek(0)
+            return spool
+        except Exception as e:
+            spool.close()
+            raise Exception(f"File download failed: {str(e)}")
+
     def list_files(self, user_id: str, listing_id: str) -> list:
         """
         List all files for a listing
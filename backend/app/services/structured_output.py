@@ -0,0 +1,121 @@
+"""
+CMC IP Marketplace - Structured Output Parsing
+Incremental extraction and validation of JSON objects from streamed Claude responses
+"""
+
+import json
+from typing import Any, Dict, List, Tuple, Type
+from pydantic import BaseModel, ValidationError
+
+
+class StructuredOutputError(Exception):
+    """Raised when a response does not contain a valid object for the expected schema"""
+
+
+class IncrementalJSONParser:
+    """
+    Extracts the first top-level JSON object from text that arrives in chunks.
+
+    Anything before the opening brace (prose, ```json fences) and after the
+    closing brace is ignored. Each top-level member is returned from feed()
+    as soon as its value is complete, so callers can surface sections such
+    as the executive summary before the rest of the response has arrived.
+    """
+
+    def __init__(self):
+        self._chars: List[str] = []
+        self._started = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = 0
+        self._member_errors: List[str] = []
+        self.sections: Dict[str, Any] = {}
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Consume a chunk of text.
+
+        Returns:
+            List of (key, value) members completed by this chunk
+        """
+        completed: List[Tuple[str, Any]] = []
+        for ch in chunk:
+            if self._done:
+                break
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                    self._chars = [ch]
+                    self._member_start = 1
+                continue
+
+            self._chars.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(len(self._chars) - 1, completed)
+                    self._done = True
+            elif ch == "," and self._depth == 1:
+                self._emit(len(self._chars) - 1, completed)
+                self._member_start = len(self._chars)
+        return completed
+
+    def _emit(self, end: int, completed: List[Tuple[str, Any]]):
+        member = "".join(self._chars[self._member_start:end]).strip()
+        if not member:
+            return
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError as e:
+            self._member_errors.append(f"{member[:40]}...: {e}")
+            return
+        for key, value in parsed.items():
+            self.sections[key] = value
+            completed.append((key, value))
+
+    def result(self) -> Dict:
+        """Return the complete object, or raise StructuredOutputError"""
+        if not self._started:
+            raise StructuredOutputError("No JSON object found in response")
+        if not self._done:
+            raise StructuredOutputError("Response ended before the JSON object was complete")
+        try:
+            return json.loads("".join(self._chars))
+        except json.JSONDecodeError as e:
+            detail = "; ".join(self._member_errors) or str(e)
+            raise StructuredOutputError(f"Invalid JSON: {detail}")
+
+
+def validate_structured(value: Any, schema: Type[BaseModel]) -> Dict:
+    """Validate a parsed object against a schema, raising StructuredOutputError"""
+    try:
+        return schema.model_validate(value).model_dump()
+    except ValidationError as e:
+        raise StructuredOutputError(f"Schema validation failed: {e}")
+
+
+def parse_structured(text: str, schema: Type[BaseModel]) -> Dict:
+    """Extract and validate a JSON object from a complete response text"""
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return validate_structured(parser.result(), schema)
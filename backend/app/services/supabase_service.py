@@ -5,6 +5,7 @@ Wrapper for Supabase client operations
 
 from supabase import create_client, Client
 from app.core.config import settings
+from app.services.instrumented_client import InstrumentedClient
 from typing import Optional, Dict, List, Any
 import logging
 
@@ -15,10 +16,24 @@ class SupabaseService:
     """Supabase client wrapper with helper methods"""
 
     def __init__(self):
-        self.client: Client = create_client(
-            settings.supabase_url,
-            settings.supabase_service_key  # Use service key for backend operations
-        )
+        if settings.supabase_backend == "memory":
+            from app.services.fake_supabase import FakeSupabaseClient
+            from app.services.http_client import mount_transport
+            logger.warning("Using the in-memory Supabase stand-in (SUPABASE_BACKEND=memory)")
+            raw_client = FakeSupabaseClient(
+                settings.supabase_url,
+                latency_ms=settings.fake_supabase_latency_ms,
+                jitter_ms=settings.fake_supabase_jitter_ms,
+            )
+            # Storage downloads go over the shared HTTP client; serve them from the fake too
+            mount_transport(settings.supabase_url, raw_client.storage.http_transport())
+        else:
+            raw_client = create_client(
+                settings.supabase_url,
+                settings.supabase_service_key  # Use service key for backend operations
+            )
+        # Proxy times every PostgREST/Storage/Auth call (see /metrics)
+        self.client: Client = InstrumentedClient(raw_client)
 
     # ==========================================
     # User Operations
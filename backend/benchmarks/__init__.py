@@ -0,0 +1,4 @@
+"""
+CMC IP Marketplace - Benchmarks
+Load tests and micro-benchmarks run against the in-memory Supabase stand-in
+"""
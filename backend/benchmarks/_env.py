@@ -0,0 +1,34 @@
+"""
+Environment for benchmark runs
+
+Must be imported before anything under app/: settings are read at import time.
+Real credentials are never needed; the app runs on the in-memory backend.
+"""
+
+import os
+
+BENCHMARK_ENV = {
+    "SECRET_KEY": "benchmark-secret",
+    "SUPABASE_URL": "http://localhost:54321",
+    "SUPABASE_ANON_KEY": "benchmark-anon-key",
+    "SUPABASE_SERVICE_KEY": "benchmark-service-key",
+    "ANTHROPIC_API_KEY": "benchmark-anthropic-key",
+    "SUPABASE_BACKEND": "memory",
+    "ENVIRONMENT": "benchmark",
+    "DEBUG": "false",
+    # One client address drives all traffic, and background jobs would add noise
+    "RATE_LIMIT_ENABLED": "false",
+    "SCHEDULER_ENABLED": "false",
+    # Measure the middleware stack a scraped deployment runs
+    "METRICS_ENABLED": "true",
+    "SENTRY_DSN": "",
+}
+
+
+def configure(latency_ms: float = 0.0, jitter_ms: float = 0.0):
+    """Point settings at the in-memory backend (explicit environment variables win)"""
+    for key, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(key, value)
+    os.environ["SUPABASE_BACKEND"] = "memory"
+    os.environ["FAKE_SUPABASE_LATENCY_MS"] = str(latency_ms)
+    os.environ["FAKE_SUPABASE_JITTER_MS"] = str(jitter_ms)
@@ -0,0 +1,275 @@
+"""
+HTTP load test for the API
+
+Seeds a deterministic catalog in the in-memory Supabase stand-in, then drives a
+weighted mix of buyer/creator scenarios through the full ASGI stack
+(middleware, auth, validation, serialization) with httpx. No network or
+Supabase project is needed.
+
+Usage (from backend/):
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --requests 5000 --concurrency 32 --latency-ms 5
+    python -m benchmarks.load_test --output after.json --compare before.json
+
+The report is JSON: overall throughput plus count, errors, throughput and
+p50/p95/p99 latency per route. Scenarios that make several requests (save
+then unsave, upload then delete) record each request under its own route.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from benchmarks import _env
+
+# (name, weight, scenario)
+Scenario = Callable[["LoadTest", random.Random], Awaitable[None]]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+class LoadTest:
+    def __init__(self, client, catalog):
+        self.client = client
+        self.catalog = catalog
+        self.upload_bytes = b"\x89PNG\r\n\x1a\n" + bytes(64 * 1024)
+        # route -> per-request latencies / failed requests, filled by _request()
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def _auth(self, user_id: str) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.catalog.tokens[user_id]}"}
+
+    async def _request(self, route: str, method: str, url: str, **kwargs):
+        """Send one request, recording its latency under `route` and counting 4xx/5xx or transport errors"""
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except Exception:
+            self.samples[route].append(time.perf_counter() - started)
+            self.errors[route] += 1
+            raise
+        self.samples[route].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[route] += 1
+        return response
+
+    # Scenarios: one or more requests, each recorded under its own route
+
+    async def featured(self, rng: random.Random):
+        await self._request("GET /api/listings/featured", "GET", "/api/listings/featured")
+
+    async def browse(self, rng: random.Random):
+        from benchmarks.seed import GENRES, TIERS
+        params = {
+            "genre": rng.choice(GENRES),
+            "sort_by": rng.choice(["created_at", "view_count", "save_count"]),
+            "limit": rng.choice([24, 50, 100]),
+            "offset": rng.choice([0, 0, 24, 48]),
+        }
+        if rng.random() < 0.3:
+            params["tier"] = rng.choice(TIERS)
+        await self._request("GET /api/listings/", "GET", "/api/listings/", params=params)
+
+    async def search(self, rng: random.Random):
+        params = {"search": rng.choice(self.catalog.search_terms), "limit": 24}
+        await self._request("GET /api/listings/?search", "GET", "/api/listings/", params=params)
+
+    async def detail(self, rng: random.Random):
+        listing_id = rng.choice(self.catalog.published)
+        await self._request("GET /api/listings/{id}", "GET", f"/api/listings/{listing_id}")
+
+    async def favorite_toggle(self, rng: random.Random):
+        headers = self._auth(rng.choice(self.catalog.buyers))
+        url = f"/api/favorites/{rng.choice(self.catalog.published)}"
+        await self._request("POST /api/favorites/{id}", "POST", url, headers=headers)
+        await self._request("DELETE /api/favorites/{id}", "DELETE", url, headers=headers)
+
+    async def inquiry(self, rng: random.Random):
+        buyer = rng.choice(self.catalog.buyers)
+        await self._request("POST /api/inquiries/", "POST", "/api/inquiries/", headers=self._auth(buyer), json={
+            "listing_id": rng.choice(self.catalog.published),
+            "message": "We'd like to discuss the rights for a limited series adaptation.",
+            "buyer_contact_email": "buyer@bench.local",
+        })
+
+    async def upload(self, rng: random.Random):
+        # Replace then remove the poster, so the next upload to the same path doesn't conflict
+        # (concept art can't be deleted individually through the API)
+        listing_id = rng.choice(self.catalog.published)
+        headers = self._auth(self.catalog.listing_owner[listing_id])
+        await self._request(
+            "POST /api/files/upload", "POST", "/api/files/upload",
+            headers=headers,
+            data={"listing_id": listing_id, "file_type": "poster"},
+            files={"file": ("poster.png", self.upload_bytes, "image/png")},
+        )
+        await self._request("DELETE /api/files/{id}/file", "DELETE", f"/api/files/{listing_id}/file",
+                            headers=headers, data={"file_type": "poster"})
+
+    def scenarios(self) -> List[Tuple[str, int, Scenario]]:
+        return [
+            ("featured", 20, LoadTest.featured),
+            ("browse", 25, LoadTest.browse),
+            ("search", 10, LoadTest.search),
+            ("detail", 25, LoadTest.detail),
+            ("favorite_toggle", 10, LoadTest.favorite_toggle),
+            ("inquiry", 6, LoadTest.inquiry),
+            ("upload", 4, LoadTest.upload),
+        ]
+
+    async def run(self, total_scenarios: int, concurrency: int, seed: int) -> Dict:
+        scenarios = self.scenarios()
+        names = [s[0] for s in scenarios]
+        weights = [s[1] for s in scenarios]
+        by_name = {name: scenario for name, _, scenario in scenarios}
+
+        # The sequence of scenarios is fixed by the seed, independent of timing
+        plan = random.Random(seed).choices(names, weights=weights, k=total_scenarios)
+        self.samples.clear()
+        self.errors.clear()
+        queue: asyncio.Queue = asyncio.Queue()
+        for i, name in enumerate(plan):
+            queue.put_nowait((i, name))
+
+        async def worker():
+            while not queue.empty():
+                i, name = queue.get_nowait()
+                rng = random.Random(seed * 1_000_003 + i)
+                try:
+                    await by_name[name](self, rng)
+                except Exception:
+                    pass  # already counted against the failing route
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        routes = {}
+        for route in sorted(self.samples):
+            values = sorted(self.samples[route])
+            routes[route] = {
+                "count": len(values),
+                "errors": self.errors[route],
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "mean_ms": round(sum(values) / len(values) * 1000, 3),
+                "p50_ms": round(percentile(values, 50) * 1000, 3),
+                "p95_ms": round(percentile(values, 95) * 1000, 3),
+                "p99_ms": round(percentile(values, 99) * 1000, 3),
+                "max_ms": round(values[-1] * 1000, 3),
+            }
+        requests = sum(len(v) for v in self.samples.values())
+        return {
+            "total": {
+                "scenarios": total_scenarios,
+                "requests": requests,
+                "errors": sum(self.errors.values()),
+                "duration_s": round(elapsed, 3),
+                "throughput_rps": round(requests / elapsed, 2),
+            },
+            "routes": routes,
+        }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(current: Dict, baseline: Dict) -> str:
+    """Per-route throughput and p95 change against an earlier report"""
+    lines = [f"{'route':<30}{'rps':>10}{'Δ rps':>10}{'p95 ms':>10}{'Δ p95':>10}"]
+    for name, stats in current["routes"].items():
+        before = baseline.get("routes", {}).get(name)
+        if not before:
+            continue
+        d_rps = (stats["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0
+        d_p95 = (stats["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0
+        lines.append(f"{name:<30}{stats['throughput_rps']:>10.1f}{d_rps:>+9.1f}%{stats['p95_ms']:>10.2f}{d_p95:>+9.1f}%")
+    return "\n".join(lines)
+
+
+async def main(args) -> Dict:
+    _env.configure(args.latency_ms, args.jitter_ms)
+
+    import httpx
+    from app.main import app
+    from app.services.supabase_service import supabase_service
+    from benchmarks.seed import seed_catalog
+
+    catalog = seed_catalog(
+        supabase_service.client.raw,
+        listings=args.listings,
+        buyers=args.buyers,
+        seed=args.seed,
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        load_test = LoadTest(client, catalog)
+        if args.warmup:
+            await load_test.run(args.warmup, args.concurrency, args.seed + 1)
+        results = await load_test.run(args.requests, args.concurrency, args.seed)
+
+    return {
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "listings": args.listings,
+            "buyers": args.buyers,
+            "seed": args.seed,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "commit": _git_commit(),
+        },
+        **results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the API against the in-memory backend")
+    parser.add_argument("--requests", type=int, default=2000, help="scenarios to run (default 2000)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=200, help="scenarios run first and not reported")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="modelled Supabase round trip")
+    parser.add_argument("--jitter-ms", type=float, default=0.5)
+    parser.add_argument("--listings", type=int, default=1000)
+    parser.add_argument("--buyers", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(main(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(report, json.load(f)), file=sys.stderr)
@@ -0,0 +1,332 @@
+"""
+Micro-benchmarks for CPU hot paths, checked against stored baselines
+
+Covers response-model validation and JSON serialization of listing pages,
+analysis blob encoding, prompt building, counter aggregation and small
+per-request helpers. Sub-microsecond helpers are run in batches so every
+timed operation takes tens of microseconds or more; timer resolution and
+per-call overhead would otherwise dominate.
+
+Usage (from backend/):
+    python -m benchmarks.micro                      # compare with baselines/micro.json
+    python -m benchmarks.micro --threshold 0.10     # fail on >10% slowdowns (all cases)
+    python -m benchmarks.micro --filter listing     # only matching cases
+    python -m benchmarks.micro --update-baseline    # record new baselines
+
+Exits with status 1 when any case is slower than its baseline by more than
+its tolerance. To tolerate machine load and CPU frequency changes, a fixed
+pure-Python calibration loop is timed alongside every case and the check
+compares case/calibration ratios rather than raw times. Interference only
+ever adds time, so each side of the ratio is the best of --repeat timings;
+the median over several interleaved rounds is used. Cases over tolerance
+are re-measured (--confirm passes) and fail only if the median of all
+passes is still over, since noise rarely repeats. --update-baseline repeats the whole run
+--baseline-runs times and stores the median ratio per case, with a
+tolerance of at least --threshold, widened for cases whose ratio varied
+between those runs but never beyond MAX_TOLERANCE. Baselines are best
+recorded on the machine class that runs the check.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks import _env
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "micro.json")
+DEFAULT_THRESHOLD = 0.25
+PAGE_SIZE = 100
+# Tolerance = max(threshold, SPREAD_FACTOR * spread of the ratio over the baseline runs,
+# less the most outlying one), capped so a noisy case cannot hide a real regression of that size
+SPREAD_FACTOR = 2.0
+MAX_TOLERANCE = 0.30
+
+# name -> zero-argument callable timed as one operation
+Case = Tuple[str, Callable[[], object]]
+
+
+def _analysis_blob() -> Dict:
+    """An analysis result shaped like ip_materials.content for type='analysis'"""
+    return {
+        "executive_summary": "A slow-burning family saga set along the northern border. " * 12,
+        "commercial_score": 8.4,
+        "commercial_justification": "Strong franchise potential with clear comparables. " * 6,
+        "strengths": [f"Strength {i}: distinctive voice and setting. " * 3 for i in range(5)],
+        "improvements": [f"Improvement {i}: tighten the second act. " * 3 for i in range(3)],
+        "comparables": [{"title": f"Comparable {i}", "reason": "Similar tone and market. " * 2} for i in range(5)],
+        "target_audience": {"primary": "Adults 25-54", "psychographic": "Prestige drama viewers. " * 4},
+        "budget_range": "mid",
+        "themes": ["family", "migration", "memory", "power", "identity"],
+    }
+
+
+def build_cases() -> List[Case]:
+    _env.configure()
+
+    from pydantic import TypeAdapter
+
+    from app.api.listings import ListingResponse
+    from app.core import pagination
+    from app.core.config import settings
+    from app.core.rate_limit import request_cost
+    from app.services.ai_jobs import get_listing_text
+    from app.services.anthropic_service import anthropic_service
+    from app.services.counter_service import CounterService
+    from app.services.fake_supabase import FakeSupabaseClient
+    from benchmarks.seed import seed_catalog
+
+    client = FakeSupabaseClient()
+    catalog = seed_catalog(client, creators=10, buyers=10, listings=PAGE_SIZE * 2, inquiries=0, seed=7)
+    rows = client.table("ip_listings").select("*").eq("status", "published") \
+        .order("created_at", desc=True).limit(PAGE_SIZE).execute().data
+    # Half the rows come back with NULL arrays, as rows created before a column was filled do
+    for row in rows[::2]:
+        row.update({"themes": None, "comparables": None, "ai_strengths": None, "ai_improvements": None})
+
+    page_adapter = TypeAdapter(List[ListingResponse])
+    models = page_adapter.validate_python(rows)
+    blob = _analysis_blob()
+    blob_json = json.dumps(blob)
+    script_text = ("INT. BORDER TOWN - NIGHT\nA truck idles under a flickering light.\n" * 1200)[:60000]
+    listing = rows[1]
+    view_ids = catalog.published[:PAGE_SIZE]
+    flush_ids = [f"{listing_id}:{i}" for i in range(10) for listing_id in view_ids]
+    cursors = [pagination.encode_cursor(row) for row in rows]
+    routes = [
+        ("GET", "/api/listings/", "100"),
+        ("GET", "/api/listings/featured", None),
+        ("POST", "/api/ai/listings/abc/generate-materials", None),
+        ("POST", "/api/files/upload", None),
+        ("GET", "/api/admin/users", "500"),
+    ] * 40
+
+    def render_page():
+        # What FastAPI does for response_model=List[ListingResponse], then JSONResponse.render
+        content = page_adapter.dump_python(models, mode="json")
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+    class _NullRPC:
+        def rpc(self, fn, params):
+            return self
+
+        def execute(self):
+            return None
+
+    loop = asyncio.new_event_loop()
+
+    def record_views():
+        # Threshold raised so no flush task is scheduled; measures buffering only
+        counters = CounterService(_NullRPC())
+        for i in range(1000):
+            counters.record_view(view_ids[i % len(view_ids)])
+        return counters
+
+    def flush_views():
+        counters = CounterService(_NullRPC())
+        counters._pending_views.update({listing_id: 3 for listing_id in flush_ids})
+        counters._pending_total = 3 * len(flush_ids)
+        return loop.run_until_complete(counters.flush())
+
+    settings.counter_flush_threshold = 10 ** 9
+
+    return [
+        ("listing_page_validate_100", lambda: page_adapter.validate_python(rows)),
+        ("listing_model_validate_x20", lambda: [ListingResponse.model_validate(row) for row in rows[:20]]),
+        ("listing_page_render_100", render_page),
+        ("analysis_blob_dumps_x10", lambda: [json.dumps(blob) for _ in range(10)]),
+        ("analysis_blob_loads_x10", lambda: [json.loads(blob_json) for _ in range(10)]),
+        ("listing_text_x50", lambda: [get_listing_text(row) for row in rows[:50]]),
+        ("analysis_prompt_60k_x10", lambda: [anthropic_service.build_analysis_prompt(script_text, listing)
+                                             for _ in range(10)]),
+        ("counter_record_views_1000", record_views),
+        ("counter_flush_1000", flush_views),
+        ("cursor_encode_decode_x50", lambda: [pagination.decode_cursor(pagination.encode_cursor(row))
+                                              for row in rows[:50]]),
+        ("cursor_decode_x100", lambda: [pagination.decode_cursor(c) for c in cursors]),
+        ("rate_limit_request_cost_x200", lambda: [request_cost(*route) for route in routes]),
+    ]
+
+
+def _calibration():
+    """Fixed interpreter workload (dict, string and arithmetic ops) used as the unit of speed"""
+    table = {}
+    for i in range(2000):
+        table[f"k{i % 97}"] = table.get(f"k{i % 97}", 0) + i * 3 // 7
+    return sum(table.values())
+
+
+def calibrate(fn: Callable[[], object], min_time: float) -> int:
+    """Calls per timing so that one timing takes about `min_time` seconds"""
+    number, elapsed = timeit.Timer(fn).autorange()
+    return max(1, int(number * min_time / max(elapsed, 1e-9)))
+
+
+def measure(fn: Callable[[], object], number: int, calibration_number: int, repeat: int) -> Tuple[float, float]:
+    """
+    Best time per call in microseconds over `repeat` timings of `number` calls,
+    and its ratio to the best of the calibration timings interleaved with them
+    """
+    case_timer, calibration_timer = timeit.Timer(fn), timeit.Timer(_calibration)
+    times, calibration_times = [], []
+    for _ in range(repeat):
+        times.append(case_timer.timeit(number) / number)
+        # Interleaved, so a sustained machine-wide slowdown hits both sides of the ratio
+        calibration_times.append(calibration_timer.timeit(calibration_number) / calibration_number)
+    return min(times) * 1e6, min(times) / min(calibration_times)
+
+
+def load_baseline(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get("cases", {})
+
+
+def run_once(cases: List[Case], numbers: Dict[str, int], args) -> Dict[str, Dict[str, float]]:
+    """One full pass: median over interleaved rounds of raw and calibration-relative time per case"""
+    samples: Dict[str, List[Tuple[float, float]]] = {name: [] for name, _ in cases}
+    # Rounds are interleaved so a slow period on the machine hits every case, not just one
+    for _ in range(args.rounds):
+        for name, fn in cases:
+            samples[name].append(measure(fn, numbers[name], numbers["_calibration"], args.repeat))
+    return {
+        name: {
+            "us_per_op": statistics.median(s[0] for s in samples[name]),
+            "relative": statistics.median(s[1] for s in samples[name]),
+        }
+        for name, _ in cases
+    }
+
+
+def run(args) -> int:
+    cases = [(name, fn) for name, fn in build_cases() if not args.filter or args.filter in name]
+    baseline = load_baseline(args.baseline)
+    numbers = {name: calibrate(fn, args.min_time) for name, fn in cases}
+    numbers["_calibration"] = calibrate(_calibration, args.min_time / 2)
+
+    if args.update_baseline:
+        return update_baseline(cases, numbers, baseline, args)
+
+    def tolerance(name: str) -> float:
+        # An explicit --threshold applies to every case; otherwise each case has its own
+        if args.threshold is not None:
+            return args.threshold
+        return min(baseline.get(name, {}).get("tolerance", DEFAULT_THRESHOLD), MAX_TOLERANCE)
+
+    def over(name: str, relative: float) -> bool:
+        before = baseline.get(name, {}).get("relative")
+        return bool(before) and relative / before - 1 > tolerance(name)
+
+    attempts = {name: [r] for name, r in run_once(cases, numbers, args).items()}
+    # Noise rarely repeats, a real slowdown does: re-measure flagged cases and judge the median
+    for i in range(args.confirm):
+        flagged = [(name, fn) for name, fn in cases
+                   if over(name, statistics.median(a["relative"] for a in attempts[name]))]
+        if not flagged:
+            break
+        print(f"Re-measuring {len(flagged)} case(s) over tolerance ({i + 1}/{args.confirm})", file=sys.stderr)
+        for name, r in run_once(flagged, numbers, args).items():
+            attempts[name].append(r)
+
+    results = {}
+    regressions = []
+    print(f"{'case':<30}{'us/op':>12}{'relative':>12}{'baseline':>12}{'change':>10}{'allowed':>10}", file=sys.stderr)
+    for name, _ in cases:
+        us = statistics.median(a["us_per_op"] for a in attempts[name])
+        relative = statistics.median(a["relative"] for a in attempts[name])
+        results[name] = {"us_per_op": round(us, 3), "relative": round(relative, 6), "attempts": len(attempts[name])}
+        before = baseline.get(name, {}).get("relative")
+        if before:
+            change = relative / before - 1
+            results[name].update({"change": round(change, 4), "tolerance": tolerance(name)})
+            flag = "  REGRESSION" if over(name, relative) else ""
+            if flag:
+                regressions.append(name)
+            print(f"{name:<30}{us:>12.2f}{relative:>12.4f}{before:>12.4f}{change:>+9.1%}"
+                  f"{tolerance(name):>10.0%}{flag}", file=sys.stderr)
+        else:
+            print(f"{name:<30}{us:>12.2f}{relative:>12.4f}{'-':>12}{'-':>10}{'-':>10}", file=sys.stderr)
+
+    report = {
+        "environment": _environment(),
+        "threshold": args.threshold,
+        "cases": results,
+        "regressions": regressions,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than baseline by more than their tolerance: "
+              f"{', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def update_baseline(cases: List[Case], numbers: Dict[str, int], baseline: Dict, args) -> int:
+    """Record the median of --baseline-runs full runs, with a per-case tolerance from their spread"""
+    runs = []
+    for i in range(args.baseline_runs):
+        print(f"Baseline run {i + 1}/{args.baseline_runs}", file=sys.stderr)
+        runs.append(run_once(cases, numbers, args))
+
+    threshold = args.threshold if args.threshold is not None else DEFAULT_THRESHOLD
+    recorded = {}
+    print(f"{'case':<30}{'us/op':>12}{'relative':>12}{'spread':>10}{'allowed':>10}", file=sys.stderr)
+    for name, _ in cases:
+        ratios = [r[name]["relative"] for r in runs]
+        relative = statistics.median(ratios)
+        # The run furthest from the median is left out: one-off outliers are what --confirm absorbs
+        if len(ratios) > 3:
+            ratios.remove(max(ratios, key=lambda r: abs(r - relative)))
+        spread = (max(ratios) - min(ratios)) / relative
+        tolerance = round(min(max(threshold, SPREAD_FACTOR * spread), MAX_TOLERANCE), 2)
+        us = statistics.median(r[name]["us_per_op"] for r in runs)
+        recorded[name] = {"us_per_op": round(us, 3), "relative": round(relative, 6), "tolerance": tolerance}
+        # A capped case can fail on noise alone: give it a larger inner loop or more --repeat
+        flag = "  NOISY" if SPREAD_FACTOR * spread > MAX_TOLERANCE else ""
+        print(f"{name:<30}{us:>12.2f}{relative:>12.4f}{spread:>10.1%}{tolerance:>10.0%}{flag}", file=sys.stderr)
+
+    os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+    with open(args.baseline, "w") as f:
+        json.dump({"environment": _environment(), "runs": args.baseline_runs, "cases": {**baseline, **recorded}},
+                  f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"Baseline written to {args.baseline}", file=sys.stderr)
+    return 0
+
+
+def _environment() -> Dict:
+    return {"python": platform.python_version(), "platform": platform.platform()}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="CPU micro-benchmarks with baseline regression check")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="allowed slowdown as a fraction for every case (default: per-case tolerance "
+                             "from the baseline, at most 0.30; the minimum tolerance when recording, 0.25)")
+    parser.add_argument("--rounds", type=int, default=3, help="interleaved passes; the median is used")
+    parser.add_argument("--repeat", type=int, default=10,
+                        help="timings per case per round; the best case and calibration times are used")
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds per timing")
+    parser.add_argument("--confirm", type=int, default=2,
+                        help="extra passes over cases that exceed their tolerance; the median decides")
+    parser.add_argument("--baseline-runs", type=int, default=5,
+                        help="full runs recorded by --update-baseline; the median is stored")
+    parser.add_argument("--filter", help="only run cases whose name contains this")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--update-baseline", action="store_true")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(run(parse_args()))
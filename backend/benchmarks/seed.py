@@ -0,0 +1,149 @@
+"""
+Deterministic catalog for benchmarks: users, listings, favorites and inquiries
+
+The same seed always produces the same rows, ids and timestamps, so runs
+before and after a change exercise identical data.
+"""
+
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+GENRES = ["Drama", "Action", "Comedy", "Horror", "Sci-Fi", "Thriller", "Romance", "Documentary"]
+FORMATS = ["Series", "Film", "Limited Series", "Short"]
+TIERS = ["flagship", "strong", "hidden-gem"]
+COUNTRIES = ["Mexico", "Argentina", "Colombia", "Chile", "Peru", "Brazil", "Uruguay"]
+THEMES = ["revenge", "family", "survival", "identity", "power", "love", "migration", "corruption", "memory"]
+COMPARABLES = ["Breaking Bad", "Narcos", "Dark", "Money Heist", "Roma", "City of God", "Succession", "Mare of Easttown"]
+WORDS = (
+    "river night city border secret family storm empire silence mirror harvest ghost "
+    "island promise fire shadow garden letter train crown desert echo winter frontier"
+).split()
+
+# Published share of listings; the rest are drafts/pending/archived
+PUBLISHED_RATIO = 0.8
+
+
+@dataclass
+class Catalog:
+    """Ids and tokens the scenarios need"""
+    creators: List[str] = field(default_factory=list)
+    buyers: List[str] = field(default_factory=list)
+    admins: List[str] = field(default_factory=list)
+    published: List[str] = field(default_factory=list)
+    listing_owner: Dict[str, str] = field(default_factory=dict)  # listing id -> creator id
+    tokens: Dict[str, str] = field(default_factory=dict)  # user id -> access token
+    search_terms: List[str] = field(default_factory=list)
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def seed_catalog(
+    client,
+    creators: int = 50,
+    buyers: int = 200,
+    listings: int = 1000,
+    favorites_per_buyer: int = 15,
+    inquiries: int = 500,
+    seed: int = 42,
+) -> Catalog:
+    """
+    Fill a FakeSupabaseClient with a realistic catalog.
+
+    Args:
+        client: The in-memory client (supabase_service.client.raw)
+        seed: Random seed; identical seeds give identical catalogs
+    """
+    rng = random.Random(seed)
+    catalog = Catalog()
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def timestamp(i: int, total: int) -> str:
+        return (start + timedelta(minutes=i * 525600 // max(total, 1))).isoformat()
+
+    def add_users(count: int, role: str, ids: List[str]):
+        rows = []
+        for i in range(count):
+            user_id = _uuid(rng)
+            rows.append({
+                "id": user_id,
+                "email": f"{role}{i}@bench.local",
+                "role": role,
+                "display_name": f"{role.title()} {i}",
+                "bio": _sentence(rng, 20),
+                "company_name": f"Studio {rng.choice(WORDS).title()}" if role == "buyer" else None,
+                "created_at": timestamp(i, count),
+            })
+            ids.append(user_id)
+            client.auth.register(user_id, rows[-1]["email"], "benchmark-password")
+            catalog.tokens[user_id] = client.auth.issue_token(user_id)
+        client.seed("users", rows)
+
+    add_users(creators, "creator", catalog.creators)
+    add_users(buyers, "buyer", catalog.buyers)
+    add_users(1, "admin", catalog.admins)
+
+    rows = []
+    for i in range(listings):
+        listing_id = _uuid(rng)
+        creator_id = rng.choice(catalog.creators)
+        published = rng.random() < PUBLISHED_RATIO
+        title = f"The {rng.choice(WORDS).title()} of {rng.choice(WORDS).title()} {i}"
+        rows.append({
+            "id": listing_id,
+            "creator_id": creator_id,
+            "title": title,
+            "tagline": _sentence(rng, 8),
+            "description": _sentence(rng, 120),
+            "logline": _sentence(rng, 25),
+            "genre": rng.choice(GENRES),
+            "format": rng.choice(FORMATS),
+            "tier": rng.choice(TIERS),
+            "location": rng.choice(COUNTRIES),
+            "themes": rng.sample(THEMES, 3),
+            "comparables": rng.sample(COMPARABLES, 2),
+            "available_rights": ["Film", "TV", "Streaming"],
+            "available_territories": ["Worldwide"],
+            "poster_url": f"http://localhost:54321/storage/v1/object/public/ip-materials/{creator_id}/{listing_id}/poster.jpg",
+            "ai_analysis_status": "ready",
+            "ai_score": round(rng.uniform(4, 9.8), 1),
+            "ai_strengths": [_sentence(rng, 10) for _ in range(3)],
+            "ai_improvements": [_sentence(rng, 10) for _ in range(3)],
+            "status": "published" if published else rng.choice(["draft", "pending", "archived"]),
+            "featured": published and rng.random() < 0.05,
+            "view_count": rng.randint(0, 5000),
+            "created_at": timestamp(i, listings),
+        })
+        catalog.listing_owner[listing_id] = creator_id
+        if published:
+            catalog.published.append(listing_id)
+    client.seed("ip_listings", rows)
+
+    favorites = []
+    for buyer_id in catalog.buyers:
+        for listing_id in rng.sample(catalog.published, min(favorites_per_buyer, len(catalog.published))):
+            favorites.append({"buyer_id": buyer_id, "listing_id": listing_id})
+    client.seed("favorites", favorites)
+
+    client.seed("inquiries", [
+        {
+            "listing_id": rng.choice(catalog.published),
+            "buyer_id": (buyer_id := rng.choice(catalog.buyers)),
+            "message": _sentence(rng, 60),
+            "buyer_contact_email": f"{buyer_id[:8]}@bench.local",
+            "status": rng.choice(["new", "new", "read", "replied"]),
+            "created_at": timestamp(i, inquiries),
+        }
+        for i in range(inquiries)
+    ])
+
+    catalog.search_terms = rng.sample(WORDS, 8)
+    return catalog
@@ -56,6 +56,7 @@ CREATE TABLE ip_listings (
 
   -- Content
   script_url TEXT, -- Supabase Storage URL
+  script_sha256 TEXT, -- content hash of the uploaded script (AI memoization)
   synopsis_url TEXT,
   poster_url TEXT,
   concept_art_urls TEXT[],
@@ -65,6 +66,12 @@ CREATE TABLE ip_listings (
   ai_score DECIMAL(3,1), -- 1.0 to 10.0
   ai_strengths TEXT[],
   ai_improvements TEXT[],
+  ai_materials_status JSONB DEFAULT '{}', -- per-stage status of the materials pipeline
+  ai_materials_started_at TIMESTAMPTZ, -- set while a materials pipeline holds the listing
+  ai_analysis_started_at TIMESTAMPTZ, -- stale 'analyzing' rows are reaped after a deadline
+  ai_retry_count INTEGER DEFAULT 0,
+  ai_last_error TEXT,
+  ai_next_retry_at TIMESTAMPTZ,
 
   -- Status & Visibility
   status TEXT DEFAULT 'draft' CHECK (status IN ('draft', 'pending', 'published', 'archived')),
@@ -93,8 +100,14 @@ CREATE TABLE ip_materials (
   -- Metadata
   generated_at TIMESTAMPTZ DEFAULT NOW(),
   model_used TEXT, -- 'claude-sonnet-4-5' etc.
-  tokens_used INTEGER,
-  cost_usd DECIMAL(8,4)
+  tokens_used INTEGER, -- input + output + cache tokens
+  cost_usd DECIMAL(8,4),
+  input_tokens INTEGER,
+  output_tokens INTEGER,
+  cache_read_tokens INTEGER,
+  cache_creation_tokens INTEGER,
+  latency_ms INTEGER, -- NULL for batch calls
+  input_hash TEXT -- hash of prompt version, model, listing fields and script (memoization)
 );
 
 -- Subscriptions table (for future monetization)
@@ -158,6 +171,29 @@ CREATE TABLE ip_views (
   created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Notification outbox (written by triggers, delivered by a background dispatcher)
+CREATE TABLE notification_outbox (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  recipient_id UUID REFERENCES users(id) ON DELETE CASCADE,
+  kind TEXT NOT NULL, -- 'inquiry'
+  payload JSONB NOT NULL DEFAULT '{}',
+
+  status TEXT DEFAULT 'pending' CHECK (status IN ('pending', 'sending', 'sent', 'failed')),
+  attempts INTEGER DEFAULT 0,
+  next_attempt_at TIMESTAMPTZ DEFAULT NOW(),
+  last_error TEXT,
+
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  sent_at TIMESTAMPTZ
+);
+
+-- Rate limit buckets (UNLOGGED: losing them on crash just resets limits)
+CREATE UNLOGGED TABLE rate_limit_buckets (
+  key TEXT PRIMARY KEY, -- 'ip:<addr>' or 'user:<id>'
+  tokens DOUBLE PRECISION NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
 -- =====================================================
 -- INDEXES
 -- =====================================================
@@ -165,6 +201,7 @@ CREATE TABLE ip_views (
 -- Users
 CREATE INDEX idx_users_role ON users(role);
 CREATE INDEX idx_users_email ON users(email);
+CREATE INDEX idx_users_created ON users(created_at DESC, id DESC);
 
 -- IP Listings
 CREATE INDEX idx_listings_creator ON ip_listings(creator_id);
@@ -173,27 +210,39 @@ CREATE INDEX idx_listings_genre ON ip_listings(genre);
 CREATE INDEX idx_listings_tier ON ip_listings(tier);
 CREATE INDEX idx_listings_slug ON ip_listings(slug);
 CREATE INDEX idx_listings_created ON ip_listings(created_at DESC);
+CREATE INDEX idx_listings_created_id ON ip_listings(created_at DESC, id DESC);
 CREATE INDEX idx_listings_themes ON ip_listings USING GIN(themes);
 CREATE INDEX idx_listings_search ON ip_listings USING GIN(to_tsvector('english', title || ' ' || description));
+CREATE INDEX idx_listings_ai_recovery ON ip_listings(ai_analysis_status, ai_next_retry_at)
+  WHERE ai_analysis_status IN ('analyzing', 'failed');
 
 -- IP Materials
 CREATE INDEX idx_materials_listing ON ip_materials(listing_id);
 CREATE INDEX idx_materials_type ON ip_materials(type);
+CREATE INDEX idx_materials_latest ON ip_materials(listing_id, type, generated_at DESC);
+CREATE INDEX idx_materials_generated ON ip_materials(generated_at DESC);
 
 -- Inquiries
 CREATE INDEX idx_inquiries_listing ON inquiries(listing_id);
 CREATE INDEX idx_inquiries_buyer ON inquiries(buyer_id);
 CREATE INDEX idx_inquiries_status ON inquiries(status);
 CREATE INDEX idx_inquiries_created ON inquiries(created_at DESC);
+CREATE INDEX idx_inquiries_created_id ON inquiries(created_at DESC, id DESC);
+CREATE INDEX idx_inquiries_listing_created ON inquiries(listing_id, created_at DESC, id DESC);
 
 -- Favorites
 CREATE INDEX idx_favorites_buyer ON favorites(buyer_id);
+CREATE INDEX idx_favorites_buyer_created ON favorites(buyer_id, created_at DESC, listing_id DESC);
 CREATE INDEX idx_favorites_listing ON favorites(listing_id);
 
 -- Views
 CREATE INDEX idx_views_listing ON ip_views(listing_id);
 CREATE INDEX idx_views_created ON ip_views(created_at DESC);
 
+-- Notification outbox
+CREATE INDEX idx_outbox_due ON notification_outbox(next_attempt_at)
+  WHERE status IN ('pending', 'sending');
+
 -- =====================================================
 -- ROW LEVEL SECURITY (RLS) POLICIES
 -- =====================================================
@@ -206,6 +255,8 @@ ALTER TABLE subscriptions ENABLE ROW LEVEL SECURITY;
 ALTER TABLE inquiries ENABLE ROW LEVEL SECURITY;
 ALTER TABLE favorites ENABLE ROW LEVEL SECURITY;
 ALTER TABLE ip_views ENABLE ROW LEVEL SECURITY;
+ALTER TABLE notification_outbox ENABLE ROW LEVEL SECURITY; -- service role only
+ALTER TABLE rate_limit_buckets ENABLE ROW LEVEL SECURITY; -- service role only
 
 -- Users: users can view and update their own profile
 CREATE POLICY users_own ON users
@@ -331,6 +382,261 @@ $$ LANGUAGE plpgsql;
 CREATE TRIGGER generate_listing_slug BEFORE INSERT OR UPDATE ON ip_listings
   FOR EACH ROW EXECUTE FUNCTION generate_slug();
 
+-- Bulk write-back of re-analysis results (one round trip per chunk)
+CREATE OR REPLACE FUNCTION apply_analysis_results(p_results JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+  updated INTEGER;
+BEGIN
+  UPDATE ip_listings l SET
+    ai_analysis_status = 'ready',
+    ai_score = r.ai_score,
+    ai_strengths = r.ai_strengths,
+    ai_improvements = r.ai_improvements,
+    ai_retry_count = 0,
+    ai_last_error = NULL,
+    ai_next_retry_at = NULL
+  FROM jsonb_to_recordset(p_results)
+    AS r(id UUID, ai_score DECIMAL(3,1), ai_strengths TEXT[], ai_improvements TEXT[])
+  WHERE l.id = r.id;
+  GET DIAGNOSTICS updated = ROW_COUNT;
+  RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
+
+-- AI usage aggregates for capacity planning (group by day, model, creator or type)
+CREATE OR REPLACE FUNCTION ai_usage_report(
+  p_group TEXT,
+  p_since TIMESTAMPTZ DEFAULT NULL,
+  p_until TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS TABLE (
+  bucket TEXT,
+  calls BIGINT,
+  input_tokens BIGINT,
+  output_tokens BIGINT,
+  cache_read_tokens BIGINT,
+  cache_creation_tokens BIGINT,
+  cost_usd NUMERIC,
+  avg_latency_ms NUMERIC,
+  p95_latency_ms DOUBLE PRECISION
+) AS $$
+  SELECT
+    CASE p_group
+      WHEN 'day' THEN to_char(date_trunc('day', m.generated_at), 'YYYY-MM-DD')
+      WHEN 'model' THEN m.model_used
+      WHEN 'creator' THEN l.creator_id::TEXT
+      ELSE m.type
+    END AS bucket,
+    COUNT(*) AS calls,
+    COALESCE(SUM(m.input_tokens), 0) AS input_tokens,
+    COALESCE(SUM(m.output_tokens), 0) AS output_tokens,
+    COALESCE(SUM(m.cache_read_tokens), 0) AS cache_read_tokens,
+    COALESCE(SUM(m.cache_creation_tokens), 0) AS cache_creation_tokens,
+    COALESCE(SUM(m.cost_usd), 0) AS cost_usd,
+    ROUND(AVG(m.latency_ms)) AS avg_latency_ms,
+    percentile_cont(0.95) WITHIN GROUP (ORDER BY m.latency_ms) AS p95_latency_ms
+  FROM ip_materials m
+  JOIN ip_listings l ON l.id = m.listing_id
+  WHERE m.model_used IS NOT NULL
+    AND (p_since IS NULL OR m.generated_at >= p_since)
+    AND (p_until IS NULL OR m.generated_at < p_until)
+  GROUP BY 1
+  ORDER BY 1;
+$$ LANGUAGE sql STABLE;
+
+-- Atomic listing counters: saves and inquiries follow their source rows
+CREATE OR REPLACE FUNCTION bump_listing_counter()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_TABLE_NAME = 'favorites' THEN
+    IF TG_OP = 'INSERT' THEN
+      UPDATE ip_listings SET save_count = save_count + 1 WHERE id = NEW.listing_id;
+    ELSE
+      UPDATE ip_listings SET save_count = GREATEST(save_count - 1, 0) WHERE id = OLD.listing_id;
+    END IF;
+  ELSIF TG_TABLE_NAME = 'inquiries' THEN
+    IF TG_OP = 'INSERT' THEN
+      UPDATE ip_listings SET inquiry_count = inquiry_count + 1 WHERE id = NEW.listing_id;
+    ELSE
+      UPDATE ip_listings SET inquiry_count = GREATEST(inquiry_count - 1, 0) WHERE id = OLD.listing_id;
+    END IF;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER favorites_save_count AFTER INSERT OR DELETE ON favorites
+  FOR EACH ROW EXECUTE FUNCTION bump_listing_counter();
+
+CREATE TRIGGER inquiries_inquiry_count AFTER INSERT OR DELETE ON inquiries
+  FOR EACH ROW EXECUTE FUNCTION bump_listing_counter();
+
+-- Idempotent save/unsave in one round trip. save_count follows via the favorites trigger.
+-- Saving requires a published listing; unsaving works on any listing.
+CREATE OR REPLACE FUNCTION set_favorite(p_buyer_id UUID, p_listing_id UUID, p_saved BOOLEAN)
+RETURNS JSONB AS $$
+DECLARE
+  v_count INTEGER;
+BEGIN
+  IF p_saved THEN
+    PERFORM 1 FROM ip_listings WHERE id = p_listing_id AND status = 'published';
+    IF NOT FOUND THEN
+      RETURN jsonb_build_object('found', false);
+    END IF;
+    INSERT INTO favorites (buyer_id, listing_id) VALUES (p_buyer_id, p_listing_id)
+      ON CONFLICT (buyer_id, listing_id) DO NOTHING;
+  ELSE
+    DELETE FROM favorites WHERE buyer_id = p_buyer_id AND listing_id = p_listing_id;
+  END IF;
+
+  SELECT save_count INTO v_count FROM ip_listings WHERE id = p_listing_id;
+  IF NOT FOUND THEN
+    RETURN jsonb_build_object('found', false);
+  END IF;
+  RETURN jsonb_build_object('found', true, 'saved', p_saved, 'save_count', v_count);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Apply buffered views: one ip_views row per view plus one view_count update per listing
+CREATE OR REPLACE FUNCTION apply_view_counts(p_counts JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+  updated INTEGER;
+BEGIN
+  INSERT INTO ip_views (listing_id, source)
+  SELECT c.id, 'api'
+  FROM jsonb_to_recordset(p_counts) AS c(id UUID, n INTEGER), generate_series(1, c.n)
+  WHERE EXISTS (SELECT 1 FROM ip_listings l WHERE l.id = c.id);
+
+  UPDATE ip_listings l SET view_count = l.view_count + c.n
+  FROM jsonb_to_recordset(p_counts) AS c(id UUID, n INTEGER)
+  WHERE l.id = c.id;
+  GET DIAGNOSTICS updated = ROW_COUNT;
+  RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recompute counters from favorites, inquiries and ip_views; returns listings corrected.
+-- view_count never decreases: views counted before ip_views was populated have no rows.
+CREATE OR REPLACE FUNCTION reconcile_listing_counters()
+RETURNS INTEGER AS $$
+DECLARE
+  corrected INTEGER;
+BEGIN
+  WITH actual AS (
+    SELECT
+      l.id,
+      (SELECT COUNT(*) FROM favorites f WHERE f.listing_id = l.id) AS saves,
+      (SELECT COUNT(*) FROM inquiries i WHERE i.listing_id = l.id) AS inquiries,
+      (SELECT COUNT(*) FROM ip_views v WHERE v.listing_id = l.id) AS views
+    FROM ip_listings l
+  )
+  UPDATE ip_listings l SET
+    save_count = a.saves,
+    inquiry_count = a.inquiries,
+    view_count = GREATEST(l.view_count, a.views)
+  FROM actual a
+  WHERE l.id = a.id
+    AND (l.save_count IS DISTINCT FROM a.saves
+      OR l.inquiry_count IS DISTINCT FROM a.inquiries
+      OR l.view_count < a.views);
+  GET DIAGNOSTICS corrected = ROW_COUNT;
+  RETURN corrected;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Queue a creator notification in the same transaction as the inquiry INSERT
+CREATE OR REPLACE FUNCTION enqueue_inquiry_notification()
+RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO notification_outbox (recipient_id, kind, payload)
+  SELECT l.creator_id, 'inquiry', jsonb_build_object(
+    'inquiry_id', NEW.id,
+    'listing_id', NEW.listing_id,
+    'listing_title', l.title,
+    'buyer_name', u.display_name,
+    'buyer_contact_email', NEW.buyer_contact_email,
+    'message', left(NEW.message, 500)
+  )
+  FROM ip_listings l
+  LEFT JOIN users u ON u.id = NEW.buyer_id
+  WHERE l.id = NEW.listing_id AND l.creator_id IS NOT NULL;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER inquiries_notify AFTER INSERT ON inquiries
+  FOR EACH ROW EXECUTE FUNCTION enqueue_inquiry_notification();
+
+-- Claim due outbox rows for delivery (SKIP LOCKED lets several dispatchers run).
+-- Rows left in 'sending' by a crashed dispatcher are reclaimed after p_stale_seconds.
+CREATE OR REPLACE FUNCTION claim_notifications(p_limit INTEGER, p_stale_seconds INTEGER DEFAULT 600)
+RETURNS SETOF notification_outbox AS $$
+  UPDATE notification_outbox o SET
+    status = 'sending',
+    attempts = o.attempts + 1,
+    next_attempt_at = NOW() + make_interval(secs => p_stale_seconds)
+  WHERE o.id IN (
+    SELECT id FROM notification_outbox
+    WHERE status IN ('pending', 'sending') AND next_attempt_at <= NOW()
+    ORDER BY next_attempt_at
+    LIMIT p_limit
+    FOR UPDATE SKIP LOCKED
+  )
+  RETURNING o.*;
+$$ LANGUAGE sql;
+
+-- Shared token buckets for API rate limiting (settings.rate_limit_backend = 'supabase')
+CREATE OR REPLACE FUNCTION rate_limit_consume(
+  p_key TEXT,
+  p_cost DOUBLE PRECISION,
+  p_capacity DOUBLE PRECISION,
+  p_refill_per_sec DOUBLE PRECISION
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_tokens DOUBLE PRECISION;
+  v_allowed BOOLEAN;
+BEGIN
+  -- Refill and lock the bucket in one statement
+  INSERT INTO rate_limit_buckets (key, tokens, updated_at)
+  VALUES (p_key, p_capacity, clock_timestamp())
+  ON CONFLICT (key) DO UPDATE SET
+    tokens = LEAST(p_capacity, rate_limit_buckets.tokens
+      + EXTRACT(EPOCH FROM clock_timestamp() - rate_limit_buckets.updated_at) * p_refill_per_sec),
+    updated_at = clock_timestamp()
+  RETURNING tokens INTO v_tokens;
+
+  v_allowed := v_tokens >= p_cost;
+  IF v_allowed THEN
+    v_tokens := v_tokens - p_cost;
+    UPDATE rate_limit_buckets SET tokens = v_tokens WHERE key = p_key;
+  END IF;
+  RETURN jsonb_build_object('allowed', v_allowed, 'tokens', v_tokens);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Return tokens taken by rate_limit_consume() for a request that was rejected anyway
+CREATE OR REPLACE FUNCTION rate_limit_refund(p_key TEXT, p_cost DOUBLE PRECISION, p_capacity DOUBLE PRECISION)
+RETURNS VOID AS $$
+  UPDATE rate_limit_buckets SET tokens = LEAST(p_capacity, tokens + p_cost) WHERE key = p_key;
+$$ LANGUAGE sql;
+
+-- Admin dashboard aggregates (one round trip, counted in the database)
+CREATE OR REPLACE FUNCTION admin_platform_stats()
+RETURNS JSONB AS $$
+  SELECT jsonb_build_object(
+    'listings', COALESCE((SELECT jsonb_object_agg(status, n) FROM (
+      SELECT status, COUNT(*) AS n FROM ip_listings GROUP BY status) s), '{}'::jsonb),
+    'total_listings', (SELECT COUNT(*) FROM ip_listings),
+    'users', COALESCE((SELECT jsonb_object_agg(role, n) FROM (
+      SELECT role, COUNT(*) AS n FROM users GROUP BY role) r), '{}'::jsonb),
+    'total_users', (SELECT COUNT(*) FROM users),
+    'total_inquiries', (SELECT COUNT(*) FROM inquiries)
+  );
+$$ LANGUAGE sql STABLE;
+
 -- =====================================================
 -- STORAGE BUCKETS (to create in Supabase UI)
 -- =====================================================
@@ -348,3 +654,150 @@ CREATE TRIGGER generate_listing_slug BEFORE INSERT OR UPDATE ON ip_listings
 -- Create default subscription tiers (optional for MVP)
 -- INSERT INTO subscriptions (user_id, tier, status, max_ips, max_ai_analyses)
 -- VALUES (...);
+
+-- =====================================================
+-- MIGRATIONS (for databases created from an earlier schema.sql)
+-- =====================================================
+-- Each block is self-contained: functions its triggers need are (re)defined here.
+-- RPC-only functions (set_favorite, apply_view_counts, claim_notifications,
+-- rate_limit_consume, ...) are not repeated: re-run their CREATE OR REPLACE FUNCTION
+-- statements from FUNCTIONS & TRIGGERS above before deploying the matching backend.
+
+-- AI output memoization
+ALTER TABLE ip_listings ADD COLUMN IF NOT EXISTS script_sha256 TEXT;
+ALTER TABLE ip_materials ADD COLUMN IF NOT EXISTS input_hash TEXT;
+CREATE INDEX IF NOT EXISTS idx_materials_latest ON ip_materials(listing_id, type, generated_at DESC);
+
+-- Materials pipeline stage status
+ALTER TABLE ip_listings ADD COLUMN IF NOT EXISTS ai_materials_status JSONB DEFAULT '{}';
+ALTER TABLE ip_listings ADD COLUMN IF NOT EXISTS ai_materials_started_at TIMESTAMPTZ;
+
+-- AI token and cost accounting
+ALTER TABLE ip_materials ADD COLUMN IF NOT EXISTS input_tokens INTEGER;
+ALTER TABLE ip_materials ADD COLUMN IF NOT EXISTS output_tokens INTEGER;
+ALTER TABLE ip_materials ADD COLUMN IF NOT EXISTS cache_read_tokens INTEGER;
+ALTER TABLE ip_materials ADD COLUMN IF NOT EXISTS cache_creation_tokens INTEGER;
+ALTER TABLE ip_materials ADD COLUMN IF NOT EXISTS latency_ms INTEGER;
+CREATE INDEX IF NOT EXISTS idx_materials_generated ON ip_materials(generated_at DESC);
+
+-- Stale/failed analysis recovery
+ALTER TABLE ip_listings ADD COLUMN IF NOT EXISTS ai_analysis_started_at TIMESTAMPTZ;
+ALTER TABLE ip_listings ADD COLUMN IF NOT EXISTS ai_retry_count INTEGER DEFAULT 0;
+ALTER TABLE ip_listings ADD COLUMN IF NOT EXISTS ai_last_error TEXT;
+ALTER TABLE ip_listings ADD COLUMN IF NOT EXISTS ai_next_retry_at TIMESTAMPTZ;
+CREATE INDEX IF NOT EXISTS idx_listings_ai_recovery ON ip_listings(ai_analysis_status, ai_next_retry_at)
+  WHERE ai_analysis_status IN ('analyzing', 'failed');
+
+-- Keyset pagination for admin lists
+CREATE INDEX IF NOT EXISTS idx_users_created ON users(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_listings_created_id ON ip_listings(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_inquiries_created_id ON inquiries(created_at DESC, id DESC);
+
+-- Atomic listing counters
+CREATE OR REPLACE FUNCTION bump_listing_counter()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_TABLE_NAME = 'favorites' THEN
+    IF TG_OP = 'INSERT' THEN
+      UPDATE ip_listings SET save_count = save_count + 1 WHERE id = NEW.listing_id;
+    ELSE
+      UPDATE ip_listings SET save_count = GREATEST(save_count - 1, 0) WHERE id = OLD.listing_id;
+    END IF;
+  ELSIF TG_TABLE_NAME = 'inquiries' THEN
+    IF TG_OP = 'INSERT' THEN
+      UPDATE ip_listings SET inquiry_count = inquiry_count + 1 WHERE id = NEW.listing_id;
+    ELSE
+      UPDATE ip_listings SET inquiry_count = GREATEST(inquiry_count - 1, 0) WHERE id = OLD.listing_id;
+    END IF;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION reconcile_listing_counters()
+RETURNS INTEGER AS $$
+DECLARE
+  corrected INTEGER;
+BEGIN
+  WITH actual AS (
+    SELECT
+      l.id,
+      (SELECT COUNT(*) FROM favorites f WHERE f.listing_id = l.id) AS saves,
+      (SELECT COUNT(*) FROM inquiries i WHERE i.listing_id = l.id) AS inquiries,
+      (SELECT COUNT(*) FROM ip_views v WHERE v.listing_id = l.id) AS views
+    FROM ip_listings l
+  )
+  UPDATE ip_listings l SET
+    save_count = a.saves,
+    inquiry_count = a.inquiries,
+    view_count = GREATEST(l.view_count, a.views)
+  FROM actual a
+  WHERE l.id = a.id
+    AND (l.save_count IS DISTINCT FROM a.saves
+      OR l.inquiry_count IS DISTINCT FROM a.inquiries
+      OR l.view_count < a.views);
+  GET DIAGNOSTICS corrected = ROW_COUNT;
+  RETURN corrected;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS favorites_save_count ON favorites;
+CREATE TRIGGER favorites_save_count AFTER INSERT OR DELETE ON favorites
+  FOR EACH ROW EXECUTE FUNCTION bump_listing_counter();
+DROP TRIGGER IF EXISTS inquiries_inquiry_count ON inquiries;
+CREATE TRIGGER inquiries_inquiry_count AFTER INSERT OR DELETE ON inquiries
+  FOR EACH ROW EXECUTE FUNCTION bump_listing_counter();
+SELECT reconcile_listing_counters();
+
+-- Creator inbox (inquiries joined to the creator's listings, newest first)
+CREATE INDEX IF NOT EXISTS idx_inquiries_listing_created ON inquiries(listing_id, created_at DESC, id DESC);
+
+-- Inquiry notification outbox
+CREATE TABLE IF NOT EXISTS notification_outbox (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  recipient_id UUID REFERENCES users(id) ON DELETE CASCADE,
+  kind TEXT NOT NULL,
+  payload JSONB NOT NULL DEFAULT '{}',
+  status TEXT DEFAULT 'pending' CHECK (status IN ('pending', 'sending', 'sent', 'failed')),
+  attempts INTEGER DEFAULT 0,
+  next_attempt_at TIMESTAMPTZ DEFAULT NOW(),
+  last_error TEXT,
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  sent_at TIMESTAMPTZ
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON notification_outbox(next_attempt_at)
+  WHERE status IN ('pending', 'sending');
+ALTER TABLE notification_outbox ENABLE ROW LEVEL SECURITY;
+CREATE OR REPLACE FUNCTION enqueue_inquiry_notification()
+RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO notification_outbox (recipient_id, kind, payload)
+  SELECT l.creator_id, 'inquiry', jsonb_build_object(
+    'inquiry_id', NEW.id,
+    'listing_id', NEW.listing_id,
+    'listing_title', l.title,
+    'buyer_name', u.display_name,
+    'buyer_contact_email', NEW.buyer_contact_email,
+    'message', left(NEW.message, 500)
+  )
+  FROM ip_listings l
+  LEFT JOIN users u ON u.id = NEW.buyer_id
+  WHERE l.id = NEW.listing_id AND l.creator_id IS NOT NULL;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS inquiries_notify ON inquiries;
+CREATE TRIGGER inquiries_notify AFTER INSERT ON inquiries
+  FOR EACH ROW EXECUTE FUNCTION enqueue_inquiry_notification();
+
+-- Saved listings ordered by save time
+CREATE INDEX IF NOT EXISTS idx_favorites_buyer_created ON favorites(buyer_id, created_at DESC, listing_id DESC);
+
+-- Shared rate limit buckets
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_buckets (
+  key TEXT PRIMARY KEY,
+  tokens DOUBLE PRECISION NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+ALTER TABLE rate_limit_buckets ENABLE ROW LEVEL SECURITY;
@@ -37,6 +37,29 @@ async function request<T>(
   return response.json();
 }
 
+/** GET every page of a cursor-paginated list, following the X-Next-Cursor header */
+async function requestAllPages<T>(path: string, pageSize = 500): Promise<T[]> {
+  const headers = await getAuthHeaders();
+  const rows: T[] = [];
+  const separator = path.includes('?') ? '&' : '?';
+  let cursor: string | null = null;
+
+  do {
+    const query = `limit=${pageSize}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`;
+    const response = await fetch(`${API_BASE_URL}${path}${separator}${query}`, { headers });
+
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ detail: response.statusText }));
+      throw new Error(error.detail || 'API request failed');
+    }
+
+    rows.push(...(await response.json() as T[]));
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+
+  return rows;
+}
+
 async function uploadFile(path: string, formData: FormData): Promise<unknown> {
   const { data: { session } } = await supabase.auth.getSession();
   const headers: HeadersInit = {};
@@ -217,9 +240,12 @@ export interface OnePagerResult {
 
 export const favoritesApi = {
   getIds: () => request<string[]>('GET', '/api/favorites/'),
-  getSavedListings: () => request<Listing[]>('GET', '/api/favorites/listings'),
-  save: (listingId: string) => request<{ listing_id: string; saved: boolean }>('POST', `/api/favorites/${listingId}`),
-  unsave: (listingId: string) => request<{ listing_id: string; saved: boolean }>('DELETE', `/api/favorites/${listingId}`),
+  lookup: (listingIds: string[]) => request<Record<string, boolean>>('POST', '/api/favorites/lookup', { listing_ids: listingIds }),
+  getSavedListingsPage: (cursor?: string, limit = 24) =>
+    request<{ listings: (Listing & { saved_at: string })[]; next_cursor: string | null; total: number }>(
+      'GET', `/api/favorites/listings/page?limit=${limit}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`),
+  save: (listingId: string) => request<{ listing_id: string; saved: boolean; save_count?: number }>('POST', `/api/favorites/${listingId}`),
+  unsave: (listingId: string) => request<{ listing_id: string; saved: boolean; save_count?: number }>('DELETE', `/api/favorites/${listingId}`),
 };
 
 // =============================================
@@ -258,12 +284,12 @@ export const inquiriesApi = {
 // =============================================
 
 export const adminApi = {
-  listings: (status?: string) => request<Listing[]>('GET', `/api/admin/listings${status ? `?status=${status}` : ''}`),
+  listings: (status?: string) => requestAllPages<Listing>(`/api/admin/listings${status ? `?status=${status}` : ''}`),
   approve: (id: string) => request<{ id: string; status: string }>('PUT', `/api/admin/listings/${id}/approve`),
   reject: (id: string) => request<{ id: string; status: string }>('PUT', `/api/admin/listings/${id}/reject`),
   feature: (id: string, featured: boolean) => request<{ id: string; featured: boolean }>('PUT', `/api/admin/listings/${id}/feature?featured=${featured}`),
-  users: () => request<{ id: string; email: string; role: string; display_name: string; created_at: string }[]>('GET', '/api/admin/users'),
-  inquiries: () => request<Inquiry[]>('GET', '/api/admin/inquiries'),
+  users: () => requestAllPages<{ id: string; email: string; role: string; display_name: string; created_at: string }>('/api/admin/users'),
+  inquiries: () => requestAllPages<Inquiry>('/api/admin/inquiries'),
   stats: () => request<{ listings: Record<string, number>; total_listings: number; users: Record<string, number>; total_users: number; total_inquiries: number }>('GET', '/api/admin/stats'),
 };
 
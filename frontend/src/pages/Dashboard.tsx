@@ -193,19 +193,37 @@ function CreatorDashboard() {
 function BuyerDashboard() {
   const { user } = useAuth();
   const [savedListings, setSavedListings] = useState<Listing[]>([]);
+  const [savedCursor, setSavedCursor] = useState<string | null>(null);
+  const [savedCount, setSavedCount] = useState(0);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [inquiries, setInquiries] = useState<Inquiry[]>([]);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     Promise.all([
-      favoritesApi.getSavedListings().catch(() => [] as Listing[]),
+      favoritesApi.getSavedListingsPage().catch(() => ({ listings: [] as Listing[], next_cursor: null, total: 0 })),
       inquiriesApi.sent().catch(() => [] as Inquiry[]),
-    ]).then(([saved, sent]) => {
-      setSavedListings(saved);
+    ]).then(([page, sent]) => {
+      setSavedListings(page.listings);
+      setSavedCursor(page.next_cursor);
+      setSavedCount(page.total);
       setInquiries(sent);
     }).finally(() => setLoading(false));
   }, []);
 
+  const loadMoreSaved = async () => {
+    if (!savedCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await favoritesApi.getSavedListingsPage(savedCursor);
+      setSavedListings((prev) => [...prev, ...page.listings]);
+      setSavedCursor(page.next_cursor);
+      setSavedCount(page.total);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const responded = inquiries.filter((i) => i.status === 'responded').length;
 
   return (
@@ -235,7 +253,7 @@ function BuyerDashboard() {
 
       {/* Stats */}
       <div className="grid md:grid-cols-3 gap-4 mb-8">
-        <StatsCard icon={<Heart className="w-6 h-6" />} label="Saved IPs" value={savedListings.length} color="gold" />
+        <StatsCard icon={<Heart className="w-6 h-6" />} label="Saved IPs" value={savedCount} color="gold" />
         <StatsCard icon={<Mail className="w-6 h-6" />} label="Inquiries Sent" value={inquiries.length} />
         <StatsCard icon={<Users className="w-6 h-6" />} label="Responses" value={responded} color="navy" />
       </div>
@@ -245,7 +263,7 @@ function BuyerDashboard() {
       ) : (
         <Tabs defaultValue="saved">
           <Tabs.List>
-            <Tabs.Trigger value="saved">Saved IPs ({savedListings.length})</Tabs.Trigger>
+            <Tabs.Trigger value="saved">Saved IPs ({savedCount})</Tabs.Trigger>
             <Tabs.Trigger value="inquiries">My Inquiries ({inquiries.length})</Tabs.Trigger>
           </Tabs.List>
 
@@ -276,6 +294,11 @@ function BuyerDashboard() {
                     ))}
                   </div>
                 )}
+                {savedCursor && (
+                  <div className="flex justify-center mt-6">
+                    <Button variant="ghost" loading={loadingMore} onClick={loadMoreSaved}>Load more</Button>
+                  </div>
+                )}
               </div>
             </Card>
           </Tabs.Content>
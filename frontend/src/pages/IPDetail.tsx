@@ -25,7 +25,7 @@ export function IPDetail() {
       .then((l) => {
         setListing(l);
         if (user) {
-          favoritesApi.getIds().then((ids) => setSaved(ids.includes(l.id))).catch(() => {});
+          favoritesApi.lookup([l.id]).then((state) => setSaved(!!state[l.id])).catch(() => {});
         }
       })
       .catch(() => setNotFound(true))